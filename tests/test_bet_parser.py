@@ -0,0 +1,197 @@
+"""
+The bet parser's corpus, checked against what the regex and if/elif parser it replaced gave for the same input.
+
+`SAME` and `REJECTED` parse exactly as they used to. `CHANGED` are the inputs that differ on purpose, each with what the
+old parser did.
+"""
+
+import pytest
+
+from waterfall_economy.util.bet_parser import parse_bet, parse_slip, tokenize, MAX_SLIP_BETS
+
+REDS = (1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36)
+BLACKS = (2, 4, 6, 8, 10, 11, 13, 15, 17, 20, 22, 24, 26, 28, 29, 31, 33, 35)
+EVENS = tuple(range(2, 37, 2))
+ODDS = tuple(range(1, 37, 2))
+LOWS = tuple(range(1, 19))
+HIGHS = tuple(range(19, 37))
+SNAKE = (1, 5, 9, 12, 14, 16, 19, 23, 27, 30, 32, 34)
+TOP_LINE = (0, 1, 2, 3)
+DOZENS = {1: tuple(range(1, 13)), 2: tuple(range(13, 25)), 3: tuple(range(25, 37))}
+COLUMNS = {column: tuple(range(column, 37, 3)) for column in (1, 2, 3)}
+
+RED = ("🔴 Red Bet", 1.0, REDS)
+BLACK = ("⚫ Black Bet", 1.0, BLACKS)
+EVEN = ("Evens Bet", 1.0, EVENS)
+ODD = ("Odds Bet", 1.0, ODDS)
+LOW = ("⬇️ Low (1-18) Bet", 1.0, LOWS)
+HIGH = ("⬆️ High (19-36) Bet", 1.0, HIGHS)
+ZERO = ("0️⃣ Zero Bet", 35.0, (0,))
+TOP = ("🔝 Top Line Bet on 0, 1, 2, and 3", 8.0, TOP_LINE)
+
+
+def straight(number):
+  return f"Straight Bet on {number}", 35.0, (number,)
+
+
+def split(low, high):
+  return f"Split Bet on {low} and {high}", 17.0, (low, high)
+
+
+def street(low):
+  return f"Street Bet on {low}, {low + 1}, and {low + 2}", 11.0, (low, low + 1, low + 2)
+
+
+def double_street(low):
+  return f"Double Street Bet on {low} to {low + 5}", 5.0, tuple(range(low, low + 6))
+
+
+def dozen(number):
+  pockets = DOZENS[number]
+  return f"Dozen Bet on {pockets[0]} to {pockets[-1]}", 2.0, pockets
+
+
+def column(number):
+  return f"Column Bet on Column {number}", 2.0, COLUMNS[number]
+
+
+def corner(low):
+  pockets = (low, low + 1, low + 3, low + 4)
+  return f"Corner Bet on {pockets[0]}, {pockets[1]}, {pockets[2]}, and {pockets[3]}", 8.0, pockets
+
+
+# bet -> (name, payout, pockets), the same as the old parser
+SAME = {
+  "red": RED, "reds": RED, "RED": RED, "Red": RED,
+  "even": EVEN, "evens": EVEN,
+  "odd": ODD, "odds": ODD,
+  "low": LOW, "lows": LOW,
+  "high": HIGH, "highs": HIGH,
+  "snake": ("🐍 Snake Bet", 2.0, SNAKE),
+  "zero": ZERO, "green": ZERO,
+  "top": TOP, "top line": TOP,
+
+  "1": straight(1), "17": straight(17), "36": straight(36),
+
+  # every separator the old split pattern knew
+  "1 2": split(1, 2), "1-2": split(1, 2), "1,2": split(1, 2), "1, 2": split(1, 2), "1 + 2": split(1, 2),
+  "1_2": split(1, 2), "1 & 2": split(1, 2), "1–2": split(1, 2), "2-1": split(1, 2),
+  "0 1": split(0, 1), "2 3": split(2, 3), "1 4": split(1, 4), "33 36": split(33, 36), "35 36": split(35, 36),
+
+  "1 3": street(1), "1-3": street(1), "4-6": street(4), "34 36": street(34),
+  "1 2 3": street(1), "3 2 1": street(1), "1-2-3": street(1), "34 35 36": street(34),
+  "1 6": double_street(1), "1-6": double_street(1), "7-12": double_street(7), "31 36": double_street(31),
+  "1 18": LOW, "19-36": HIGH,
+
+  "1 2 4 5": corner(1), "5 4 2 1": corner(1), "1-2-4-5": corner(1), "32 33 35 36": corner(32),
+  "corner 1": corner(1), "corner 2": corner(2), "corner 5": corner(5), "corner 32": corner(32),
+
+  "1 12": dozen(1), "13 24": dozen(2), "25-36": dozen(3),
+  "dozen 1": dozen(1), "dozen 2": dozen(2), "dozen 3": dozen(3), "12 1": dozen(1),
+  "first dozen": dozen(1), "second dozen": dozen(2), "middle dozen": dozen(2), "third dozen": dozen(3),
+  "last dozen": dozen(3), "1st dozen": dozen(1), "2nd dozen": dozen(2), "3rd dozen": dozen(3),
+  "1st 12": dozen(1), "last 12": dozen(3),
+
+  "column 1": column(1), "column 2": column(2), "col 3": column(3), "first column": column(1),
+  "middle col": column(2), "last column": column(3), "1st column": column(1), "2nd col": column(2),
+  "3rd column": column(3),
+}
+
+# bets both parsers turn down
+REJECTED = [
+  "", "foo", "line", "straight", "37", "40", "12 3", "red black", "top line now", "3rd 12 please",
+  "dozen 0", "dozen 4", "4th dozen", "column 0", "column 4", "corner 0", "corner 3", "corner 33",
+  "1 5", "2 4", "0 3", "0-1-2", "2 3 4", "1 2 3 5", "1 2 3 4 5",
+]
+
+# bet -> (what the old parser did, what it parses as now, None if it's rejected)
+CHANGED = {
+  # 0 was kept out of straight bets, and it isn't one of the zero bet's names
+  "0": ("rejected", ZERO),
+  "straight 17": ("rejected", straight(17)),
+  "number 5": ("rejected", straight(5)),
+  "straight 0": ("rejected", ZERO),
+  # "to" and "and" used to split into their own token, so these were three words long
+  "1 to 3": ("rejected", street(1)),
+  "3 and 6": ("rejected", split(3, 6)),
+  "13 to 24": ("rejected", dozen(2)),
+  "19 to 36": ("rejected", HIGH),
+  # a 0 failed the old four number check before the top line check was reached
+  "0 1 2 3": ("rejected", TOP),
+  "3 2 1 0": ("rejected", TOP),
+  # a street on a repeated number covered 1 to 3
+  "1 1 3": ("street on 1, 1 and 3", None),
+  # only the first digit of an ordinal was read
+  "21st dozen": ("dozen on 13 to 24", None),
+  "21st 12": ("dozen on 13 to 24", None),
+  "21st column": ("column 2", None),
+  # corners that start on the last column wrapped around onto the next row
+  "3 4 6 7": ("corner on 3, 4, 6 and 7", None),
+  "6 7 9 10": ("corner on 6, 7, 9 and 10", None),
+  # the old black list had 2 twice and was missing 29
+  "black": ("black without 29", BLACK),
+  "blacks": ("black without 29", BLACK),
+}
+
+
+def mask_of(pockets) -> int:
+  return sum(1 << pocket for pocket in pockets)
+
+
+def assert_parses_as(bet: str, expected):
+  name, payout, pockets = expected
+  bet_type = parse_bet(bet.split())
+  assert (bet_type.name, bet_type.payout, bet_type.mask) == (name, payout, mask_of(pockets))
+
+
+@pytest.mark.parametrize("bet", SAME)
+def test_same_as_old_parser(bet):
+  assert_parses_as(bet, SAME[bet])
+
+
+@pytest.mark.parametrize("bet", REJECTED)
+def test_rejected(bet):
+  with pytest.raises(ValueError):
+    parse_bet(bet.split())
+
+
+@pytest.mark.parametrize("bet", CHANGED)
+def test_deliberate_changes(bet):
+  _, expected = CHANGED[bet]
+  if expected is None:
+    with pytest.raises(ValueError):
+      parse_bet(bet.split())
+  else:
+    assert_parses_as(bet, expected)
+
+
+@pytest.mark.parametrize("number", range(37))
+def test_every_straight_bet(number):
+  assert_parses_as(str(number), ZERO if number == 0 else straight(number))
+
+
+def test_tokenize():
+  assert tokenize("1st  Dozen") == ("1st", "dozen")
+  assert tokenize("13 to 24") == ("13", "24")
+  assert tokenize("1,2-4_5") == ("1", "2", "4", "5")
+
+
+def test_parse_slip():
+  slip = parse_slip("100 red; 1,000 17 ; 25 1st dozen;".split())
+  assert [(amount, bet_type.name) for amount, bet_type in slip] == [
+    (100, RED[0]), (1000, straight(17)[0]), (25, dozen(1)[0])
+  ]
+  assert parse_slip(["all", "red"])[0][0] == "all"
+
+
+@pytest.mark.parametrize("slip, error", [
+  ("", "Please specify a bet amount and type."),
+  ("lots red", "Please specify a valid bet amount."),
+  ("100 red; 50 purple", "Bet 2 (`50 purple`): Invalid bet type specified."),
+  ("all red; 50 17", "Bet 1 (`all red`): You can only go all in on a single bet."),
+  ("; ".join(["1 red"] * (MAX_SLIP_BETS + 1)), f"You can place at most {MAX_SLIP_BETS} bets at once."),
+])
+def test_parse_slip_errors(slip, error):
+  with pytest.raises(ValueError) as raised:
+    parse_slip(slip.split())
+  assert str(raised.value) == error
@@ -0,0 +1,101 @@
+"""
+Checks the compiled pocket masks against the closures they replaced.
+
+Each case pairs a bet with the win condition the old parser built for it, written out the same way, and every pocket on
+the wheel has to agree.
+"""
+
+import random
+
+import pytest
+
+from waterfall_economy.util.bet_parser import parse_bet
+from waterfall_economy.util.gambling import RouletteBet, RouletteBetType, settle, split_winners
+
+OLD_REDS = [32, 19, 21, 25, 34, 27, 36, 30, 23, 5, 16, 1, 14, 9, 18, 7, 12, 3]
+# the old list had 2 twice and no 29, the wheel fix put 29 back, so it's the only pocket that differs
+OLD_BLACKS = [15, 4, 2, 17, 6, 13, 11, 8, 10, 24, 33, 20, 31, 22, 29, 28, 35, 26]
+
+CONDITIONS = [
+  ("17", lambda result: result == 17),
+  ("36", lambda result: result == 36),
+  ("zero", lambda result: result == 0),
+  ("red", lambda result: result in OLD_REDS),
+  ("black", lambda result: result in OLD_BLACKS),
+  ("even", lambda result: result != 0 and result % 2 == 0),
+  ("odd", lambda result: result % 2 == 1),
+  ("low", lambda result: 1 <= result <= 18),
+  ("high", lambda result: 19 <= result <= 36),
+  ("snake", lambda result: result in [1, 5, 9, 12, 14, 16, 19, 23, 27, 30, 32, 34]),
+  ("top", lambda result: result in [0, 1, 2, 3]),
+  ("top line", lambda result: result in [0, 1, 2, 3]),
+  ("0 1", lambda result: result == 0 or result == 1),
+  ("8 11", lambda result: result == 8 or result == 11),
+  ("35 36", lambda result: result == 35 or result == 36),
+  ("1 3", lambda result: 1 <= result <= 3),
+  ("34-36", lambda result: 34 <= result <= 36),
+  ("1 6", lambda result: 1 <= result <= 6),
+  ("31-36", lambda result: 31 <= result <= 36),
+  ("13 24", lambda result: 13 <= result <= 24),
+  ("1 18", lambda result: 1 <= result <= 18),
+  ("19 36", lambda result: 19 <= result <= 36),
+  ("dozen 1", lambda result: 1 <= result <= 12),
+  ("2nd dozen", lambda result: 13 <= result <= 24),
+  ("last dozen", lambda result: 25 <= result <= 36),
+  ("column 1", lambda result: result != 0 and (result - 1) % 3 == 0),
+  ("middle column", lambda result: result != 0 and (result - 2) % 3 == 0),
+  ("3rd col", lambda result: result != 0 and (result - 3) % 3 == 0),
+  ("corner 1", lambda result: result in [1, 2, 4, 5]),
+  ("corner 32", lambda result: result in [32, 33, 35, 36]),
+  ("4 5 6", lambda result: 4 <= result <= 6),
+  ("20 21 23 24", lambda result: result in [20, 21, 23, 24]),
+]
+
+
+@pytest.mark.parametrize("bet, condition", CONDITIONS, ids=[bet for bet, _ in CONDITIONS])
+def test_mask_matches_old_condition(bet, condition):
+  bet_type = parse_bet(bet.split())
+  assert [bet_type.check_win(result) for result in range(37)] == [condition(result) for result in range(37)]
+
+
+def test_bet_types_are_interned():
+  assert parse_bet(["red"]) is parse_bet(["reds"])
+  assert parse_bet(["1", "12"]) is parse_bet(["first", "dozen"])
+  assert RouletteBetType.intern("Straight Bet on 7", 35.0, [7]) is parse_bet(["7"])
+
+  # same pockets at a different payout is a different bet
+  assert RouletteBetType.intern("Cheap 7", 17.0, [7]) is not parse_bet(["7"])
+
+
+def test_from_mask_round_trips():
+  for bet, _ in CONDITIONS:
+    bet_type = parse_bet(bet.split())
+    assert RouletteBetType.from_mask(bet_type.name, bet_type.payout, bet_type.mask) is bet_type
+
+
+def test_settlement_matches_checking_every_bet():
+  rng = random.Random(11)
+  bettors = [type("Bettor", (), {"id": bettor_id})() for bettor_id in range(8)]
+  bets = [
+    RouletteBet(rng.choice(bettors), parse_bet(rng.choice(CONDITIONS)[0].split()), rng.randint(1, 500))
+    for _ in range(2_000)
+  ]
+
+  for result in range(37):
+    winners, losers = split_winners(bets, result)
+    assert {id(bet) for bet in winners} == {id(bet) for bet in bets if bet.check_bet_win(result)}
+    assert len(winners) + len(losers) == len(bets)
+
+    expected = {}
+    for bet in bets:
+      payout, won, lost = expected.get(bet.bettor.id, (0, 0, 0))
+      if bet.check_bet_win(result):
+        bet_payout = int(bet.amount * (bet.bet_type.payout + 1))
+        expected[bet.bettor.id] = (payout + bet_payout, won + bet_payout - bet.amount, lost)
+      else:
+        expected[bet.bettor.id] = (payout, won, lost + bet.amount)
+
+    assert {
+      bettor_result.bettor.id: (bettor_result.payout, bettor_result.won, bettor_result.lost)
+      for bettor_result in settle(bets, result)
+    } == expected
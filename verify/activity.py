@@ -0,0 +1,56 @@
+from typing import Optional
+
+
+class ActivityIndex:
+  """
+  When each member last sent a message, per guild.
+
+  Every message updates the in-memory time, but a member is only queued to be written again once their time has moved on
+  by more than `resolution` seconds from what's stored. However much someone talks, that's at most one write per member
+  per `resolution`, and what's on disk is never more than that behind.
+  """
+
+  def __init__(self, resolution: float = 600):
+    self.resolution = resolution
+    self._last: dict[int, dict[int, float]] = {}  # guild id -> member id -> last message time
+    self._stored: dict[int, dict[int, float]] = {}  # the same, as of the last write
+    self._dirty: dict[int, set[int]] = {}
+
+  def load(self, guild_id: int, member_id: int, last_message_at: float):
+    """Fill in a stored time, without queueing a write."""
+    self._last.setdefault(guild_id, {})[member_id] = last_message_at
+    self._stored.setdefault(guild_id, {})[member_id] = last_message_at
+
+  def touch(self, guild_id: int, member_id: int, timestamp: float):
+    last = self._last.setdefault(guild_id, {})
+    if timestamp <= last.get(member_id, 0):
+      return
+    last[member_id] = timestamp
+
+    stored = self._stored.get(guild_id, {}).get(member_id)
+    if stored is None or timestamp - stored >= self.resolution:
+      self._dirty.setdefault(guild_id, set()).add(member_id)
+
+  def last_active(self, guild_id: int, member_id: int) -> Optional[float]:
+    return self._last.get(guild_id, {}).get(member_id)
+
+  def take_dirty(self) -> dict[int, dict[int, float]]:
+    """Take the times that need writing, marking them as stored."""
+    dirty, self._dirty = self._dirty, {}
+    writes = {}
+    for guild_id, member_ids in dirty.items():
+      last, stored = self._last[guild_id], self._stored.setdefault(guild_id, {})
+      writes[guild_id] = {member_id: last[member_id] for member_id in member_ids}
+      stored.update(writes[guild_id])
+    return writes
+
+  def requeue(self, writes: dict[int, dict[int, float]]):
+    """Put back times whose write failed, so they're tried again on the next flush."""
+    for guild_id, times in writes.items():
+      stored = self._stored.get(guild_id, {})
+      for member_id in times:
+        stored.pop(member_id, None)
+      self._dirty.setdefault(guild_id, set()).update(times)
+
+  def __len__(self) -> int:
+    return sum(len(members) for members in self._last.values())
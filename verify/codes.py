@@ -0,0 +1,68 @@
+import hashlib
+import hmac
+import secrets
+import string
+from typing import NamedTuple, Optional
+
+CHAR_POOLS = {
+  "alphanumeric": string.ascii_letters + string.digits,
+  "numeric": string.digits,
+  "alphabetical": string.ascii_letters,
+}
+
+
+def char_pool(code_type: str) -> str:
+  # fallback if the code type is invalid
+  return CHAR_POOLS.get(code_type, "!")
+
+
+def random_code(code_type: str, length: int) -> str:
+  """Generate a random verification code with a cryptographically secure generator."""
+  pool = char_pool(code_type)
+  return "".join(secrets.choice(pool) for _ in range(length))
+
+
+def new_secret() -> str:
+  return secrets.token_hex(32)
+
+
+class DerivedCodes(NamedTuple):
+  """
+  Verification codes worked out from an HMAC of (guild, member, expiry period) under a per-guild secret.
+
+  Nothing has to be stored per member, a code is checked by working it out again. Time is split into periods as long as
+  the code expiry, and a code is accepted in the period it was made and the one after, so it lasts at least the expiry
+  time and at most twice that.
+  """
+  secret: str
+  length: int
+  code_type: str
+  expiry: float  # 0 if codes never expire
+
+  def period(self, now: float) -> int:
+    return int(now // self.expiry) if self.expiry else 0
+
+  def code_for(self, guild_id: int, member_id: int, period: int) -> str:
+    digest = hmac.new(self.secret.encode(), f"{guild_id}:{member_id}:{period}".encode(), hashlib.sha256).digest()
+
+    # read the digest as one big number, written out in base len(pool)
+    pool = char_pool(self.code_type)
+    value = int.from_bytes(digest, "big")
+    code = []
+    for _ in range(self.length):
+      value, index = divmod(value, len(pool))
+      code.append(pool[index])
+    return "".join(code)
+
+  def expires_at(self, period: int) -> Optional[float]:
+    return (period + 2) * self.expiry if self.expiry else None
+
+  def check(self, guild_id: int, member_id: int, code: str, now: float) -> Optional[bool]:
+    """True if the code is valid, False if it's one that has recently expired, None if it isn't the member's code."""
+    period = self.period(now)
+    code = code.encode()
+    if any(hmac.compare_digest(code, self.code_for(guild_id, member_id, p).encode()) for p in (period, period - 1)):
+      return True
+    if self.expiry and hmac.compare_digest(code, self.code_for(guild_id, member_id, period - 2).encode()):
+      return False
+    return None
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import discord
+
+log = logging.getLogger("red.waterfall.verify.crawler")
+
+
+class HistoryCrawler:
+  """
+  Finds when each member last sent a message in a guild's text channels, going back as far as a cutoff.
+
+  Several channels are crawled at once, bounded by a semaphore (discord.py handles the rate limits themselves). The last
+  message read in each channel and the authors found so far are checkpointed to disk, so a scan that gets interrupted
+  picks up where it left off, and running it again later only reads the messages sent since.
+
+  The cutoff is normally `days` before the scan started, or a fixed time if `since` is given instead.
+  """
+
+  def __init__(
+      self,
+      guild: discord.Guild,
+      days: int,
+      started: float,
+      checkpoint_path: Path,
+      concurrency: int = 4,
+      since: float = None
+  ):
+    self.guild = guild
+    self.days = days
+    self.started = started
+    self.since = since
+    self.cutoff = since if since is not None else started - days * 86400
+    self.checkpoint_path = checkpoint_path
+    self.concurrency = concurrency
+
+    self.last_seen: dict[int, int] = {}  # channel id -> id of the newest message read in it
+    self.last_message: dict[int, float] = {}  # author id -> time of their newest message read
+
+    self.channels_total = 0
+    self.channels_done = 0
+    self.channels_skipped = 0
+    self.messages = 0
+    self.resumed = False
+
+  @classmethod
+  def resume(
+      cls, guild: discord.Guild, days: int, checkpoint_path: Path, max_age: float, concurrency: int = 4,
+      since: float = None
+  ) -> "HistoryCrawler":
+    """Pick up a checkpointed scan with the same cutoff, or start a new one if there isn't a recent one."""
+    now = time.time()
+    try:
+      with open(checkpoint_path, encoding="utf-8") as file:
+        checkpoint = json.load(file)
+    except FileNotFoundError:
+      checkpoint = None
+    except ValueError:
+      log.warning("Ignoring unreadable history scan checkpoint %s", checkpoint_path)
+      checkpoint = None
+
+    # checkpoints from before last message times were kept only have "active", and can't be resumed
+    if (
+        checkpoint is not None and "last_message" in checkpoint and checkpoint["days"] == days
+        and checkpoint.get("since") == since and now - checkpoint["started"] <= max_age
+    ):
+      crawler = cls(guild, days, checkpoint["started"], checkpoint_path, concurrency, since)
+      crawler.last_seen = {int(channel_id): message_id for channel_id, message_id in checkpoint["last_seen"].items()}
+      crawler.last_message = {int(author_id): sent for author_id, sent in checkpoint["last_message"].items()}
+      crawler.resumed = True
+      return crawler
+
+    return cls(guild, days, now, checkpoint_path, concurrency, since)
+
+  def save(self):
+    """Checkpoint the scan, replacing the file in one go so a crash can't leave half a checkpoint."""
+    checkpoint = {
+      "days": self.days,
+      "started": self.started,
+      "since": self.since,
+      "last_seen": self.last_seen,
+      "last_message": self.last_message,
+    }
+    temp_path = self.checkpoint_path.with_suffix(".tmp")
+    with open(temp_path, "w", encoding="utf-8") as file:
+      json.dump(checkpoint, file, separators=(",", ":"))
+    os.replace(temp_path, self.checkpoint_path)
+
+  def _readable(self, channel: discord.TextChannel) -> bool:
+    permissions = channel.permissions_for(self.guild.me)
+    return permissions.read_messages and permissions.read_message_history
+
+  async def _crawl_channel(self, channel: discord.TextChannel, semaphore: asyncio.Semaphore):
+    async with semaphore:
+      if channel.id in self.last_seen:
+        after = discord.Object(id=self.last_seen[channel.id])
+      else:
+        after = datetime.fromtimestamp(self.cutoff, timezone.utc)
+
+      try:
+        async for message in channel.history(limit=None, after=after, oldest_first=True):
+          if not message.author.bot:
+            sent = message.created_at.timestamp()
+            if sent > self.last_message.get(message.author.id, 0):
+              self.last_message[message.author.id] = sent
+          self.last_seen[channel.id] = message.id
+          self.messages += 1
+      except discord.Forbidden:
+        self.channels_skipped += 1
+        return
+
+      self.channels_done += 1
+
+  async def run(
+      self, on_progress: Callable[["HistoryCrawler"], Awaitable] = None, interval: float = 10
+  ) -> dict[int, float]:
+    """Crawl every readable text channel, checkpointing and reporting progress every `interval` seconds."""
+    channels = [channel for channel in self.guild.text_channels if self._readable(channel)]
+    self.channels_total = len(channels)
+    self.channels_skipped = len(self.guild.text_channels) - len(channels)
+
+    semaphore = asyncio.Semaphore(self.concurrency)
+    crawl = asyncio.gather(*(self._crawl_channel(channel, semaphore) for channel in channels))
+
+    try:
+      while True:
+        done, _ = await asyncio.wait([crawl], timeout=interval)
+        if done:
+          break
+        self.save()
+        if on_progress is not None:
+          await on_progress(self)
+      await crawl
+    finally:
+      if not crawl.done():
+        crawl.cancel()
+      # whatever happened, keep what's been read so far
+      self.save()
+
+    return self.last_message
@@ -0,0 +1,63 @@
+import heapq
+from typing import NamedTuple, Optional
+
+MemberKey = tuple[int, int]  # (guild id, member id)
+
+
+class PendingCode(NamedTuple):
+  code: str
+  expires_at: Optional[float]  # None if the code never expires
+
+  def expired(self, now: float) -> bool:
+    return self.expires_at is not None and self.expires_at <= now
+
+
+class PendingCodes:
+  """
+  The verification codes that are waiting to be used, indexed by member.
+
+  Codes that expire are also kept in a heap, soonest first, so the expired ones can be found without going through every
+  code. Replaced and removed codes are left in the heap and skipped when they come up.
+  """
+
+  def __init__(self):
+    self._codes: dict[MemberKey, PendingCode] = {}
+    self._expiries: list[tuple[float, MemberKey]] = []
+
+  def get(self, key: MemberKey) -> Optional[PendingCode]:
+    """Get a member's code, expired or not."""
+    return self._codes.get(key)
+
+  def valid(self, key: MemberKey, now: float) -> Optional[PendingCode]:
+    """Get a member's code if it hasn't expired yet."""
+    pending = self._codes.get(key)
+    if pending is None or pending.expired(now):
+      return None
+    return pending
+
+  def add(self, key: MemberKey, code: str, expires_at: Optional[float]) -> PendingCode:
+    pending = self._codes[key] = PendingCode(code, expires_at)
+    if expires_at is not None:
+      heapq.heappush(self._expiries, (expires_at, key))
+    return pending
+
+  def discard(self, key: MemberKey):
+    self._codes.pop(key, None)
+
+  def pop_expired(self, before: float) -> list[MemberKey]:
+    """Remove and return every code that expired before the given time."""
+    expired = []
+    while self._expiries and self._expiries[0][0] <= before:
+      expires_at, key = heapq.heappop(self._expiries)
+      pending = self._codes.get(key)
+      # skip heap entries for codes that have been replaced or removed since
+      if pending is not None and pending.expires_at == expires_at:
+        del self._codes[key]
+        expired.append(key)
+    return expired
+
+  def __contains__(self, key: MemberKey) -> bool:
+    return key in self._codes
+
+  def __len__(self) -> int:
+    return len(self._codes)
@@ -1,13 +1,22 @@
 from datetime import datetime, timezone, timedelta
 
+import asyncio
 import calendar
-import string
-import random
+import logging
+import time
 
 import discord
 from redbot.core import Config, commands, modlog
 from redbot.core.commands.converter import TimedeltaConverter
 from redbot.core.commands.requires import PrivilegeLevel
+from redbot.core.data_manager import cog_data_path
+
+from .activity import ActivityIndex
+from .codes import DerivedCodes, random_code, new_secret
+from .crawler import HistoryCrawler
+from .pending_codes import PendingCodes
+
+log = logging.getLogger("red.waterfall.verify")
 
 
 class WaterfallVerification(commands.Cog):
@@ -20,20 +29,39 @@ class WaterfallVerification(commands.Cog):
     "VERIFICATION_CODE_LENGTH": 6,
     "VERIFICATION_CODE_TYPE": "alphanumeric",
     "VERIFICATION_CODE_EXPIRY": 300,
-    "VERIFICATION_IGNORED_ROLES": []
+    "VERIFICATION_CODE_MODE": "stored",  # "stored" codes are kept per member, "derived" ones are worked out again
+    "VERIFICATION_SECRET": None,
+    "VERIFICATION_IGNORED_ROLES": [],
+    "ACTIVITY_TRACKED_SINCE": None,  # the activity index knows about every message sent in the guild since this time
+    "ACTIVITY_GAP_SINCE": None  # messages from this time on may be missing from the index, until the history is reread
   }
 
-  default_global_settings = default_guild_settings
+  default_global_settings = {
+    **default_guild_settings,
+    "ACTIVITY_INDEXED_AT": None  # when the activity index was last written, to spot time the bot wasn't watching
+  }
 
   default_member_settings = {
     "verified": False,
     "verification_code": None,
     "code_expires_at": None,
-    "verified_at": None
+    "verified_at": None,
+    "last_message_at": None
   }
 
   default_user_settings = default_member_settings
 
+  sweep_interval = 60  # seconds between sweeps for expired codes
+  sweep_grace = 3600  # expired codes are kept this long, so people trying them are told they've expired
+  sweep_batch_size = 100  # members per Config write when purging codes
+
+  scan_concurrency = 4  # channels crawled at once by `unverify inactive`
+  scan_checkpoint_age = 86400  # how long a history scan can be picked back up for, instead of starting over
+
+  activity_resolution = 600  # a member's last message time is written at most once per this many seconds
+  activity_flush_interval = 300  # seconds between writes of the activity index
+  activity_batch_size = 500  # members per Config write when flushing the activity index
+
   def __init__(self, bot):
     super().__init__()
     self.bot = bot
@@ -44,8 +72,219 @@ class WaterfallVerification(commands.Cog):
     self.config.register_member(**self.default_member_settings)
     self.config.register_user(**self.default_user_settings)
 
+    # in-memory copies of what the on_message listener needs, so it can skip most messages without reading Config
+    self._verification_channels: dict[int, int] = {}  # guild id -> verification channel id
+    self.pending_codes = PendingCodes()
+    self._derived_codes: dict[int, DerivedCodes] = {}  # guild id -> code settings, for guilds using derived codes
+    self._stale_codes: dict[int, set[int]] = {}  # guild id -> members whose stored code should be purged
+    self._sweeper = None
+
+    self.activity = ActivityIndex(self.activity_resolution)
+    self._activity_since: dict[int, float] = {}  # guild id -> time the activity index is complete from
+    self._activity_gaps: dict[int, float] = {}  # guild id -> time the index may be missing messages from
+    self._activity_flusher = None
+    self._gap_backfill = None
+
   async def cog_load(self):
     await self.register_casetypes()
+    await self._load_verification_state()
+    await self._check_activity_gap()
+    self._sweeper = asyncio.create_task(self._sweep_loop())
+    self._activity_flusher = asyncio.create_task(self._activity_loop())
+    if self._activity_gaps:
+      self._gap_backfill = asyncio.create_task(self._backfill_activity_gaps())
+
+  async def cog_unload(self):
+    if self._sweeper is not None:
+      self._sweeper.cancel()
+    if self._activity_flusher is not None:
+      self._activity_flusher.cancel()
+    if self._gap_backfill is not None:
+      # the crawl is checkpointed, so the next load picks it back up
+      self._gap_backfill.cancel()
+    try:
+      await self._flush_activity()
+    except Exception:
+      log.exception("Failed to write the activity index while unloading")
+
+  async def _load_verification_state(self):
+    """Fill the channel map, the pending code index and the activity index from Config."""
+    all_guilds = await self.config.all_guilds()
+    for guild_id, guild_data in all_guilds.items():
+      if guild_data.get("VERIFICATION_CHANNEL") is not None:
+        self._verification_channels[guild_id] = guild_data["VERIFICATION_CHANNEL"]
+      if guild_data.get("ACTIVITY_TRACKED_SINCE") is not None:
+        self._activity_since[guild_id] = guild_data["ACTIVITY_TRACKED_SINCE"]
+      if guild_data.get("ACTIVITY_GAP_SINCE") is not None:
+        self._activity_gaps[guild_id] = guild_data["ACTIVITY_GAP_SINCE"]
+      self._cache_code_settings(guild_id, {**self.default_guild_settings, **guild_data})
+
+    for guild_id, members in (await self.config.all_members()).items():
+      for member_id, member_data in members.items():
+        if member_data.get("last_message_at") is not None:
+          self.activity.load(guild_id, member_id, member_data["last_message_at"])
+        if member_data.get("verification_code") is None:
+          continue
+        if member_data.get("verified"):
+          # left over from before codes were cleaned up after verifying
+          self._stale_codes.setdefault(guild_id, set()).add(member_id)
+          continue
+        # stored codes keep the expiry they were issued with, whatever the setting is now
+        self.pending_codes.add(
+          (guild_id, member_id), member_data["verification_code"], member_data.get("code_expires_at")
+        )
+
+  def _cache_code_settings(self, guild_id: int, guild_data: dict):
+    """Keep a guild's code settings in memory if it uses derived codes, so they can be checked without Config."""
+    if guild_data["VERIFICATION_CODE_MODE"] == "derived" and guild_data["VERIFICATION_SECRET"] is not None:
+      self._derived_codes[guild_id] = DerivedCodes(
+        guild_data["VERIFICATION_SECRET"],
+        guild_data["VERIFICATION_CODE_LENGTH"],
+        guild_data["VERIFICATION_CODE_TYPE"],
+        guild_data["VERIFICATION_CODE_EXPIRY"],
+      )
+    else:
+      self._derived_codes.pop(guild_id, None)
+
+  async def _refresh_code_settings(self, guild: discord.Guild):
+    self._cache_code_settings(guild.id, await self.config.guild(guild).all())
+
+  def _mark_code_stale(self, guild_id: int, member_id: int):
+    """Drop a member's code from the index, and queue it to be purged from Config on the next sweep."""
+    self.pending_codes.discard((guild_id, member_id))
+    self._stale_codes.setdefault(guild_id, set()).add(member_id)
+
+  async def _sweep_loop(self):
+    while True:
+      try:
+        await self._sweep_codes()
+      except Exception:
+        log.exception("Failed to sweep expired verification codes")
+      await asyncio.sleep(self.sweep_interval)
+
+  async def _sweep_codes(self):
+    """Purge expired and used codes from Config, a batch of members per write."""
+    for guild_id, member_id in self.pending_codes.pop_expired(time.time() - self.sweep_grace):
+      self._stale_codes.setdefault(guild_id, set()).add(member_id)
+
+    stale, self._stale_codes = self._stale_codes, {}
+    for guild_id, member_ids in stale.items():
+      # anyone who got a new code since their old one was queued keeps it
+      member_ids = [member_id for member_id in member_ids if (guild_id, member_id) not in self.pending_codes]
+      group = self.config._get_base_group(self.config.MEMBER, str(guild_id))
+
+      for i in range(0, len(member_ids), self.sweep_batch_size):
+        async with group.all() as members:
+          for member_id in member_ids[i:i + self.sweep_batch_size]:
+            stored = members.get(str(member_id))
+            if stored is None:
+              continue
+            stored.pop("verification_code", None)
+            stored.pop("code_expires_at", None)
+            if not stored:
+              del members[str(member_id)]
+
+  async def _check_activity_gap(self):
+    """
+    Note that the activity index may be missing messages since it was last written.
+
+    However short, the bot wasn't watching for part of that time, and anything it had buffered but not written yet is
+    gone, so every tracked guild's history from then on is read again in the background.
+    """
+    indexed_at = await self.config.ACTIVITY_INDEXED_AT()
+    if indexed_at is None:
+      # no idea when the index was last right, so it only counts from the next message on
+      for guild_id in self._activity_since.keys() | self._activity_gaps.keys():
+        await self.config.guild_from_id(guild_id).ACTIVITY_TRACKED_SINCE.clear()
+        await self.config.guild_from_id(guild_id).ACTIVITY_GAP_SINCE.clear()
+      self._activity_since.clear()
+      self._activity_gaps.clear()
+      return
+
+    for guild_id in self._activity_since:
+      # an earlier gap that hasn't been filled yet still needs reading from where it started
+      gap_since = min(indexed_at, self._activity_gaps.get(guild_id, indexed_at))
+      self._activity_gaps[guild_id] = gap_since
+      await self.config.guild_from_id(guild_id).ACTIVITY_GAP_SINCE.set(gap_since)
+
+  async def _backfill_activity_gaps(self):
+    """Read back the history of every guild with a gap in its activity index, until there are none left."""
+    await self.bot.wait_until_red_ready()
+    for guild_id, gap_since in list(self._activity_gaps.items()):
+      guild = self.bot.get_guild(guild_id)
+      if guild is None:
+        continue
+      crawler = HistoryCrawler.resume(
+        guild, 0, cog_data_path(self) / f"activity_gap_{guild_id}.json", self.scan_checkpoint_age,
+        self.scan_concurrency, since=gap_since
+      )
+      try:
+        last_messages = await crawler.run()
+      except Exception:
+        log.exception("Failed to backfill the activity index for guild %d", guild_id)
+        continue
+      await self._fill_activity(guild, last_messages, crawler.cutoff)
+
+  async def _fill_activity(self, guild: discord.Guild, last_messages: dict[int, float], read_since: float):
+    """Record what a history crawl found, closing any gap in the index that the crawl covered."""
+    for member_id, last_message_at in last_messages.items():
+      self.activity.touch(guild.id, member_id, last_message_at)
+
+    gap_since = self._activity_gaps.get(guild.id)
+    if gap_since is not None and read_since <= gap_since:
+      del self._activity_gaps[guild.id]
+      await self.config.guild(guild).ACTIVITY_GAP_SINCE.clear()
+    await self._flush_activity()
+
+  async def _activity_loop(self):
+    while True:
+      await asyncio.sleep(self.activity_flush_interval)
+      try:
+        await self._flush_activity()
+      except Exception:
+        log.exception("Failed to write the activity index")
+
+  async def _flush_activity(self):
+    """Write the last message times that have changed, a batch of members per write."""
+    writes = self.activity.take_dirty()
+    try:
+      for guild_id, times in writes.items():
+        group = self.config._get_base_group(self.config.MEMBER, str(guild_id))
+        times = list(times.items())
+
+        for i in range(0, len(times), self.activity_batch_size):
+          async with group.all() as members:
+            for member_id, last_message_at in times[i:i + self.activity_batch_size]:
+              members.setdefault(str(member_id), {})["last_message_at"] = last_message_at
+    except Exception:
+      # some of these may have been written, writing them again is harmless
+      self.activity.requeue(writes)
+      raise
+
+    await self.config.ACTIVITY_INDEXED_AT.set(time.time())
+
+  async def _backfill_activity(self, ctx, days: int):
+    """Fill the activity index from the guild's message history, so it covers at least the last `days` days."""
+    crawler = HistoryCrawler.resume(
+      ctx.guild, days, cog_data_path(self) / f"inactive_scan_{ctx.guild.id}.json", self.scan_checkpoint_age,
+      self.scan_concurrency
+    )
+    status_message = await ctx.send(embed=self._scan_status_embed(crawler))
+
+    async def report_progress(progress: HistoryCrawler):
+      try:
+        await status_message.edit(embed=self._scan_status_embed(progress))
+      except discord.HTTPException:
+        pass
+
+    last_messages = await crawler.run(report_progress)
+    await report_progress(crawler)
+
+    # the crawl read everything up to when it finished, and the listener has been recording messages since it started
+    tracked_since = min(crawler.cutoff, self._activity_since.get(ctx.guild.id, crawler.cutoff))
+    self._activity_since[ctx.guild.id] = tracked_since
+    await self.config.guild(ctx.guild).ACTIVITY_TRACKED_SINCE.set(tracked_since)
+    await self._fill_activity(ctx.guild, last_messages, crawler.cutoff)
 
   @staticmethod
   async def register_casetypes():
@@ -87,7 +326,8 @@ class WaterfallVerification(commands.Cog):
         return
       return await ctx.send(embed=self._error_embed(f"{user.mention} is already verified."))
     else:
-      # set the user as verified
+      # set the user as verified, their code gets purged on the next sweep
+      self._mark_code_stale(user.guild.id, user.id)
       await self.config.member(user).verified.set(True)
       # set the time the user was verified
       await self.config.member(user).verified_at.set(datetime.now().timestamp())
@@ -115,6 +355,7 @@ class WaterfallVerification(commands.Cog):
       # remove verification timestamp
       await self.config.member(user).verified_at.set(None)
       # remove verification code
+      self.pending_codes.discard((user.guild.id, user.id))
       await self.config.member(user).verification_code.set(None)
       # remove verification code expiry
       await self.config.member(user).code_expires_at.set(None)
@@ -157,6 +398,7 @@ class WaterfallVerification(commands.Cog):
   async def command_verifyset_channel(self, ctx, channel: discord.TextChannel):
     """Set the verification channel. This is where users must run the verification command."""
     await self.config.guild(ctx.guild).VERIFICATION_CHANNEL.set(channel.id)
+    self._verification_channels[ctx.guild.id] = channel.id
     await ctx.send(f"Verification channel set to {channel.mention}.")
 
   @command_verifyset.command(name="role")
@@ -187,6 +429,7 @@ class WaterfallVerification(commands.Cog):
         embed=self._error_embed("The verification code must not be longer than 32 characters.", "Invalid Length"))
       return
     await self.config.guild(ctx.guild).VERIFICATION_CODE_LENGTH.set(length)
+    await self._refresh_code_settings(ctx.guild)
     await ctx.send(f"Verification code length set to {length}.")
 
   @command_verifyset_code.command(name="type")
@@ -200,11 +443,17 @@ class WaterfallVerification(commands.Cog):
       return
     # update the config
     await self.config.guild(ctx.guild).VERIFICATION_CODE_TYPE.set(code_type)
+    await self._refresh_code_settings(ctx.guild)
     await ctx.send(f"Verification codes will now be {code_type}.")
 
   @command_verifyset_code.command(name="expiry")
   async def command_verifyset_code_expiry(self, ctx, expiry: TimedeltaConverter):
-    """Set the expiry time for verification codes (in seconds)."""
+    """
+    Set the expiry time for verification codes (in seconds).
+
+    With stored codes this only applies to codes issued from now on, ones already handed out keep their expiry. Derived
+    codes are all worked out from the current expiry, so it applies to them straight away.
+    """
 
     expiry_seconds = expiry.total_seconds()
 
@@ -218,11 +467,38 @@ class WaterfallVerification(commands.Cog):
         embed=self._error_embed("The expiry time for verification codes must be less than 86400 seconds (24 hours)."))
       return
 
-    await self.config.guild(ctx.guild).VERIFICATION_CODE_EXPIRY.set(expiry)
+    await self.config.guild(ctx.guild).VERIFICATION_CODE_EXPIRY.set(expiry_seconds)
+    await self._refresh_code_settings(ctx.guild)
+    applies_to = "" if ctx.guild.id in self._derived_codes else " Codes already handed out keep their old expiry."
     if expiry_seconds == 0:
-      await ctx.send("Verification codes will no longer expire.")
+      await ctx.send("Verification codes will no longer expire." + applies_to)
+    else:
+      await ctx.send(f"Verification codes will now expire after {expiry} seconds." + applies_to)
+
+  @command_verifyset_code.command(name="mode")
+  async def command_verifyset_code_mode(self, ctx, mode: str):
+    """Set whether verification codes are stored for each member, or derived from a secret (stored/derived)."""
+    if mode not in ["stored", "derived"]:
+      await ctx.send(
+        embed=self._error_embed("The verification code mode must be either stored or derived.", "Invalid Mode"))
+      return
+
+    if mode == "derived" and await self.config.guild(ctx.guild).VERIFICATION_SECRET() is None:
+      await self.config.guild(ctx.guild).VERIFICATION_SECRET.set(new_secret())
+    await self.config.guild(ctx.guild).VERIFICATION_CODE_MODE.set(mode)
+    await self._refresh_code_settings(ctx.guild)
+
+    if mode == "derived":
+      await ctx.send("Verification codes will now be derived from a secret, nothing is stored for each member.")
     else:
-      await ctx.send(f"Verification codes will now expire after {expiry} seconds.")
+      await ctx.send("Verification codes will now be stored for each member.")
+
+  @command_verifyset_code.command(name="rotatesecret")
+  async def command_verifyset_code_rotatesecret(self, ctx):
+    """Replace the secret derived codes are made from. Every derived code that has been handed out stops working."""
+    await self.config.guild(ctx.guild).VERIFICATION_SECRET.set(new_secret())
+    await self._refresh_code_settings(ctx.guild)
+    await ctx.send("The verification secret has been replaced.")
 
   @command_verifyset.group(name="ignoreroles")
   async def command_verifyset_ignoreroles(self, ctx):
@@ -310,6 +586,7 @@ class WaterfallVerification(commands.Cog):
     await ctx.send(embed=info_embed)
 
   @command_unverify.command(name="inactive")
+  @commands.max_concurrency(1, commands.BucketType.guild)
   async def command_unverify_inactive(self, ctx, days: int, confirm_string: str = None):
     """DANGEROUS: Unverify users who haven't sent messages in a certain number of days."""
     if days < 60:
@@ -323,30 +600,36 @@ class WaterfallVerification(commands.Cog):
 
     confirm = confirm_string == "confirm"
 
-    current_time = datetime.now(timezone.utc)
-    inactive_time = current_time - timedelta(days=days)
-
-    active_users = set()
     inactive_users = set()
     verified_role = ctx.guild.get_role(await self.config.guild(ctx.guild).VERIFICATION_ROLE())
 
-    # make the bot type while it's working
-    async with ctx.typing():
-      # iterate through all text channels in the server
-      for channel in ctx.guild.text_channels:
-        # check each message in the channel
-        async for message in channel.history(after=inactive_time):
-          if message.author.bot or message.author in active_users:
-            continue
-          active_users.add(message.author)
+    cutoff = time.time() - days * 86400
 
-      ignore_roles = await self.config.guild(ctx.guild).VERIFICATION_IGNORED_ROLES()
+    # the activity index answers this on its own once it goes back far enough, until then fill it from the history
+    tracked_since = self._activity_since.get(ctx.guild.id)
+    if tracked_since is None or tracked_since > cutoff:
+      await self._backfill_activity(ctx, days)
+
+    gap_since = self._activity_gaps.get(ctx.guild.id)
+    if confirm and gap_since is not None:
+      # anyone who only talked while the bot was away would look inactive
+      await ctx.send(embed=self._error_embed(
+        "I'm still catching up on messages sent since "
+        f"{discord.utils.format_dt(datetime.fromtimestamp(gap_since, timezone.utc), 'f')}, while I was offline.\n"
+        "Please try again once that's done."
+      ))
+      return
 
+    ignore_roles = await self.config.guild(ctx.guild).VERIFICATION_IGNORED_ROLES()
+
+    async with ctx.typing():
       for member in verified_role.members:
         if member.bot:
           continue
         user_roles = [role for role in member.roles]
-        if member not in active_users and not any(role.id in ignore_roles for role in user_roles):
+        last_message_at = self.activity.last_active(ctx.guild.id, member.id)
+        active = last_message_at is not None and last_message_at >= cutoff
+        if not active and not any(role.id in ignore_roles for role in user_roles):
           if confirm:
             # unverify the user if it's not a dry run
             await self._unverify_user(ctx, member, ignore_errors=True)
@@ -376,6 +659,21 @@ class WaterfallVerification(commands.Cog):
 
     await ctx.send(embed=info_embed)
 
+  @staticmethod
+  def _scan_status_embed(crawler: HistoryCrawler):
+    """Generate the progress embed for a message history scan."""
+    finished = crawler.channels_done + crawler.channels_skipped
+    total = len(crawler.guild.text_channels)
+    return discord.Embed(
+      title="Scanning Message History",
+      description=f"{'Resuming the last scan' if crawler.resumed else 'Scanning'} for messages since "
+                  f"{discord.utils.format_dt(datetime.fromtimestamp(crawler.cutoff, timezone.utc), 'D')}.\n\n"
+                  f"Channels: {finished}/{total} ({crawler.channels_skipped} skipped, can't be read)\n"
+                  f"Messages read: {crawler.messages}\n"
+                  f"Active members found: {len(crawler.last_message)}",
+      color=discord.Color.dark_gold()
+    )
+
   @commands.group(name="syncverify")
   @commands.admin()
   async def command_syncverify(self, ctx):
@@ -525,43 +823,39 @@ class WaterfallVerification(commands.Cog):
 
     current_time = calendar.timegm(ctx.message.created_at.utctimetuple())
 
-    code_length = await self.config.guild(ctx.guild).VERIFICATION_CODE_LENGTH()
-    code_type = await self.config.guild(ctx.guild).VERIFICATION_CODE_TYPE()
-    code_expiry = await self.config.guild(ctx.guild).VERIFICATION_CODE_EXPIRY()
-    expires_at = await self.config.member(ctx.author).code_expires_at()
-
-    if code_type == "alphanumeric":
-      char_pool = string.ascii_letters + string.digits
-    elif code_type == "numeric":
-      char_pool = string.digits
-    elif code_type == "alphabetical":
-      char_pool = string.ascii_letters
-    else:
-      # fallback if the code type is invalid
-      char_pool = "!"
-
-    code = await self.config.member(ctx.author).verification_code()
-    # if the user doesn't have a code, generate a new one
-    if code is None:
-      code = "".join(random.choices(char_pool, k=code_length))
-      await self.config.member(ctx.author).verification_code.set(code)
-      await self.config.member(ctx.author).code_expires_at.set(ctx.message.created_at.timestamp() + code_expiry)
+    key = (ctx.guild.id, ctx.author.id)
+    derived = self._derived_codes.get(ctx.guild.id)
 
-    # if the code has expired, generate a new one
-    elif expires_at <= ctx.message.created_at.timestamp() and code_expiry != 0:
-      code = "".join(random.choices(char_pool, k=code_length))
+    if derived is not None:
+      # worked out from the secret, nothing to read or store
+      period = derived.period(ctx.message.created_at.timestamp())
+      pending = derived.code_for(ctx.guild.id, ctx.author.id, period), derived.expires_at(period)
+    else:
+      pending = self.pending_codes.valid(key, ctx.message.created_at.timestamp())
+
+    # if the user doesn't have a code, or it has expired, generate a new one
+    if pending is None:
+      code_length = await self.config.guild(ctx.guild).VERIFICATION_CODE_LENGTH()
+      code_type = await self.config.guild(ctx.guild).VERIFICATION_CODE_TYPE()
+      code_expiry = await self.config.guild(ctx.guild).VERIFICATION_CODE_EXPIRY()
+
+      code = random_code(code_type, code_length)
+      expires_at = ctx.message.created_at.timestamp() + code_expiry if code_expiry != 0 else None
+      # write through, so the code survives a restart
+      pending = self.pending_codes.add(key, code, expires_at)
       await self.config.member(ctx.author).verification_code.set(code)
-      await self.config.member(ctx.author).code_expires_at.set(ctx.message.created_at.timestamp() + code_expiry)
+      await self.config.member(ctx.author).code_expires_at.set(expires_at)
 
-    expires_at = await self.config.member(ctx.author).code_expires_at()
-    expires_at_timestamp = discord.utils.format_dt(
-      datetime.now(timezone.utc) + timedelta(seconds=expires_at - current_time), "R"
-    )
+    code, expires_at = pending
 
     message = f"Your verification code is: `{code}`\n\n" \
-              + f"Please send a message containing __only__ this code in {verification_channel.mention}.\n\n" \
-              + (
-                f"This code will expire {expires_at_timestamp}, so make sure you verify quickly!" if code_expiry != 0 else '')
+              + f"Please send a message containing __only__ this code in {verification_channel.mention}.\n\n"
+
+    if expires_at is not None:
+      expires_at_timestamp = discord.utils.format_dt(
+        datetime.now(timezone.utc) + timedelta(seconds=expires_at - current_time), "R"
+      )
+      message += f"This code will expire {expires_at_timestamp}, so make sure you verify quickly!"
 
     verification_embed = discord.Embed(
       title="Verification Code",
@@ -629,8 +923,14 @@ class WaterfallVerification(commands.Cog):
       embed.add_field(name="Verified At", value=verified_at, inline=False)
 
     if not verified and not bypass:
-      verification_code = await self.config.member(user).verification_code()
-      code_expires_at = await self.config.member(user).code_expires_at()
+      derived = self._derived_codes.get(ctx.guild.id)
+      if derived is not None:
+        period = derived.period(time.time())
+        verification_code = derived.code_for(ctx.guild.id, user.id, period)
+        code_expires_at = derived.expires_at(period)
+      else:
+        verification_code = await self.config.member(user).verification_code()
+        code_expires_at = await self.config.member(user).code_expires_at()
 
       embed.add_field(name="Verification Code",
                       value=verification_code if verification_code is not None else "N/A",
@@ -648,6 +948,18 @@ class WaterfallVerification(commands.Cog):
 
     await ctx.send(embed=embed)
 
+  @commands.Cog.listener(name="on_message")
+  async def record_activity(self, message):
+    """Keep the activity index up to date, this only touches memory apart from the first message seen in a guild."""
+    if message.author.bot or not message.guild:
+      return
+
+    self.activity.touch(message.guild.id, message.author.id, message.created_at.timestamp())
+
+    if message.guild.id not in self._activity_since:
+      self._activity_since[message.guild.id] = message.created_at.timestamp()
+      await self.config.guild(message.guild).ACTIVITY_TRACKED_SINCE.set(self._activity_since[message.guild.id])
+
   @commands.Cog.listener(name="on_message")
   async def listen_for_verification_codes(self, message):
     if message.author.bot:
@@ -656,48 +968,52 @@ class WaterfallVerification(commands.Cog):
     if not message.guild:
       return
 
-    if await self.config.guild(message.guild).VERIFICATION_CHANNEL() is None:
-      return
-
-    if message.channel.id != await self.config.guild(message.guild).VERIFICATION_CHANNEL():
+    # everything up to a matching code is answered from memory, this runs on every message the bot can see
+    if message.channel.id != self._verification_channels.get(message.guild.id):
       return
 
     author = message.author
-    code = await self.config.member(author).verification_code()
-    code_expiry = await self.config.guild(message.guild).VERIFICATION_CODE_EXPIRY()
-    expires_at = await self.config.member(author).code_expires_at()
+    now = message.created_at.timestamp()
+    derived = self._derived_codes.get(message.guild.id)
+
+    if derived is not None:
+      # recompute the member's code rather than looking anything up
+      valid = derived.check(message.guild.id, author.id, message.content.strip(), now)
+      if valid is None or await self.config.member(author).verified():
+        return
+    else:
+      pending = self.pending_codes.get((message.guild.id, author.id))
+      if pending is None or message.content.strip() != pending.code:
+        return
+      valid = not pending.expired(now)
 
-    if code is None:
+    # check if the code has expired
+    if not valid:
+      await message.channel.send(embed=self._error_embed(
+        "That verification code has expired. Please run the verification command again to generate a "
+        "new code."
+      ))
       return
 
-    if message.content.strip() == code:
-      # check if the code has expired
-      if expires_at <= message.created_at.timestamp() and code_expiry != 0:
-        await message.channel.send(embed=self._error_embed(
-          "That verification code has expired. Please run the verification command again to generate a "
-          "new code."
-        ))
-        return
-      # ok, the code matches now
-      else:
-        await self._verify_user(message, author)
-
-        verified_message = await message.reply(embed=discord.Embed(
-          title="Verification Success",
-          description=f"You have been verified! Welcome to **{message.guild.name}**!",
-          color=discord.Color.green()
-        ),
-          mention_author=True
-        )
+    # ok, the code matches now
+    await self._verify_user(message, author)
 
-        case = await modlog.create_case(
-          self.bot, message.guild, message.created_at, action_type="verify",
-          user=author, moderator=self.bot.user, reason="Verified through the verification channel."
-        )
+    verified_message = await message.reply(embed=discord.Embed(
+      title="Verification Success",
+      description=f"You have been verified! Welcome to **{message.guild.name}**!",
+      color=discord.Color.green()
+    ),
+      mention_author=True
+    )
+
+    case = await modlog.create_case(
+      self.bot, message.guild, message.created_at, action_type="verify",
+      user=author, moderator=self.bot.user, reason="Verified through the verification channel."
+    )
 
-        # delete the verification message after a few seconds
-        await verified_message.delete(delay=5.0)
-        await message.delete(delay=7.5)
+    # delete the verification message after a few seconds
+    await verified_message.delete(delay=5.0)
+    await message.delete(delay=7.5)
 
   @commands.Cog.listener(name="on_member_join")
   async def unverifed_role_new_members(self, member: discord.Member):
@@ -3,6 +3,9 @@ Economy settings command.
 """
 
 from ..util.embeds import SettingChangedEmbed, ErrorEmbed, AdminEmbed
+from ..util.jobs import JobCatalog
+from ..util.gambling import ROULETTE_WHEEL
+from ..util.roulette_sim import run_simulation
 
 from redbot.core import Config, commands, app_commands, bank
 from redbot.core.commands.converter import TimedeltaConverter
@@ -10,9 +13,11 @@ from redbot.core.utils.chat_formatting import humanize_number
 from redbot.core.commands.requires import PrivilegeLevel
 
 from datetime import datetime, timezone, timedelta
+from concurrent.futures.process import BrokenProcessPool
 
 import discord
 import calendar
+import logging
 import yaml
 import io
 import pprint
@@ -20,6 +25,8 @@ import datetime as dt
 
 from random import randint, randrange
 
+log = logging.getLogger("red.waterfall_economy.econset")
+
 
 class EconomySettingsCommand(commands.Cog):
   """
@@ -38,6 +45,68 @@ class EconomySettingsCommand(commands.Cog):
     """Set Waterfall Economy settings"""
     pass
 
+  @command_econset.command(name="stats")
+  async def command_econset_stats(self, ctx):
+    """Show settings cache, member lock, ledger and roulette scheduler statistics"""
+    hits = self.settings.hits
+    misses = self.settings.misses
+    hit_rate = hits / (hits + misses) * 100 if hits + misses else 0
+    locks = self.member_locks
+
+    await ctx.send(embed=AdminEmbed(
+      message=f"Settings snapshot hits: {humanize_number(hits)}\nSettings snapshot misses: {humanize_number(misses)}\n"
+              f"Hit rate: {hit_rate:.1f}%\n\n"
+              f"Member locks alive: {len(locks)}\nLock acquisitions: {humanize_number(locks.acquisitions)} "
+              f"({humanize_number(locks.contended)} had to wait)\n"
+              f"Lock wait: {locks.average_wait * 1000:.2f}ms average, {locks.max_wait * 1000:.2f}ms max\n\n"
+              f"Ledger entries written: {humanize_number(self.ledger.written)} in "
+              f"{humanize_number(self.ledger.batches)} batches\n\n"
+              f"Roulette tables waiting to close: {self.table_timers.pending}\n"
+              f"Table close lateness: {self.table_timers.average_lateness * 1000:.0f}ms average, "
+              f"{self.table_timers.max_lateness * 1000:.0f}ms max",
+      author=ctx.author,
+      title="Economy Stats"
+    ))
+
+  @command_econset.group(name="ledger", aliases=["transactions"])
+  async def command_econset_ledger(self, ctx):
+    """Look through the log of credit movements"""
+    pass
+
+  async def _send_ledger_entries(self, ctx, entries, title: str):
+    if not entries:
+      await ctx.send(embed=ErrorEmbed("No transactions found!"))
+      return
+
+    currency = await bank.get_currency_name(ctx.guild)
+    lines = [
+      f"{discord.utils.format_dt(dt.datetime.fromtimestamp(entry.timestamp, timezone.utc), 'f')} `{entry.action}`: "
+      f"{f'<@{entry.from_id}>' if entry.from_id else 'Bank'} → {f'<@{entry.to_id}>' if entry.to_id else 'Bank'} "
+      f"{humanize_number(entry.amount)} {currency}"
+      for entry in entries
+    ]
+    await ctx.send(embed=AdminEmbed(message="\n".join(lines), author=ctx.author, title=title))
+
+  @command_econset_ledger.command(name="member", aliases=["user"])
+  async def command_econset_ledger_member(self, ctx, target: discord.Member, limit: int = 20):
+    """Show the latest transactions a member was part of"""
+    entries = await self.ledger.for_member(ctx.guild.id, target.id, min(max(limit, 1), 25))
+    await self._send_ledger_entries(ctx, entries, f"Transactions for {target.display_name}")
+
+  @command_econset_ledger.command(name="between", aliases=["range"])
+  async def command_econset_ledger_between(
+      self,
+      ctx,
+      since: TimedeltaConverter,
+      until: TimedeltaConverter = timedelta(0),
+      limit: int = 20
+  ):
+    """Show the latest transactions between two points in time, given as how long ago (e.g. `2d 1d`)"""
+    now = datetime.now(timezone.utc)
+    start, end = (now - since).timestamp(), (now - until).timestamp()
+    entries = await self.ledger.between(ctx.guild.id, start, end, min(max(limit, 1), 25))
+    await self._send_ledger_entries(ctx, entries, "Transactions")
+
   @command_econset.group(name="steal")
   async def command_econset_steal(self, ctx):
     """Set steal settings"""
@@ -46,14 +115,10 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_steal.command(name="showsettings")
   async def command_econset_steal_showsettings(self, ctx):
     """Show the steal settings"""
-    steal_rate = await self.config.STEAL_SUCCESS_RATE()
-    steal_immunity = await self.config.STEAL_IMMUNITY()
-    steal_cooldown = await self.config.STEAL_COOLDOWN()
-    steal_min = await self.config.STEAL_MIN()
-    steal_max = await self.config.STEAL_MAX()
+    settings = await self.get_settings(ctx.guild)
 
     await ctx.send(embed=discord.Embed(
-      description=f"Steal Success Rate: {steal_rate}%\nSteal Immunity Duration: {steal_immunity} seconds\nSteal Cooldown: {steal_cooldown} seconds\nMin Steal Amount: {humanize_number(steal_min)}\nMax Steal Amount: {humanize_number(steal_max)}",
+      description=f"Steal Success Rate: {settings.steal_success_rate}%\nSteal Immunity Duration: {settings.steal_immunity} seconds\nSteal Cooldown: {settings.steal_cooldown} seconds\nMin Steal Amount: {humanize_number(settings.steal_min)}\nMax Steal Amount: {humanize_number(settings.steal_max)}",
       title="Steal Settings",
       colour=discord.Colour.gold()
     ))
@@ -65,13 +130,18 @@ class EconomySettingsCommand(commands.Cog):
       await ctx.send(embed=ErrorEmbed("The success rate must be between 0 and 100!"))
       return
 
-    await self.config.STEAL_SUCCESS_RATE.set(rate)
+    scope = await self.settings.scope(ctx.guild)
+    await scope.STEAL_SUCCESS_RATE.set(rate)
+    await self.settings.invalidate(ctx.guild)
     await ctx.send(embed=SettingChangedEmbed("Steal Success Rate", str(rate)))
 
   @command_econset_steal.command(name="cooldown")
   async def command_econset_steal_cooldown(self, ctx, cooldown: TimedeltaConverter):
     """Set the cooldown for the steal command"""
-    await self.config.STEAL_COOLDOWN.set(cooldown.total_seconds())
+    scope = await self.settings.scope(ctx.guild)
+    await scope.STEAL_COOLDOWN.set(cooldown.total_seconds())
+    await self.settings.invalidate(ctx.guild)
+    await self.reschedule_timers(ctx.guild, "steal_cooldown")
     await ctx.send(embed=SettingChangedEmbed("Steal Cooldown", str(cooldown)))
 
   @command_econset_steal.command(name="min")
@@ -80,7 +150,9 @@ class EconomySettingsCommand(commands.Cog):
     if min_amount < 1:
       await ctx.send(embed=ErrorEmbed("The minimum amount that can be stolen must be at least 1!"))
       return
-    await self.config.STEAL_MIN.set(min_amount)
+    scope = await self.settings.scope(ctx.guild)
+    await scope.STEAL_MIN.set(min_amount)
+    await self.settings.invalidate(ctx.guild)
     await ctx.send(embed=SettingChangedEmbed("Min Steal Amount", humanize_number(min_amount)))
 
   @command_econset_steal.command(name="max")
@@ -89,13 +161,18 @@ class EconomySettingsCommand(commands.Cog):
     if max_amount < 1:
       await ctx.send(embed=ErrorEmbed("The maximum amount that can be stolen must be at least 1!"))
       return
-    await self.config.STEAL_MAX.set(max_amount)
+    scope = await self.settings.scope(ctx.guild)
+    await scope.STEAL_MAX.set(max_amount)
+    await self.settings.invalidate(ctx.guild)
     await ctx.send(embed=SettingChangedEmbed("Max Steal Amount", humanize_number(max_amount)))
 
   @command_econset_steal.command(name="immunity")
   async def command_econset_steal_immunity(self, ctx, immunity: TimedeltaConverter):
     """Set the immunity duration for the steal command"""
-    await self.config.STEAL_IMMUNITY.set(immunity.total_seconds())
+    scope = await self.settings.scope(ctx.guild)
+    await scope.STEAL_IMMUNITY.set(immunity.total_seconds())
+    await self.settings.invalidate(ctx.guild)
+    await self.reschedule_timers(ctx.guild, "steal_immunity")
     await ctx.send(embed=SettingChangedEmbed("Steal Immunity Duration", str(immunity)))
 
   @command_econset_steal.group(name="clear")
@@ -111,7 +188,9 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_steal_clear_cooldown.command(name="user")
   async def command_econset_steal_clear_cooldown_user(self, ctx, target: discord.Member):
     """Clear the cooldown for a user's steal command"""
-    await self.config.member(target).steal_cooldown.set(0)
+    state = await self.load_member_state(target)
+    state.steal_cooldown = 0
+    await self.commit_member_state(state)
     await ctx.send(embed=AdminEmbed(
       message="{target.mention}'s steal cooldown has been reset!",
       author=ctx.author,
@@ -121,13 +200,10 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_steal_clear_cooldown.command(name="all")
   async def command_econset_steal_clear_cooldown_all(self, ctx):
     """Clear everyone's steal cooldown"""
-    i = 0
-    for member in ctx.guild.members:
-      await self.config.member(member).steal_cooldown.set(0)
-      i += 1
+    result = await self.bulk_reset_members(ctx.guild, "steal_cooldown")
 
     await ctx.send(embed=AdminEmbed(
-      message=f"Steal cooldown has been reset for **{i}** users!",
+      message=f"Steal cooldown has been reset for **{result.changed}** users! (took {result.elapsed:.2f}s)",
       author=ctx.author,
       title="Steal Cooldowns Reset"
     ))
@@ -140,7 +216,9 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_steal_clear_immunity.command(name="user")
   async def command_econset_steal_clear_immunity_user(self, ctx, target: discord.Member):
     """Clear the immunity for a user's steal command"""
-    await self.config.member(target).steal_immunity.set(0)
+    state = await self.load_member_state(target)
+    state.steal_immunity = 0
+    await self.commit_member_state(state)
     await ctx.send(embed=AdminEmbed(
       message=f"{target.mention}'s steal immunity has been reset!",
       author=ctx.author,
@@ -150,13 +228,10 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_steal_clear_immunity.command(name="all")
   async def command_econset_steal_clear_immunity_all(self, ctx):
     """Clear everyone's steal immunity"""
-    i = 0
-    for member in ctx.guild.members:
-      await self.config.member(member).steal_immunity.set(0)
-      i += 1
+    result = await self.bulk_reset_members(ctx.guild, "steal_immunity")
 
     await ctx.send(embed=AdminEmbed(
-      message=f"Steal immunity has been reset for **{i}** users!",
+      message=f"Steal immunity has been reset for **{result.changed}** users! (took {result.elapsed:.2f}s)",
       author=ctx.author,
       title="Steal Immunities Reset"
     ))
@@ -169,12 +244,14 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_work.command(name="showsettings")
   async def command_econset_work_showsettings(self, ctx):
     """Show the work settings"""
-    job_cooldown = await self.config.JOB_COOLDOWN()
-    job_apply_cooldown = await self.config.JOB_APPLY_COOLDOWN()
-    job_count = len(await self.config.JOBS())
+    settings = await self.get_settings(ctx.guild)
+    catalog = await self.get_job_catalog(ctx.guild)
+    headcounts = self.job_index.headcounts(ctx.guild.id)
+    job_lines = "\n".join(f"- {job.emoji} {job.name} (`{job.id}`): {headcounts.get(job.id, 0)} employed" for job in catalog)
 
     await ctx.send(embed=AdminEmbed(
-      message=f"Work Cooldown: {job_cooldown} seconds\nJob Application Cooldown: {job_apply_cooldown} seconds\nJobs: {job_count}",
+      message=f"Work Cooldown: {settings.job_cooldown} seconds\nJob Application Cooldown: {settings.job_apply_cooldown} seconds\n"
+              f"Jobs: {len(catalog)}\n{job_lines}",
       author=ctx.author,
       title="Work Settings"
     ))
@@ -182,13 +259,19 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_work.command(name="cooldown")
   async def command_econset_work_cooldown(self, ctx, cooldown: TimedeltaConverter):
     """Set the cooldown for the work command"""
-    await self.config.JOB_COOLDOWN.set(cooldown.total_seconds())
+    scope = await self.settings.scope(ctx.guild)
+    await scope.JOB_COOLDOWN.set(cooldown.total_seconds())
+    await self.settings.invalidate(ctx.guild)
+    await self.reschedule_timers(ctx.guild, "job_cooldown")
     await ctx.send(embed=SettingChangedEmbed("Work Cooldown", str(cooldown)))
 
   @command_econset_work.command(name="applycooldown")
   async def command_econset_work_applycooldown(self, ctx, cooldown: TimedeltaConverter):
     """Set the cooldown for applying for a job"""
-    await self.config.JOB_APPLY_COOLDOWN.set(cooldown.total_seconds())
+    scope = await self.settings.scope(ctx.guild)
+    await scope.JOB_APPLY_COOLDOWN.set(cooldown.total_seconds())
+    await self.settings.invalidate(ctx.guild)
+    await self.reschedule_timers(ctx.guild, "job_apply_cooldown")
     await ctx.send(embed=SettingChangedEmbed("Job Application Cooldown", str(cooldown)))
 
   @command_econset_work.group(name="clearcooldown")
@@ -199,17 +282,17 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_work_clearcooldown.command(name="user")
   async def command_econset_work_clearcooldown_user(self, ctx, target: discord.Member, cd_type: str = "work"):
     """Clear the cooldown for a user's work command"""
-    if cd_type == "work":
-      await self.config.member(target).job_last_worked.set(0)
-    elif cd_type == "apply":
-      await self.config.member(target).job_last_quit.set(0)
-    elif cd_type == "all":
-      await self.config.member(target).job_last_worked.set(0)
-      await self.config.member(target).job_last_quit.set(0)
-    else:
+    if cd_type not in ["work", "apply", "all"]:
       await ctx.send(embed=ErrorEmbed("Invalid cooldown type!"))
       return
 
+    state = await self.load_member_state(target)
+    if cd_type in ["work", "all"]:
+      state.job_last_worked = 0
+    if cd_type in ["apply", "all"]:
+      state.job_last_quit = 0
+    await self.commit_member_state(state)
+
     await ctx.send(embed=AdminEmbed(
       message=f"{target.mention}'s {'work' if cd_type != 'apply' else 'job application'} {'cooldowns have' if cd_type == 'all' else 'cooldown has'} has been reset!",
       author=ctx.author,
@@ -220,13 +303,10 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_work_clearcooldown.command(name="all")
   async def command_econset_work_clearcooldown_all(self, ctx):
     """Clear everyone's work cooldown"""
-    i = 0
-    for member in ctx.guild.members:
-      await self.config.member(member).job_last_worked.set(0)
-      i += 1
+    result = await self.bulk_reset_members(ctx.guild, "job_last_worked")
 
     await ctx.send(embed=AdminEmbed(
-      message=f"Work cooldown has been reset for **{i}** users!",
+      message=f"Work cooldown has been reset for **{result.changed}** users! (took {result.elapsed:.2f}s)",
       author=ctx.author,
       title="Work Cooldowns Reset"
     ))
@@ -239,7 +319,8 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_work_jobs.command(name="add")
   async def command_econset_work_jobs_add(self, ctx, job_id: str, name: str, description: str, emoji: str, min_times_worked: int = 0):
     """Add a job"""
-    jobs = await self.config.JOBS()
+    scope = await self.settings.scope(ctx.guild)
+    jobs = await self.settings.jobs(ctx.guild)
     jobs[job_id] = {
       "name": name,
       "description": description,
@@ -247,31 +328,37 @@ class EconomySettingsCommand(commands.Cog):
       "min_times_worked": min_times_worked,
       "tiers": []
     }
-    await self.config.JOBS.set(jobs)
+    await scope.JOBS.set(jobs)
+    await self.invalidate_job_catalog(ctx.guild)
     await ctx.send(embed=SettingChangedEmbed("Job Added", name))
 
   @command_econset_work_jobs.command(name="remove")
   async def command_econset_work_jobs_remove(self, ctx, job_id: str):
     """Remove a job"""
-    jobs = await self.config.JOBS()
+    scope = await self.settings.scope(ctx.guild)
+    jobs = await self.settings.jobs(ctx.guild)
     if job_id not in jobs:
       await ctx.send(embed=ErrorEmbed("That job does not exist!"))
       return
     del jobs[job_id]
-    await self.config.JOBS.set(jobs)
-    # Remove the job from all users who had it
-    for user in ctx.guild.members:
-      if await self.config.member(user).job() == job_id:
-        await self.config.member(user).job.set(None)
-        await self.config.member(user).job_tier.set(0)
-        await self.config.member(user).job_times_worked.set(0)
+    await scope.JOBS.set(jobs)
+    await self.invalidate_job_catalog(ctx.guild)
+    # Remove the job from everyone who had it, the index means we only touch those members
+    for guild_id, member_id in self.job_index.pop_job(job_id, await self.settings.scope_key(ctx.guild)):
+      state = await self.member_cache.load_from_ids(guild_id, member_id)
+      if state.job == job_id:
+        state.job = None
+        state.job_tier = 0
+        state.job_times_worked = 0
+        await self.commit_member_state(state)
 
     await ctx.send(embed=SettingChangedEmbed("Job Removed", job_id))
 
   @command_econset_work_jobs.group(name="edit")
   async def command_econset_work_jobs_edit(self, ctx, job_id: str, name: str = None, description: str = None, emoji: str = None, min_times_worked: int = None):
     """Edit jobs"""
-    jobs = await self.config.JOBS()
+    scope = await self.settings.scope(ctx.guild)
+    jobs = await self.settings.jobs(ctx.guild)
     if job_id not in jobs:
       await ctx.send(embed=ErrorEmbed("That job does not exist!"))
       return
@@ -284,7 +371,8 @@ class EconomySettingsCommand(commands.Cog):
       job["emoji"] = emoji
     if min_times_worked is not None:
       job["min_times_worked"] = min_times_worked
-    await self.config.JOBS.set(jobs)
+    await scope.JOBS.set(jobs)
+    await self.invalidate_job_catalog(ctx.guild)
     await ctx.send(embed=SettingChangedEmbed("Job Edited", job["name"]))
 
   @command_econset_work_jobs.group(name="tiers")
@@ -295,7 +383,8 @@ class EconomySettingsCommand(commands.Cog):
   @command_econset_work_jobs_tiers.command(name="add")
   async def command_econset_work_jobs_tiers_add(self, ctx, job_id: str, name: str, rate: int, min_hours: int, max_hours: int):
     """Add a job tier"""
-    jobs = await self.config.JOBS()
+    scope = await self.settings.scope(ctx.guild)
+    jobs = await self.settings.jobs(ctx.guild)
     if job_id not in jobs:
       await ctx.send(embed=ErrorEmbed("That job does not exist!"))
       return
@@ -307,13 +396,15 @@ class EconomySettingsCommand(commands.Cog):
       "max_hours": max_hours,
       "times_worked": 0
     })
-    await self.config.JOBS.set(jobs)
+    await scope.JOBS.set(jobs)
+    await self.invalidate_job_catalog(ctx.guild)
     await ctx.send(embed=SettingChangedEmbed("Job Tier Added", name))
 
   @command_econset_work_jobs_tiers.command(name="remove")
   async def command_econset_work_jobs_tiers_remove(self, ctx, job_id: str, tier: int):
     """Remove a job tier"""
-    jobs = await self.config.JOBS()
+    scope = await self.settings.scope(ctx.guild)
+    jobs = await self.settings.jobs(ctx.guild)
     if job_id not in jobs:
       await ctx.send(embed=ErrorEmbed("That job does not exist!"))
       return
@@ -323,13 +414,15 @@ class EconomySettingsCommand(commands.Cog):
       return
     name = job["tiers"][tier]["name"]
     del job["tiers"][tier]
-    await self.config.JOBS.set(jobs)
+    await scope.JOBS.set(jobs)
+    await self.invalidate_job_catalog(ctx.guild)
     await ctx.send(embed=SettingChangedEmbed("Job Tier Removed", name))
 
   @command_econset_work_jobs_tiers.command(name="edit")
   async def command_econset_work_jobs_tiers_edit(self, ctx, job_id: str, tier: int, name: str = None, rate: int = None, min_hours: int = None, max_hours: int = None):
     """Edit a job tier"""
-    jobs = await self.config.JOBS()
+    scope = await self.settings.scope(ctx.guild)
+    jobs = await self.settings.jobs(ctx.guild)
     if job_id not in jobs:
       await ctx.send(embed=ErrorEmbed("That job does not exist!"))
       return
@@ -346,13 +439,15 @@ class EconomySettingsCommand(commands.Cog):
       job["min_hours"] = min_hours
     if max_hours:
       job["max_hours"] = max_hours
-    await self.config.JOBS.set(jobs)
+    await scope.JOBS.set(jobs)
+    await self.invalidate_job_catalog(ctx.guild)
     await ctx.send(embed=SettingChangedEmbed("Job Tier Edited", job["name"]))
 
   @command_econset_work_jobs_tiers.command(name="reorder", aliases=["reorganise"])
   async def command_econset_work_jobs_tiers_reorder(self, ctx, job_id: str, *indices: int):
     """Reorder job tiers"""
-    jobs = await self.config.JOBS()
+    scope = await self.settings.scope(ctx.guild)
+    jobs = await self.settings.jobs(ctx.guild)
     if job_id not in jobs:
       await ctx.send(embed=ErrorEmbed("That job does not exist!"))
       return
@@ -367,7 +462,8 @@ class EconomySettingsCommand(commands.Cog):
         return
       new_tiers.append(job["tiers"][i])
     job["tiers"] = new_tiers
-    await self.config.JOBS.set(jobs)
+    await scope.JOBS.set(jobs)
+    await self.invalidate_job_catalog(ctx.guild)
     await ctx.send(embed=SettingChangedEmbed("Job Tiers Reordered", job["name"]))
 
   @command_econset_work_jobs.command(name="import", aliases=["load"])
@@ -387,17 +483,92 @@ class EconomySettingsCommand(commands.Cog):
       await ctx.send(embed=ErrorEmbed(title="YAML Error", message=str(e)))
       return
 
-    await self.config.JOBS.set(jobs)
+    # make sure the jobs actually compile before they replace the current ones
+    try:
+      JobCatalog(0, jobs)
+    except (KeyError, TypeError, AttributeError) as e:
+      await ctx.send(embed=ErrorEmbed(title="Invalid Jobs", message=f"The jobs data is missing or has an invalid field: `{e}`"))
+      return
+
+    await (await self.settings.scope(ctx.guild)).JOBS.set(jobs)
+    await self.invalidate_job_catalog(ctx.guild)
 
     await ctx.send(embed=SettingChangedEmbed("Jobs Imported", f"``py\n{pprint.pformat(jobs)[:256]}...\n``"))
 
   @command_econset_work_jobs.command(name="export", aliases=["dump", "save"])
   async def command_econset_work_jobs_export(self, ctx, to_file: bool = False):
     """Export jobs as YAML"""
-    jobs = await self.config.JOBS()
+    jobs = await self.settings.jobs(ctx.guild)
     data = yaml.dump(jobs)
     if len(data) + 12 > 2000 or to_file:
       yaml_file = io.BytesIO(data.encode("utf-8"))
       await ctx.send(file=discord.File(yaml_file, filename=f"jobs_{ctx.guild.id}_{dt.datetime.now().strftime('%Y%m%d')}.yaml"))
     else:
       await ctx.send(f"```yaml\n{data}\n```")
+
+  @command_econset.group(name="roulette")
+  async def command_econset_roulette(self, ctx):
+    """Set roulette settings"""
+    pass
+
+  @command_econset_roulette.command(name="maxtables", aliases=["tablelimit"])
+  async def command_econset_roulette_maxtables(self, ctx, max_tables: int = None):
+    """Set how many roulette tables can be open in the server at once, leave empty for no limit"""
+    if max_tables is not None and max_tables < 1:
+      await ctx.send(embed=ErrorEmbed("The table limit must be at least 1!"))
+      return
+
+    scope = await self.settings.scope(ctx.guild)
+    await scope.GAMBLING.ROULETTE.MAX_OPEN_TABLES.set(max_tables)
+    await self.settings.invalidate(ctx.guild)
+    await ctx.send(embed=SettingChangedEmbed(
+      "Max Open Roulette Tables", "No limit" if max_tables is None else humanize_number(max_tables)
+    ))
+
+  @command_econset_roulette.command(name="simulate", aliases=["sim"])
+  @commands.max_concurrency(1)
+  async def command_econset_roulette_simulate(self, ctx, spins: int = 1_000_000):
+    """Simulate lots of roulette spins to check the house edge of every bet and table type (needs numpy)"""
+    if not 1_000 <= spins <= 50_000_000:
+      await ctx.send(embed=ErrorEmbed("The number of spins must be between 1,000 and 50,000,000!"))
+      return
+
+    table_types = (await self.get_settings(ctx.guild)).gambling["ROULETTE"]["TABLE_TYPES"]
+    # the settings snapshot is read only, the worker needs plain dicts it can unpickle
+    table_types = {name: dict(table) for name, table in table_types.items()}
+
+    async with ctx.typing():
+      try:
+        result = await run_simulation(ROULETTE_WHEEL, table_types, spins)
+      except ImportError:
+        await ctx.send(embed=ErrorEmbed("The roulette simulator needs numpy, install it with `[p]pipinstall numpy`."))
+        return
+      except BrokenProcessPool:
+        log.exception("The roulette simulator's worker process died")
+        await ctx.send(embed=ErrorEmbed("The roulette simulator's worker process stopped unexpectedly, check the logs!"))
+        return
+
+    bet_lines = "\n".join(
+      f"{bet.name[:30]:<30} {bet.payout:>4.0f}:1 {bet.house_edge * 100:>6.2f}% ({bet.expected_edge * 100:.2f}%) "
+      f"{bet.variance:>7.2f}"
+      for bet in result.bets
+    )
+    table_lines = "\n".join(
+      f"{table.table_type:<13} {humanize_number(table.min_bet):>7} {table.house_edge * 100:>6.2f}% "
+      f"{table.mean_take:>9.1f} {table.std_take:>9.1f} {' / '.join(f'{take:.0f}' for take in table.take_percentiles)}"
+      for table in result.tables
+    )
+
+    if result.missing_pockets:
+      wheel_check = f"⚠️ The ball never landed on {', '.join(map(str, result.missing_pockets))}, check the wheel!"
+    else:
+      wheel_check = f"Every pocket came up, at most {result.max_deviation * 100:.2f}% off a fair wheel."
+
+    await ctx.send(embed=AdminEmbed(
+      message=f"{humanize_number(spins)} spins in {result.elapsed:.2f}s\n{wheel_check}\n\n"
+              f"**Bets** (house edge, fair wheel edge in brackets, variance per credit)\n```\n{bet_lines}\n```\n"
+              f"**Tables** (one of every bet at the minimum: edge, mean/std of the house's take, 5th/50th/95th percentile)"
+              f"\n```\n{table_lines}\n```",
+      author=ctx.author,
+      title="Roulette Simulation"
+    ))
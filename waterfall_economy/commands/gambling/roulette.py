@@ -8,372 +8,368 @@ from datetime import datetime, timezone, timedelta
 from random import randint, choice
 import asyncio
 import discord
-import re
+import logging
+import time
 
-from ...util.gambling import RouletteBetType, RouletteBet
+from ...util.bet_parser import parse_slip
+from ...util.gambling import RouletteBet, RouletteBetType, settle, ROULETTE_WHEEL, REDS, BLACKS
 from ...util.embeds import ErrorEmbed, OfficialEmbed
+from ...util.board import LiveMessage
+from ...util.spin_history import colour_of, RED, BLACK, GREEN
+from ...util.tables import RouletteTable
+
+log = logging.getLogger("red.waterfall_economy.roulette")
 
 
 class RouletteCommands(commands.Cog):
   """Roulette gambling commands"""
 
-  roulette_numbers = [
-    0, 32, 15, 19, 4, 21, 2, 25, 17, 34, 6, 27,
-    13, 36, 11, 30, 8, 23, 10, 5, 24, 16, 33, 1,
-    20, 14, 31, 9, 22, 18, 2, 7, 28, 12, 35, 3, 26
-  ]
-
-  reds = [
-    32, 19, 21, 25, 34, 27, 36, 30, 23, 5,
-    16, 1, 14, 9, 18, 7, 12, 3
-  ]
-
-  blacks = [
-    15, 4, 2, 17, 6, 13, 11, 8, 10, 24,
-    33, 20, 31, 22, 2, 28, 35, 26
-  ]
-
-  bet_names = {
-    "straight": ["straight", "number", "num", "single"],
-    "zero": ["zero", "green"],
-    "red": ["red", "reds"],
-    "black": ["black", "blacks"],
-    "even": ["even", "evens"],
-    "odd": ["odd", "odds"],
-    "low": ["low", "lows"],
-    "high": ["high", "highs"],
-    "snake": ["snake"],
-    "dozen": ["dozen", "12"],
-    "corner": ["corner"],
-    "top": ["top"],
-    "column": ["column", "col"]
-  }
-
-  open_tables = {}
-
-  close_tasks = set()
+  roulette_numbers = ROULETTE_WHEEL
+
+  reds = REDS
+
+  blacks = BLACKS
+
+  summary_page_size = 20  # bettors per results embed
+  board_update_interval = 5  # seconds between edits of a table's board, however many bets come in
+  board_bettor_lines = 15
+  history_recent = 15  # latest winning numbers shown in the history
 
   def __init__(self, bot):
     # super().__init__()
     self.bot = bot
     self.config = None
 
-  @staticmethod
-  def __build_dozen_bet(dozen_num: int):
-    """Builds a dozen bet for the number"""
-    if dozen_num == 1:
-      return RouletteBetType(
-        name="Dozen Bet on 1 to 12",
-        payout=2.0,
-        condition=lambda result: 1 <= result <= 12
-      )
-    elif dozen_num == 2:
-      return RouletteBetType(
-        name="Dozen Bet on 13 to 24",
-        payout=2.0,
-        condition=lambda result: 13 <= result <= 24
-      )
-    elif dozen_num == 3:
-      return RouletteBetType(
-        name="Dozen Bet on 25 to 36",
-        payout=2.0,
-        condition=lambda result: 25 <= result <= 36
-      )
-    else:
-      raise ValueError("Invalid dozen bet specification.")
-
-  def _parse_bet(self, bet_type: str) -> RouletteBetType:
-    """Parse a bet type string into a RouletteBet object"""
-    bet_split = re.split(r"[ \-–_+&,]|(?:, )|(?:,? (?:to|and) )", ' '.join(bet_type).strip().lower())
-    bet_split = [x for x in bet_split if x]
-
-    # print(bet_split)
-
-    # length 1
-    if len(bet_split) == 1:
-      # straight bet
-      if bet_split[0].isdigit() and bet_split[0] != "0":
-        number = int(bet_split[0])
-        if 0 <= number <= 36:
-          return RouletteBetType(
-            name=f"Straight Bet on {number}",
-            payout=35.0,
-            condition=lambda result: result == number
-          )
-        else:
-          raise ValueError("Straight bets must be on numbers between 0 and 36.")
-      elif bet_split[0] in self.bet_names["zero"]:
-        return RouletteBetType(
-          name="0️⃣ Zero Bet",
-          payout=35.0,
-          condition=lambda result: result == 0
-        )
-      elif bet_split[0] in self.bet_names["red"]:
-        return RouletteBetType(
-          name="🔴 Red Bet",
-          payout=1.0,
-          condition=lambda result: result in self.reds
-        )
-      elif bet_split[0] in self.bet_names["black"]:
-        return RouletteBetType(
-          name="⚫ Black Bet",
-          payout=1.0,
-          condition=lambda result: result in self.blacks
-        )
-      elif bet_split[0] in self.bet_names["even"]:
-        return RouletteBetType(
-          name="Evens Bet",
-          payout=1.0,
-          condition=lambda result: result != 0 and result % 2 == 0
-        )
-      elif bet_split[0] in self.bet_names["odd"]:
-        return RouletteBetType(
-          name="Odds Bet",
-          payout=1.0,
-          condition=lambda result: result % 2 == 1
-        )
-      elif bet_split[0] in self.bet_names["low"]:
-        return RouletteBetType(
-          name="⬇️ Low (1-18) Bet",
-          payout=1.0,
-          condition=lambda result: 1 <= result <= 18
-        )
-      elif bet_split[0] in self.bet_names["high"]:
-        return RouletteBetType(
-          name="⬆️ High (19-36) Bet",
-          payout=1.0,
-          condition=lambda result: 19 <= result <= 36
-        )
-      elif bet_split[0] in self.bet_names["snake"]:
-        return RouletteBetType(
-          name="🐍 Snake Bet",
-          payout=2.0,
-          condition=lambda result: result in [1, 5, 9, 12, 14, 16, 19, 23, 27, 30, 32, 34]
-        )
-      elif bet_split[0] in self.bet_names["top"]:
-        return RouletteBetType(
-          name="🔝 Top Line Bet on 0, 1, 2, and 3",
-          payout=8.0,
-          condition=lambda result: result in [0, 1, 2, 3]
-        )
-      raise ValueError("Invalid bet type specified.")
-    # all the special ones
-    elif len(bet_split) == 2:
-      # ranges
-      if bet_split[0].isdigit() and bet_split[1].isdigit():
-        low = int(bet_split[0])
-        high = int(bet_split[1])
-
-        if 0 <= low <= 36 and 0 <= high <= 36:
-          if low > high:
-            low, high = high, low
-        else:
-          raise ValueError("Bets must be on numbers between 0 and 36.")
-
-        # split bet, 2 adjacent nums
-        if (high == low + 1) or (high-low == 3) and (low != 0 and high != 0):
-          return RouletteBetType(
-            name=f"Split Bet on {low} and {high}",
-            payout=17.0,
-            condition=lambda result: result == low or result == high
-          )
-        # street bet, 3 nums in a row
-        elif (high - low == 2) and (low % 3 == 1):
-          return RouletteBetType(
-            name=f"Street Bet on {low}, {low+1}, and {high}",
-            payout=11.0,
-            condition=lambda result: low <= result <= high
-          )
-        # double street bet, 6 nums in two rows
-        elif (high - low == 5) and (low % 3 == 1):
-          return RouletteBetType(
-            name=f"Double Street Bet on {low} to {high}",
-            payout=5.0,
-            condition=lambda result: low <= result <= high
-          )
-        # dozen bet 12 nums
-        elif (high - low == 11) and (low in [1, 13, 25]):
-          return RouletteBetType(
-            name=f"Dozen Bet on {low} to {high}",
-            payout=2.0,
-            condition=lambda result: low <= result <= high
-          )
-        # high/low bet 18 nums
-        elif (high - low == 17) and (low in [1, 19]):
-          return RouletteBetType(
-            name=f"{'⬇️ Low (1-18)' if low == 1 else '⬆️ High (19-36)'} Bet",
-            payout=1.0,
-            condition=lambda result: low <= result <= high
-          )
-      # dozen (dozen 1 style)
-      elif bet_split[0] in self.bet_names["dozen"] and bet_split[1].isdigit():
-        dozen_num = int(bet_split[1])
-        return self.__build_dozen_bet(dozen_num)
-      # dozen alternate notation - i.e. first dozen, 2nd dozen, middle dozen, last dozen
-      elif bet_split[1] in self.bet_names["dozen"] and bet_split[0][-2:] in ["st", "nd", "rd", "le"]:
-        if bet_split[0][0].isdigit():
-          dozen_num = int(bet_split[0][0])
-        elif bet_split[0] == "first":
-          dozen_num = 1
-        elif bet_split[0] in ["second", "middle"]:
-          dozen_num = 2
-        elif bet_split[0] in ["third", "last"]:
-          dozen_num = 3
-        else:
-          raise ValueError("Invalid dozen bet specification.")
-        return self.__build_dozen_bet(dozen_num)
-      # column (column 1 style)
-      elif bet_split[0] in self.bet_names["column"] and bet_split[1].isdigit():
-        column_num = int(bet_split[1])
-        if not 1 <= column_num <= 3:
-          raise ValueError("Column bets must be on columns 1, 2, or 3.")
-        return RouletteBetType(
-          name=f"Column Bet on Column {column_num}",
-          payout=2.0,
-          condition=lambda result: result != 0 and (result - column_num) % 3 == 0
-        )
-      # column alternate notation - i.e. first column, 2nd column, middle column, last column
-      elif bet_split[1] in self.bet_names["column"] and bet_split[0][-2:] in ["st", "nd", "rd", "le"]:
-        if bet_split[0][0].isdigit():
-          column_num = int(bet_split[0][0])
-        elif bet_split[0] == "first":
-          column_num = 1
-        elif bet_split[0] in ["second", "middle"]:
-          column_num = 2
-        elif bet_split[0] in ["third", "last"]:
-          column_num = 3
-        else:
-          raise ValueError("Invalid column bet specification.")
-        return RouletteBetType(
-          name=f"Column Bet on Column {column_num}",
-          payout=2.0,
-          condition=lambda result: result != 0 and (result - column_num) % 3 == 0
-        )
-      # corner bet
-      elif bet_split[0] in self.bet_names["corner"] and bet_split[1].isdigit():
-        corner_num = int(bet_split[1])
-        if not (1 <= corner_num <= 32) or (corner_num % 3 == 0):
-          raise ValueError("Corner bets can't be made on numbers in the last row/column.")
-        return RouletteBetType(
-          name=f"Corner Bet on {corner_num}, {corner_num+1}, {corner_num+3}, and {corner_num+4}",
-          payout=8.0,
-          condition=lambda result: result in [corner_num, corner_num+1, corner_num+3, corner_num+4]
-        )
-      # top line
-      elif bet_split[0] in self.bet_names["top"] and bet_split[1] == "line":
-        return RouletteBetType(
-          name="🔝 Top Line Bet on 0, 1, 2, and 3",
-          payout=8.0,
-          condition=lambda result: result in [0, 1, 2, 3]
-        )
-    # length 3 (rows)
-    elif len(bet_split) == 3:
-      # street bet alternate notation like 1, 2, 3
-      if bet_split[0].isdigit() and bet_split[1].isdigit() and bet_split[2].isdigit():
-        nums = sorted([int(bet_split[0]), int(bet_split[1]), int(bet_split[2])])
-        if nums[0] < 1 or nums[2] > 36:
-          raise ValueError("Bets must be on numbers between 0 and 36.")
-        if nums[2] - nums[0] == 2 and nums[0] % 3 == 1:
-          return RouletteBetType(
-            name=f"Street Bet on {nums[0]}, {nums[1]}, and {nums[2]}",
-            payout=11.0,
-            condition=lambda result: nums[0] <= result <= nums[2]
-          )
-      raise ValueError("Invalid bet type specified.")
-    # length 4 (corners)
-    elif len(bet_split) == 4:
-      # corner bet alternate notation like 1,2,4,5
-      if all(part.isdigit() for part in bet_split):
-        nums = sorted([int(part) for part in bet_split])
-        if nums[0] < 1 or nums[3] > 36:
-          raise ValueError("Bets must be on numbers between 0 and 36.")
-        if nums[1] == nums[0] + 1 and nums[2] == nums[0] + 3 and nums[3] == nums[0] + 4:
-          return RouletteBetType(
-            name=f"Corner Bet on {nums[0]}, {nums[1]}, {nums[2]}, and {nums[3]}",
-            payout=8.0,
-            condition=lambda result: result in nums
-          )
-      elif [int(part) for part in bet_split if part.isdigit()] == [0, 1, 2, 3]:
-        return RouletteBetType(
-          name="🔝 Top Line Bet on 0, 1, 2, and 3",
-          payout=8.0,
-          condition=lambda result: result in [0, 1, 2, 3]
-        )
-      raise ValueError("Invalid bet type specified.")
-    # too long, fuck you
-    raise ValueError("Bet definition too long.")
-
-  async def _close_table(self, table: discord.Thread, delay: int = 0):
+  async def _close_table(self, table: discord.Thread):
     """Close a roulette table and determine winners"""
-    # Implementation of closing the table
-    _table = self.open_tables.get(str(table.id))
-    if _table is None or not _table["is_open"]:
-      return
-    if table.id in self.close_tasks and delay != 0:
+    # the table was already spun
+    table_data = self.tables.get(table.id)
+    if table_data is None or not table_data.is_open:
       return
 
-    self.close_tasks.add(table.id)
-    await asyncio.sleep(delay)
-
-    # table was already spun manually
-    if not (await table.guild.fetch_channel(table.id)):
-      return
+    # the spin is happening now, so drop the scheduled close if there is one
+    self.table_timers.cancel(table.id)
 
     # mark the table as closed
-    self.open_tables[str(table.id)]["is_open"] = False
+    table_data.is_open = False
+    self.table_journal.spinning(table.id)
 
-    async with table.typing():
-      spinning_msg = await table.send("Spinning the roulette wheel... 🎡")
-      await asyncio.sleep(5)  # simulate spinning time
+    await table_data.board.set(embed=await self._board_embed(table_data, "Spinning the roulette wheel... 🎡"))
+    await asyncio.sleep(5)  # simulate spinning time
 
     # determine winning number
     winning_number = choice(self.roulette_numbers)
-    colour = '🔴' if winning_number in self.reds else ('⚫' if winning_number in self.blacks else '🟢')
-
-    await spinning_msg.edit(
-      content=f"The roulette wheel has stopped! The winning number is {colour} **{winning_number}**! 🎉"
-    )
+    self.table_journal.spun(table.id, winning_number)
+    self.spin_history.record(table.guild.id, winning_number)
 
     # calculate winners
     await self._calculate_winners(table, winning_number)
 
   async def _calculate_winners(self, table: discord.Thread, winning_number: int):
     """Calculate winners for a given roulette table and winning number"""
-    # Implementation of calculating winners
-    bets = self.open_tables[str(table.id)]['bets']
+    table_data = self.tables.get(table.id)
+    await self._restore_absent_bets(table_data)
+    bets = table_data.bets
     currency_name = await bank.get_currency_name(table.guild)
 
-    total_lost = 0
-
-    async with table.typing():
-      for bet in bets:
-        user = bet.bettor
-        user_lost = await self.config.member(user).gambling_losses()
+    start = time.perf_counter()
+    results = settle(bets, winning_number)
+    await self._pay_results(table.guild.id, table.id, results)
+    if not table_data.absent_bets:
+      self.table_journal.settled(table.id)
 
-        if bet.check_bet_win(winning_number):
-          payout = int(bet.amount * (bet.bet_type.payout + 1))
-          await bank.deposit_credits(user, payout)
-
-          await table.send(
-            f"Congratulations {user.mention}! Your bet on **{bet.bet_type.name}** won! "
-            f"You won {humanize_number(payout)} {currency_name}."
-          )
-        else:
-          user_lost += bet.amount
-          await self.config.member(user).gambling_losses.set(user_lost)
-          total_lost += bet.amount
+    elapsed = time.perf_counter() - start
+    log.debug("Settled %d bets from %d players on table %d in %.3fs", len(bets), len(results), table.id, elapsed)
 
-    await self.config.guild(table.guild).GAMBLING.ROULETTE.TOTAL_LOST.set(total_lost)
+    # the results go on the board, only spilling over into new messages if there are too many to fit
+    colour = '🔴' if winning_number in self.reds else ('⚫' if winning_number in self.blacks else '🟢')
+    board_embed = await self._board_embed(
+      table_data,
+      f"The roulette wheel has stopped! The winning number is {colour} **{winning_number}**! 🎉\n"
+      "This table is now closed. Thank you for playing!"
+    )
+    result_embeds = self._settlement_embeds(table, results, currency_name, len(bets), elapsed) if results else []
+    batches = self._batch_embeds([board_embed, *result_embeds])
+    await table_data.board.set(embeds=batches[0])
+    for batch in batches[1:]:
+      await table.send(embeds=batch)
 
     # wait to close
     await asyncio.sleep(5)
-    await table.send("This table is now closed. Thank you for playing!")
     await table.edit(archived=True, locked=True)
     await asyncio.sleep(5)
 
     # close the table
     await table.delete()
-    del self.open_tables[str(table.id)]
+    self.tables.remove(table.id)
+    if table_data.absent_bets:
+      # their bets stay in the journal, to be settled on a later load once they can be paid
+      log.warning("Leaving %d unsettled bets on roulette table %d journaled", len(table_data.absent_bets), table.id)
+    else:
+      self.table_journal.closed(table.id)
+
+  async def _pay_results(self, guild_id: int, table_id: int, results: list):
+    """Pay out and record a spin's results, journaling each bettor before they're paid so none are paid twice"""
+    # one deposit and one record update per bettor, however many bets they placed
+    for result in results:
+      # journaled first: if we go down partway through, a missed payout can be found in the ledger, a double one can't
+      self.table_journal.paid(table_id, result.bettor.id)
+      if result.payout:
+        await bank.deposit_credits(result.bettor, result.payout)
+        self.ledger.record("roulette_payout", guild_id, result.payout, to_id=result.bettor.id)
+
+      # by id, since with a global bank a bettor who has left the guild is paid as a user
+      state = await self.member_cache.load_from_ids(guild_id, result.bettor.id)
+      state.gambling_wins += result.won
+      state.gambling_losses += result.lost
+      await self.commit_member_state(state)
+
+    total_lost = sum(result.lost for result in results)
+    if total_lost:
+      total_lost_value = self.config.guild_from_id(guild_id).GAMBLING.ROULETTE.TOTAL_LOST
+      await total_lost_value.set(await total_lost_value() + total_lost)
+
+  def _schedule_table_close(self, table: discord.Thread, closes_at: float):
+    self.table_timers.schedule(table.id, closes_at, lambda: self._close_table(table))
+
+  async def _recover_tables(self):
+    """Restore the tables that were still open when the cog was unloaded or the bot went down"""
+    await self.bot.wait_until_red_ready()
+    start = time.perf_counter()
+
+    tables = self.table_journal.replay()
+    # compact straight away, before anything else can append to the journal
+    self.table_journal.compact(tables)
+
+    restored = 0
+    for journaled in tables.values():
+      guild = self.bot.get_guild(journaled.data["guild"])
+      thread = None
+      if guild is not None:
+        thread = guild.get_thread(journaled.table_id)
+        if thread is None:
+          try:
+            thread = await guild.fetch_channel(journaled.table_id)
+          except discord.HTTPException:
+            pass
+
+      if journaled.spinning:
+        settled = journaled.settled or await self._finish_journaled_spin(guild, journaled)
+        await self._discard_journaled_table(journaled, thread, settled)
+        continue
+
+      if guild is None or thread is None:
+        # marked as spinning, so if any refunds can't go out yet they're tried again on the next load
+        self.table_journal.spinning(journaled.table_id)
+        settled = await self._refund_journaled_table(guild, journaled)
+        await self._discard_journaled_table(journaled, thread, settled)
+        continue
+
+      table = RouletteTable.from_journal(thread.id, journaled.data)
+      table.absent_bets = journaled.bets
+      await self._restore_absent_bets(table)
+      if table.absent_bets:
+        log.warning(
+          "%d bets on roulette table %d are by members who have left, they'll be settled if they come back",
+          len(table.absent_bets), thread.id
+        )
+
+      if table.board_id is not None:
+        self._start_board(table, thread.get_partial_message(table.board_id))
+        table.board.refresh()
+      else:
+        self._start_board(table, await thread.send(embed=await self._board_embed(table)))
+      self.tables.add(table)
+      self._schedule_table_close(thread, table.closes_at)
+      restored += 1
+
+    if tables:
+      log.info(
+        "Recovered %d of %d journaled roulette tables in %.3fs", restored, len(tables), time.perf_counter() - start
+      )
+
+  async def _find_bettor(self, guild: discord.Guild | None, bettor_id: int) -> discord.abc.User | None:
+    """Find who to pay for a journaled bet: the member, or with a global bank the user if they've left the guild"""
+    bettor = guild.get_member(bettor_id) if guild is not None else None
+    if bettor is not None or not await bank.is_global():
+      return bettor
+
+    bettor = self.bot.get_user(bettor_id)
+    if bettor is None:
+      try:
+        bettor = await self.bot.fetch_user(bettor_id)
+      except discord.HTTPException:
+        return None
+    return bettor
+
+  async def _restore_absent_bets(self, table: RouletteTable):
+    """Put journaled bets back on a table, for every bettor that can be found again"""
+    absent_bets = []
+    for bettor_id, mask, payout, name, amount in table.absent_bets:
+      bettor = await self._find_bettor(self.bot.get_guild(table.guild_id), bettor_id)
+      if bettor is None:
+        absent_bets.append([bettor_id, mask, payout, name, amount])
+        continue
+      table.bets.append(RouletteBet(bettor, RouletteBetType.from_mask(name, payout, mask), amount))
+    table.absent_bets = absent_bets
+
+  async def _finish_journaled_spin(self, guild: discord.Guild | None, journaled) -> bool:
+    """
+    Settle a table that went down partway through its spin, or refund it if the wheel never stopped.
+
+    Returns whether every bettor has now been settled, the ones that couldn't be paid are left for the next load.
+    """
+    if journaled.winning_number is None:
+      log.warning("Roulette table %d was interrupted while spinning, refunding it", journaled.table_id)
+      return await self._refund_journaled_table(guild, journaled)
+
+    log.warning(
+      "Roulette table %d was interrupted while settling, paying out the %d it landed on",
+      journaled.table_id, journaled.winning_number
+    )
+    bets = []
+    settled = True
+    for bettor_id, mask, payout, name, amount in journaled.bets:
+      if bettor_id in journaled.paid:
+        continue
+      bettor = await self._find_bettor(guild, bettor_id)
+      if bettor is None:
+        log.warning("Couldn't settle a bet by %d on roulette table %d yet", bettor_id, journaled.table_id)
+        settled = False
+        continue
+      bets.append(RouletteBet(bettor, RouletteBetType.from_mask(name, payout, mask), amount))
+
+    await self._pay_results(journaled.data["guild"], journaled.table_id, settle(bets, journaled.winning_number))
+    if settled:
+      self.table_journal.settled(journaled.table_id)
+    return settled
+
+  async def _refund_journaled_table(self, guild: discord.Guild | None, journaled) -> bool:
+    """Give back the stakes on a table that can't be played any more, returns whether they all went out"""
+    refunds: dict[int, int] = {}
+    for bettor_id, _, _, _, amount in journaled.bets:
+      if bettor_id not in journaled.paid:
+        refunds[bettor_id] = refunds.get(bettor_id, 0) + amount
+
+    settled = True
+    for bettor_id, amount in refunds.items():
+      bettor = await self._find_bettor(guild, bettor_id)
+      if bettor is None:
+        log.warning("Couldn't refund %d to %d for roulette table %d yet", amount, bettor_id, journaled.table_id)
+        settled = False
+        continue
+      # journaled first, for the same reason as payouts
+      self.table_journal.paid(journaled.table_id, bettor_id)
+      await bank.deposit_credits(bettor, amount)
+      self.ledger.record("roulette_refund", journaled.data["guild"], amount, to_id=bettor_id)
+
+    if settled:
+      self.table_journal.settled(journaled.table_id)
+    return settled
+
+  async def _discard_journaled_table(self, journaled, thread: discord.Thread | None, settled: bool = True):
+    """Delete a journaled table's thread, and drop it from the journal once everyone on it has been settled"""
+    if thread is not None:
+      try:
+        await thread.delete()
+      except discord.HTTPException:
+        pass
+    if settled:
+      self.table_journal.closed(journaled.table_id)
+
+  def _settlement_embeds(
+      self,
+      table: discord.Thread,
+      results: list,
+      currency_name: str,
+      bet_count: int,
+      elapsed: float
+  ) -> list[discord.Embed]:
+    """A spin's results, paged into embeds"""
+    lines = []
+    for result in results:
+      if result.payout and result.lost:
+        line = (f"🎉 {result.bettor.mention} won **{humanize_number(result.payout)}** {currency_name} "
+                f"({result.winning_bets}/{result.bets} bets) and lost {humanize_number(result.lost)}")
+      elif result.payout:
+        line = (f"🎉 {result.bettor.mention} won **{humanize_number(result.payout)}** {currency_name} "
+                f"({result.winning_bets}/{result.bets} bets)")
+      else:
+        line = f"{result.bettor.mention} lost {humanize_number(result.lost)} {currency_name}"
+      lines.append(line)
+
+    pages = [lines[i:i + self.summary_page_size] for i in range(0, len(lines), self.summary_page_size)]
+    embeds = [
+      OfficialEmbed(
+        guild=table.guild,
+        title="Roulette Results" + (f" ({page_num}/{len(pages)})" if len(pages) > 1 else ""),
+        message="\n".join(page)
+      )
+      for page_num, page in enumerate(pages, start=1)
+    ]
+    embeds[-1].set_footer(text=f"Settled {bet_count} bets from {len(results)} players in {elapsed * 1000:.0f}ms")
+    return embeds
+
+  @staticmethod
+  def _batch_embeds(embeds: list[discord.Embed]) -> list[list[discord.Embed]]:
+    """Pack embeds into as few messages as possible"""
+    # discord allows up to 10 embeds and 6000 characters of embed text per message
+    batches, batch, batch_size = [], [], 0
+    for embed in embeds:
+      if batch and (len(batch) == 10 or batch_size + len(embed) > 6000):
+        batches.append(batch)
+        batch, batch_size = [], 0
+      batch.append(embed)
+      batch_size += len(embed)
+    batches.append(batch)
+    return batches
+
+  async def _board_embed(self, table_data: RouletteTable, status: str = None) -> discord.Embed:
+    """Render a table's board: its limits, the bets on it so far and how it's going"""
+    guild = self.bot.get_guild(table_data.guild_id)
+    currency_name = await bank.get_currency_name(guild)
+
+    if status is None:
+      status = f"*Betting closes <t:{int(table_data.closes_at)}:R>*."
+
+    embed = OfficialEmbed(
+      guild=guild,
+      title=table_data.name,
+      message=f"> Minimum Bet: {humanize_number(table_data.min_bet)} {currency_name}\n" +
+              (f"> Maximum Bet: {humanize_number(table_data.max_bet)} {currency_name}\n"
+               if table_data.max_bet else "> No Maximum Bet!\n") +
+              status
+    )
+
+    # total up each bettor's bets
+    bettors: dict[int, list] = {}
+    for bet in table_data.bets:
+      bettor = bettors.setdefault(bet.bettor.id, [bet.bettor, 0, 0])
+      bettor[1] += 1
+      bettor[2] += bet.amount
+    ranked = sorted(bettors.values(), key=lambda bettor: bettor[2], reverse=True)
+
+    pot = sum(bet.amount for bet in table_data.bets)
+    embed.add_field(name="Pot", value=f"{humanize_number(pot)} {currency_name}")
+    embed.add_field(name="Bets", value=f"{len(table_data.bets)} from {len(bettors)} players")
+
+    if ranked:
+      lines = [
+        f"{bettor.mention}: {humanize_number(total)} on {count} bet{'s' if count != 1 else ''}"
+        for bettor, count, total in ranked[:self.board_bettor_lines]
+      ]
+      if len(ranked) > self.board_bettor_lines:
+        lines.append(f"...and {len(ranked) - self.board_bettor_lines} more")
+      embed.add_field(name="Players", value="\n".join(lines), inline=False)
+
+    return embed
+
+  def _start_board(self, table_data: RouletteTable, message: discord.Message | discord.PartialMessage):
+    async def render():
+      return {"embed": await self._board_embed(table_data)}
+
+    table_data.board_id = message.id
+    table_data.board = LiveMessage(message, render, self.board_update_interval)
 
   @commands.group(name="roulette", aliases=["roul", "rol"])
   @commands.guild_only()
@@ -389,115 +385,130 @@ class RouletteCommands(commands.Cog):
       table_name: str = "{user}'s Roulette Table ({time})"
   ):
     """Open a roulette table"""
+    roulette_settings = (await self.get_settings(ctx.guild)).gambling["ROULETTE"]
 
+    # both checks go right before the reservation, with nothing to wait on in between, so two opens can't both pass them
     # check if the user already has an open table
-    for table_id, table_data in self.open_tables.items():
-      if table_data["owner"] == ctx.author.id and table_data["is_open"]:
-        await ctx.send(embed=ErrorEmbed(
-          title="Too Many Open Tables",
-          message="You already have an open roulette table!\nPlease finish the current game before opening a new one."
-        ))
-        return
-
-    # validate min and max bet, or set them to defaults
-    max_bet_cfg = await self.config.guild(ctx.guild).GAMBLING.ROULETTE.MAX_BET()
-    min_bet_cfg = await self.config.guild(ctx.guild).GAMBLING.ROULETTE.MIN_BET()
-    currency_name = await bank.get_currency_name(ctx.guild)
-
-    # get table types
-    table_types = await self.config.guild(ctx.guild).GAMBLING.ROULETTE.TABLE_TYPES()
-    # min bet validation
-    if table_type not in table_types.keys():
+    if self.tables.has_open_table(ctx.author.id):
       await ctx.send(embed=ErrorEmbed(
-        title="Invalid Table Type",
-        message=f"The table type '{table_type}' does not exist. Available types: "
-                f"`{'`, `'.join(table_types.keys())}`."
+        title="Too Many Open Tables",
+        message="You already have an open roulette table!\nPlease finish the current game before opening a new one."
       ))
       return
 
-    if bank.can_spend(ctx.author, table_types[table_type]["FEE"]):
-      await bank.withdraw_credits(ctx.author, table_types[table_type]["FEE"])
-    else:
+    max_tables = roulette_settings.get("MAX_OPEN_TABLES")
+    if max_tables is not None and self.tables.count_in_guild(ctx.guild.id) >= max_tables:
       await ctx.send(embed=ErrorEmbed(
-        title="Insufficient Funds",
-        message=f"You do not have enough {currency_name} to open this table. "
-                f"Opening a '{table_type}' table costs "
-                f"{humanize_number(table_types[table_type]['FEE'])} {currency_name}."
+        title="Too Many Open Tables",
+        message=f"This server already has {max_tables} open roulette tables!\nPlease wait for one to close."
       ))
       return
 
-    min_bet = table_types[table_type]["MIN_BET"]
-    max_bet = table_types[table_type]["MAX_BET"]
+    # count this table towards the limit straight away, other tables can be opened while this one waits on Discord
+    with self.tables.reserve(ctx.guild.id, ctx.author.id):
+      currency_name = await bank.get_currency_name(ctx.guild)
 
-    # validate timeout
-    max_duration_cfg = await self.config.guild(ctx.guild).GAMBLING.ROULETTE.MAX_DURATION()
-    min_duration_cfg = await self.config.guild(ctx.guild).GAMBLING.ROULETTE.MIN_DURATION()
+      # get table types
+      table_types = roulette_settings["TABLE_TYPES"]
+      # min bet validation
+      if table_type not in table_types.keys():
+        await ctx.send(embed=ErrorEmbed(
+          title="Invalid Table Type",
+          message=f"The table type '{table_type}' does not exist. Available types: "
+                  f"`{'`, `'.join(table_types.keys())}`."
+        ))
+        return
 
-    if not (min_duration_cfg <= timeout.total_seconds() <= max_duration_cfg):
-      await ctx.send(embed=ErrorEmbed(
-        title="Invalid Timeout Duration",
-        message=f"The timeout duration must be between {min_duration_cfg}s and {max_duration_cfg}s."
-      ))
-      return
+      if await bank.can_spend(ctx.author, table_types[table_type]["FEE"]):
+        await bank.withdraw_credits(ctx.author, table_types[table_type]["FEE"])
+        self.ledger.record("roulette_table_fee", ctx.guild.id, table_types[table_type]["FEE"], from_id=ctx.author.id)
+      else:
+        await ctx.send(embed=ErrorEmbed(
+          title="Insufficient Funds",
+          message=f"You do not have enough {currency_name} to open this table. "
+                  f"Opening a '{table_type}' table costs "
+                  f"{humanize_number(table_types[table_type]['FEE'])} {currency_name}."
+        ))
+        return
 
-    # validate permissions in current channel
-    user_perms = ctx.channel.permissions_for(ctx.author)
-    bot_perms = ctx.channel.permissions_for(ctx.guild.me)
+      min_bet = table_types[table_type]["MIN_BET"]
+      max_bet = table_types[table_type]["MAX_BET"]
 
-    if not user_perms.create_public_threads:
-      await ctx.send(embed=ErrorEmbed(
-        title="Insufficient Permissions",
-        message="You do not have permission to create threads in this channel."
-      ))
-      return
+      # validate timeout
+      max_duration_cfg = roulette_settings["MAX_DURATION"]
+      min_duration_cfg = roulette_settings["MIN_DURATION"]
 
-    if not bot_perms.create_public_threads:
-      await ctx.send(embed=ErrorEmbed(
-        title="Bot Permission Error",
-        message="I do not have permission to create threads in this channel."
-      ))
-      return
+      if not (min_duration_cfg <= timeout.total_seconds() <= max_duration_cfg):
+        await ctx.send(embed=ErrorEmbed(
+          title="Invalid Timeout Duration",
+          message=f"The timeout duration must be between {min_duration_cfg}s and {max_duration_cfg}s."
+        ))
+        return
 
-    if ctx.channel.type in [discord.ChannelType.public_thread, discord.ChannelType.private_thread]:
-      await ctx.send(embed=ErrorEmbed(
-        title="Invalid Channel",
-        message="Roulette tables cannot be opened inside threads."
-      ))
-      return
+      # validate permissions in current channel
+      user_perms = ctx.channel.permissions_for(ctx.author)
+      bot_perms = ctx.channel.permissions_for(ctx.guild.me)
 
-    # now that we've validated stuff, create the table and thread and stuff
+      if not user_perms.create_public_threads:
+        await ctx.send(embed=ErrorEmbed(
+          title="Insufficient Permissions",
+          message="You do not have permission to create threads in this channel."
+        ))
+        return
 
-    table_name = table_name.format(user=ctx.author.display_name, time=datetime.now().strftime('%H:%M on %d/%m/%Y'))
+      if not bot_perms.create_public_threads:
+        await ctx.send(embed=ErrorEmbed(
+          title="Bot Permission Error",
+          message="I do not have permission to create threads in this channel."
+        ))
+        return
 
-    # create a thread for the table
-    table = await ctx.channel.create_thread(
-        message=ctx.message,
-        name=table_name, auto_archive_duration=60
-    )
+      if ctx.channel.type in [discord.ChannelType.public_thread, discord.ChannelType.private_thread]:
+        await ctx.send(embed=ErrorEmbed(
+          title="Invalid Channel",
+          message="Roulette tables cannot be opened inside threads."
+        ))
+        return
 
-    # write the table's thread into config
-    self.open_tables[str(table.id)] = {
-      "owner": ctx.author.id,
-      "min_bet": min_bet,
-      "max_bet": max_bet,
-      "type": table_type,
-      "duration": timeout.total_seconds(),
-      "bets": [],
-      "is_open": True,
-    }
-
-    # when the table closes
-    table_closes = int(datetime.now().timestamp() + timeout.total_seconds())
-
-    await table.send(
-      f"# {table_name}\n" +
-      f"{ctx.author.mention} has opened a roulette table!\n" +
-      f"> Minimum Bet: {humanize_number(min_bet)} {currency_name}\n" +
-      (f"> Maximum Bet: {humanize_number(max_bet)} {currency_name}\n" if max_bet else "> No Maximum Bet!\n") +
-      f"*Betting closes <t:{table_closes}:R>*.\n"
-    )
+      # now that we've validated stuff, create the table and thread and stuff
 
-    self.bot.loop.create_task(self._close_table(table, int(timeout.total_seconds())))
+      table_name = table_name.format(user=ctx.author.display_name, time=datetime.now().strftime('%H:%M on %d/%m/%Y'))
+
+      # create a thread for the table
+      table = await ctx.channel.create_thread(
+          message=ctx.message,
+          name=table_name, auto_archive_duration=60
+      )
+
+      # when the table closes
+      table_closes = int(datetime.now().timestamp() + timeout.total_seconds())
+
+      table_data = RouletteTable(
+        channel_id=table.id,
+        guild_id=ctx.guild.id,
+        owner_id=ctx.author.id,
+        name=table_name,
+        table_type=table_type,
+        min_bet=min_bet,
+        max_bet=max_bet,
+        duration=timeout.total_seconds(),
+        closes_at=table_closes,
+      )
+      # the board is the table's one message, it's kept up to date as bets come in rather than sending one per bet
+      board = await table.send(
+        f"{ctx.author.mention} has opened a roulette table!", embed=await self._board_embed(table_data)
+      )
+      try:
+        await board.pin()
+      except discord.HTTPException:
+        pass
+      self._start_board(table_data, board)
+
+      # journal the table so it can be recovered if we go down before it closes
+      self.table_journal.opened(table.id, table_data.to_journal())
+      self.tables.add(table_data)
+
+      self._schedule_table_close(table, table_closes)
 
   @command_roulette.command(name="bet")
   async def command_roulette_bet(
@@ -505,96 +516,114 @@ class RouletteCommands(commands.Cog):
       amount: int | str,
       *bet_type: str
   ):
-    """Place a bet on the current roulette table"""
+    """Place a bet on the current roulette table, or several separated by `;`"""
     # Implementation of placing a bet
 
     # print(self.tables.keys(), ctx.channel.id)
 
-    if str(ctx.channel.id) not in self.open_tables.keys():
+    table_data = self.tables.get(ctx.channel.id)
+    if table_data is None:
       await ctx.send(embed=ErrorEmbed(
         title="No Open Table",
         message="There is no open roulette table in this channel."
       ))
       return
 
-    table_data = self.open_tables[str(ctx.channel.id)]
-
-    if not table_data["is_open"]:
+    if not table_data.is_open:
       await ctx.send(embed=ErrorEmbed(
         title="Table Closed",
         message="The roulette table in this channel is closed for betting."
       ))
       return
 
+    # parse the whole slip before anything is charged, one bad bet and none of them are placed
+    try:
+      slip = parse_slip((str(amount), *bet_type))
+    except ValueError as e:
+      await ctx.send(embed=ErrorEmbed(
+        title="Invalid Bet",
+        message=str(e)
+      ))
+      return
+
     # going all in
-    if isinstance(amount, str):
-      if amount.lower() in ["all", "max", "everything", "all_in"]:
-        user_balance = await bank.get_balance(ctx.author)
-        amount = user_balance
-      else:
+    if slip[0][0] == "all":
+      slip = [(await bank.get_balance(ctx.author), slip[0][1])]
+
+    # validate bet amounts
+    for bet_amount, parsed_bet_type in slip:
+      if table_data.max_bet and not(table_data.min_bet <= bet_amount <= table_data.max_bet):
+        currency_name = await bank.get_currency_name(ctx.guild)
         await ctx.send(embed=ErrorEmbed(
           title="Invalid Bet Amount",
-          message="Please specify a valid bet amount."
+          message=f"Your bet must be between {humanize_number(table_data.min_bet)} and "
+                  f"{humanize_number(table_data.max_bet)} {currency_name}."
+                  + (f" (**{parsed_bet_type.name}** was {humanize_number(bet_amount)})" if len(slip) > 1 else "")
+        ))
+        return
+      elif not table_data.max_bet and bet_amount < table_data.min_bet:
+        currency_name = await bank.get_currency_name(ctx.guild)
+        await ctx.send(embed=ErrorEmbed(
+          title="Invalid Bet Amount",
+          message=f"Your bet must be at least {humanize_number(table_data.min_bet)} {currency_name}."
+                  + (f" (**{parsed_bet_type.name}** was {humanize_number(bet_amount)})" if len(slip) > 1 else "")
         ))
         return
 
-    # validate bet amount
-    if table_data["max_bet"] and not(table_data["min_bet"] <= amount <= table_data["max_bet"]):
-      currency_name = await bank.get_currency_name(ctx.guild)
-      await ctx.send(embed=ErrorEmbed(
-        title="Invalid Bet Amount",
-        message=f"Your bet must be between {humanize_number(table_data['min_bet'])} and "
-                f"{humanize_number(table_data['max_bet'])} {currency_name}."
-      ))
-      return
-    elif not table_data["max_bet"] and amount < table_data["min_bet"]:
-      currency_name = await bank.get_currency_name(ctx.guild)
-      await ctx.send(embed=ErrorEmbed(
-        title="Invalid Bet Amount",
-        message=f"Your bet must be at least {humanize_number(table_data['min_bet'])} {currency_name}."
-      ))
-      return
+    total = sum(bet_amount for bet_amount, _ in slip)
+
+    # withdraw the whole slip at once, under the member's lock so concurrent bets can't both pass the balance check
+    can_spend = placed = False
+    async with self.member_locks.lock(ctx.author):
+      # the table may have started spinning while the slip was being checked
+      if table_data.is_open:
+        can_spend = await bank.can_spend(ctx.author, total)
+      if can_spend:
+        await bank.withdraw_credits(ctx.author, total)
+        self.ledger.record("roulette_bet", ctx.guild.id, total, from_id=ctx.author.id)
+
+        # and again, settlement only pays the bets that were on the table when it closed
+        if table_data.is_open:
+          table_data.bets.extend(
+            RouletteBet(bettor=ctx.author, bet_type=parsed_bet_type, amount=bet_amount)
+            for bet_amount, parsed_bet_type in slip
+          )
+          self.table_journal.bets(ctx.channel.id, ctx.author.id, [
+            (parsed_bet_type.mask, parsed_bet_type.payout, parsed_bet_type.name, bet_amount)
+            for bet_amount, parsed_bet_type in slip
+          ])
+          placed = True
+        else:
+          await bank.deposit_credits(ctx.author, total)
+          self.ledger.record("roulette_refund", ctx.guild.id, total, to_id=ctx.author.id)
 
-    # parse bet type
-    try:
-      parsed_bet_type = self._parse_bet(bet_type)
-    except ValueError as e:
+    if not table_data.is_open and not placed:
       await ctx.send(embed=ErrorEmbed(
-        title="Invalid Bet Type",
-        message=str(e)
+        title="Table Closed",
+        message="The roulette table in this channel closed before your bet was placed."
       ))
       return
 
-    # withdraw bet amount
-    if await bank.can_spend(ctx.author, amount):
-      await bank.withdraw_credits(ctx.author, amount)
-    else:
+    if not can_spend:
       currency_name = await bank.get_currency_name(ctx.guild)
       await ctx.send(embed=ErrorEmbed(
         title="Insufficient Funds",
-        message=f"You do not have enough {currency_name} to place this bet."
+        message=f"You do not have enough {currency_name} to place "
+                + ("this bet." if len(slip) == 1 else f"these bets ({humanize_number(total)} in total).")
       ))
       return
 
-    # record the bet
-    bet = RouletteBet(
-      bettor=ctx.author,
-      bet_type=parsed_bet_type,
-      amount=amount
-    )
-
-    self.open_tables[str(ctx.channel.id)]["bets"].append(bet)
-
-    await ctx.send(
-      f"{ctx.author.mention}, your **{parsed_bet_type.name}** of {humanize_number(amount)} has been placed!"
-    )
+    # the bets show up on the table's board, unless it's already showing the spin
+    if table_data.is_open:
+      table_data.board.refresh()
 
   @command_roulette.command(name="spin", aliases=["roll", "play", "close"])
   async def command_roulette_spin(self, ctx: commands.Context):
     """Spin the roulette wheel. Closes betting."""
 
     # check if it's a roulette table
-    if str(ctx.channel.id) not in self.open_tables.keys():
+    table_data = self.tables.get(ctx.channel.id)
+    if table_data is None:
       await ctx.send(embed=ErrorEmbed(
         title="No Open Table",
         message="There is no open roulette table in this channel."
@@ -602,7 +631,7 @@ class RouletteCommands(commands.Cog):
       return
 
     # are you allowed to do that?
-    if (ctx.author.id != self.open_tables[str(ctx.channel.id)]["owner"]
+    if (ctx.author.id != table_data.owner_id
         and not ctx.author.guild_permissions.administrator):
       await ctx.send(embed=ErrorEmbed(
         title="Permission Denied",
@@ -610,7 +639,75 @@ class RouletteCommands(commands.Cog):
       ))
       return
 
-    await self._close_table(ctx.channel)
+    # spin through the table's timer rather than in this command, so an unload waits for the spin to finish
+    self._schedule_table_close(ctx.channel, time.time())
+
+  @command_roulette.command(name="tables", aliases=["list", "open_tables"])
+  async def command_roulette_tables(self, ctx: commands.Context):
+    """List the open roulette tables in this server"""
+    tables = self.tables.in_guild(ctx.guild.id)
+    if not tables:
+      await ctx.send("There are no open roulette tables right now.")
+      return
+
+    lines = []
+    for table in tables:
+      owner = ctx.guild.get_member(table.owner_id)
+      status = f"closes <t:{int(table.closes_at)}:R>" if table.is_open else "spinning"
+      lines.append(
+        f"<#{table.channel_id}> - {' '.join(table.table_type.split('_')).capitalize()} table by "
+        f"{owner.mention if owner else 'someone who left'}, {len(table.bets)} bets, {status}"
+      )
+
+    await ctx.send(embed=OfficialEmbed(
+      guild=ctx.guild,
+      title="Open Roulette Tables",
+      message="\n".join(lines)[:4096]
+    ))
+
+  @command_roulette.command(name="history", aliases=["stats", "hot", "cold"])
+  async def command_roulette_history(self, ctx: commands.Context):
+    """Show the server's recent winning numbers, hot and cold numbers and streaks"""
+    history = self.spin_history.get(ctx.guild.id)
+    if not len(history):
+      await ctx.send("No roulette spins recorded yet.")
+      return
+
+    colour_emoji = {RED: "🔴", BLACK: "⚫", GREEN: "🟢"}
+
+    def pocket(number: int) -> str:
+      return f"{colour_emoji[colour_of(number)]} {number}"
+
+    colours = history.colour_counts()
+    embed = OfficialEmbed(
+      guild=ctx.guild,
+      title="Roulette History",
+      message=f"The last {humanize_number(len(history))} spins in this server.\n"
+              f"**Latest:** {', '.join(pocket(number) for number in history.recent(self.history_recent))}"
+    )
+    embed.add_field(name="🔥 Hot", value="\n".join(f"{pocket(number)} ({count}x)" for number, count in history.hot(5)))
+    embed.add_field(name="🧊 Cold", value="\n".join(f"{pocket(number)} ({count}x)" for number, count in history.cold(5)))
+    embed.add_field(
+      name="Colours",
+      value="\n".join(
+        f"{colour_emoji[colour]} {count / len(history) * 100:.1f}%" for colour, count in colours.items()
+      )
+    )
+    embed.add_field(
+      name="Streaks",
+      value=f"Current: {colour_emoji[history.streak_colour]} x{history.streak}\n"
+            f"Longest: 🔴 x{history.longest[RED]}, ⚫ x{history.longest[BLACK]}",
+      inline=False
+    )
+
+    # one bar per pocket, scaled to the most common one
+    most = max(history.counts)
+    histogram = "\n".join(
+      f"{number:>2} {'█' * round(count / most * 15):<15} {count}" for number, count in enumerate(history.counts)
+    )
+    embed.add_field(name="Frequency", value=f"```\n{histogram}\n```", inline=False)
+
+    await ctx.send(embed=embed)
 
   @command_roulette.group(name="info")
   async def command_roulette_info(self, ctx: commands.Context):
@@ -628,7 +725,7 @@ class RouletteCommands(commands.Cog):
     if member is None:
       member = ctx.author
 
-    total_losses = await self.config.member(member).gambling_losses()
+    total_losses = (await self.load_member_state(member)).gambling_losses
     currency_name = await bank.get_currency_name(ctx.guild)
 
     await ctx.send(
@@ -648,27 +745,34 @@ class RouletteCommands(commands.Cog):
   @command_roulette_info_losses.command(name="leaderboard", aliases=["lb", "ranking"])
   async def command_roulette_info_losses_leaderboard(self, ctx: commands.Context):
     """Get the roulette losses leaderboard for the server"""
-    all_members = await self.config.all_members(ctx.guild)
-    currency_name = await bank.get_currency_name(ctx.guild)
+    await self._send_leaderboard(ctx, "losses")
 
-    losses_list = []
-    for member_id, data in all_members.items():
-      losses = data.get("gambling_losses", 0)
-      if losses > 0:
-        losses_list.append((member_id, losses))
+  @command_roulette_info.command(name="leaderboard", aliases=["lb", "ranking"])
+  async def command_roulette_info_leaderboard(self, ctx: commands.Context, board: str = "net"):
+    """Get a roulette leaderboard for the server (`losses`, `wins` or `net`)"""
+    if board not in self.leaderboards:
+      await ctx.send(embed=ErrorEmbed(
+        title="Invalid Leaderboard",
+        message=f"Available leaderboards: `{'`, `'.join(self.leaderboards.keys())}`."
+      ))
+      return
+
+    await self._send_leaderboard(ctx, board)
 
-    # sort by losses
-    losses_list.sort(key=lambda x: x[1], reverse=True)
+  async def _send_leaderboard(self, ctx: commands.Context, board: str):
+    leaderboard = self.leaderboards[board]
+    top = leaderboard.top(ctx.guild.id, 10)
+
+    if not top:
+      await ctx.send(f"No roulette {leaderboard.name.lower()} recorded yet.")
+      return
 
     # build leaderboard message
-    leaderboard_msg = "Roulette Losses Leaderboard:\n"
-    for rank, (member_id, losses) in enumerate(losses_list[:10], start=1):
-      member = ctx.guild.get_member(int(member_id))
+    leaderboard_msg = f"Roulette {leaderboard.name} Leaderboard:\n"
+    for rank, (member_id, score) in enumerate(top, start=1):
+      member = ctx.guild.get_member(member_id)
       if member:
-        leaderboard_msg += f"{rank}. **{member.display_name}**\t\t{humanize_number(losses)}\n"
-
-    if not losses_list:
-      leaderboard_msg = "No roulette losses recorded yet."
+        leaderboard_msg += f"{rank}. **{member.display_name}**\t\t{humanize_number(score)}\n"
 
     await ctx.send(leaderboard_msg)
 
@@ -722,6 +826,8 @@ class RouletteCommands(commands.Cog):
         value=(
           "To place a bet, use the command:\n"
           f"`{prefix}roulette bet <amount> <bet type>`\n"
+          "Place several at once by separating them with `;`, they're all charged together:\n"
+          f"`{prefix}roulette bet 100 red; 50 17; 25 1st dozen`\n"
         ),
         inline=False
     )
@@ -732,7 +838,7 @@ class RouletteCommands(commands.Cog):
   async def command_roulette_help_table(self, ctx: commands.Context):
     """Help with roulette table types"""
     prefix = (await self.bot.get_valid_prefixes())[0]
-    table_types = await self.config.guild(ctx.guild).GAMBLING.ROULETTE.TABLE_TYPES()
+    table_types = (await self.get_settings(ctx.guild)).gambling["ROULETTE"]["TABLE_TYPES"]
 
     embed = OfficialEmbed(
       title="Roulette Table Types",
@@ -25,20 +25,22 @@ class StealCommand(commands.Cog):
 
     currency = await bank.get_currency_name(guild)
     # target = await commands.MemberConverter().convert(ctx, target)
-    steal_rate = await self.config.STEAL_SUCCESS_RATE()
-    steal_immunity = await self.config.STEAL_IMMUNITY()
-    steal_cooldown = await self.config.STEAL_COOLDOWN()
+    settings = await self.get_settings(guild)
+    steal_rate = settings.steal_success_rate
+
+    author_state = await self.load_member_state(author)
+    target_state = await self.load_member_state(target)
 
     cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
-    next_steal = await self.config.member(author).steal_cooldown() + steal_cooldown
-    author_steal_immune = await self.config.member(author).steal_immunity() + steal_immunity
-    target_steal_immune = await self.config.member(target).steal_immunity() + steal_immunity
+    cooldown_left = await self.timer_remaining("steal_cooldown", author, cur_time)
+    author_immunity_left = await self.timer_remaining("steal_immunity", author, cur_time)
+    target_immunity_left = await self.timer_remaining("steal_immunity", target, cur_time)
 
     # check if the user is on cooldown
-    if cur_time < next_steal:
+    if cooldown_left:
       # get the relative time for when the user can rob again
       relative_time = discord.utils.format_dt(
-        datetime.now(timezone.utc) + timedelta(seconds=next_steal - cur_time), "R"
+        datetime.now(timezone.utc) + timedelta(seconds=cooldown_left), "R"
       )
       await ctx.send(f"## You are on cooldown!\n You can steal again {relative_time}!")
       return
@@ -48,19 +50,19 @@ class StealCommand(commands.Cog):
       return
 
     # check if the target is immune to robbing
-    if cur_time < target_steal_immune:
+    if target_immunity_left:
       # get the relative time for when target's rob immunity expires
       relative_time = discord.utils.format_dt(
-        datetime.now(timezone.utc) + timedelta(seconds=target_steal_immune - cur_time), "R"
+        datetime.now(timezone.utc) + timedelta(seconds=target_immunity_left), "R"
       )
       await ctx.send(f"{target.mention} is currently immune to being robbed!\n You will be able to rob them "
                      f"{relative_time}!")
       return
 
     # check if the author is immune to robbing, and warn them that this will expire if they attempt to rob someone
-    if cur_time < author_steal_immune:
+    if author_immunity_left:
       relative_time = discord.utils.format_dt(
-        datetime.now(timezone.utc) + timedelta(seconds=author_steal_immune - cur_time), "R"
+        datetime.now(timezone.utc) + timedelta(seconds=author_immunity_left), "R"
       )
       await ctx.send(f"## You are currently still immune to being robbed!\n If you proceed with running this command, "
                      f"this immunity will be cancelled and other people will be able to rob you again."
@@ -72,31 +74,47 @@ class StealCommand(commands.Cog):
       except TimeoutError:
         return
       await ctx.send(f"You are no longer immune to being robbed!")
-      await self.config.user(author).steal_immunity.set(0)
+      author_state.steal_immunity = 0
+      await self.commit_member_state(author_state)
 
-    if amount < await self.config.STEAL_MIN():
-      await ctx.send(f"You can't steal less than {humanize_number(await self.config.STEAL_MIN())} {currency}!")
+    if amount < settings.steal_min:
+      await ctx.send(f"You can't steal less than {humanize_number(settings.steal_min)} {currency}!")
       return
 
-    if amount > await self.config.STEAL_MAX():
-      await ctx.send(f"You can't steal more than {humanize_number(await self.config.STEAL_MAX())} {currency}!")
+    if amount > settings.steal_max:
+      await ctx.send(f"You can't steal more than {humanize_number(settings.steal_max)} {currency}!")
       return
 
-    if await bank.can_spend(ctx.author, amount//2):
-      if await bank.can_spend(target, amount):
-        if randint(1, 100) <= steal_rate:
-          await bank.transfer_credits(target, ctx.author, amount)
-          await self.config.member(target).steal_immunity.set(cur_time)
-          await ctx.send(f"You successfully stole {humanize_number(amount)} {currency} from {target.mention}!")
-        else:
-          await bank.transfer_credits(ctx.author, target, amount//2)
-          await ctx.send(f"You failed to rob {target.mention} and lost {humanize_number(amount//2)} {currency}!")
+    # lock both members so concurrent steals, work shifts or bets can't spend the same credits twice
+    async with self.member_locks.lock(author, target):
+      # another steal may have finished while we were waiting for the locks or confirmation
+      if await self.timer_remaining("steal_cooldown", author, cur_time):
+        await ctx.send("## You are on cooldown!\n You've already tried to rob someone.")
+        return
 
-        await self.config.member(author).steal_cooldown.set(cur_time)
+      if await self.timer_remaining("steal_immunity", target, cur_time):
+        await ctx.send(f"{target.mention} has just been robbed and is now immune to being robbed!")
+        return
+
+      if await bank.can_spend(ctx.author, amount//2):
+        if await bank.can_spend(target, amount):
+          if randint(1, 100) <= steal_rate:
+            await bank.transfer_credits(target, ctx.author, amount)
+            self.ledger.record("steal", guild.id, amount, from_id=target.id, to_id=author.id)
+            target_state.steal_immunity = cur_time
+            await self.commit_member_state(target_state)
+            await ctx.send(f"You successfully stole {humanize_number(amount)} {currency} from {target.mention}!")
+          else:
+            await bank.transfer_credits(ctx.author, target, amount//2)
+            self.ledger.record("steal_fine", guild.id, amount//2, from_id=author.id, to_id=target.id)
+            await ctx.send(f"You failed to rob {target.mention} and lost {humanize_number(amount//2)} {currency}!")
+
+          author_state.steal_cooldown = cur_time
+          await self.commit_member_state(author_state)
+        else:
+          await ctx.send(f"{target.mention} doesn't have enough {currency} for you to steal that much!")
       else:
-        await ctx.send(f"{target.mention} doesn't have enough {currency} for you to steal that much!")
-    else:
-      await ctx.send(f"You don't have enough {currency} to steal that much!")
+        await ctx.send(f"You don't have enough {currency} to steal that much!")
 
   @commands.group(name="stealinfo", aliases=["robinfo"])
   async def command_stealinfo(self, ctx):
@@ -109,10 +127,10 @@ class StealCommand(commands.Cog):
       target = ctx.author
 
     cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
-    next_steal = await self.config.member(ctx.author).steal_cooldown() + await self.config.STEAL_COOLDOWN()
-    if cur_time < next_steal:
+    cooldown_left = await self.timer_remaining("steal_cooldown", target, cur_time)
+    if cooldown_left:
       relative_time = discord.utils.format_dt(
-        datetime.now(timezone.utc) + timedelta(seconds=next_steal - cur_time), "R"
+        datetime.now(timezone.utc) + timedelta(seconds=cooldown_left), "R"
       )
       await ctx.send(f"{target.mention} is on cooldown!\n You can steal again {relative_time}!")
     else:
@@ -125,11 +143,10 @@ class StealCommand(commands.Cog):
       target = ctx.author
 
     cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
-    immunity = await self.config.member(target).steal_immunity()
-    immune_duration = await self.config.STEAL_IMMUNITY()
-    if cur_time < immunity + immune_duration:
+    immunity_left = await self.timer_remaining("steal_immunity", target, cur_time)
+    if immunity_left:
       relative_time = discord.utils.format_dt(
-        datetime.now(timezone.utc) + timedelta(seconds=(immunity+immune_duration) - cur_time), "R"
+        datetime.now(timezone.utc) + timedelta(seconds=immunity_left), "R"
       )
       await ctx.send(f"{target.mention} is currently immune to being robbed!\n This immunity will expire {relative_time}!")
     else:
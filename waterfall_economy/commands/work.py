@@ -18,6 +18,19 @@ class WorkCommand(commands.Cog):
     self.bot = bot
     self.config = None
 
+  async def _fit_job_tier(self, state, job):
+    """
+    Get a member's tier in their job, moving them down to the highest tier left if an admin removed theirs.
+
+    Needs the member's lock, returns None if the job has no tiers at all.
+    """
+    if not job.tiers:
+      return None
+    if job.tier(state.job_tier) is None:
+      state.job_tier = len(job.tiers) - 1
+      await self.commit_member_state(state)
+    return job.tiers[state.job_tier]
+
   @commands.group(name="work", aliases=["job"])
   @commands.guild_only()
   async def command_work(self, ctx):
@@ -26,22 +39,13 @@ class WorkCommand(commands.Cog):
   @command_work.command(name="list")
   async def command_work_list(self, ctx):
     """List all available jobs"""
-    jobs = await self.config.JOBS()
-    current_job = await self.config.member(ctx.author).job()
-    global_times_worked = await self.config.member(ctx.author).job_global_times_worked()
+    catalog = await self.get_job_catalog(ctx.guild)
+    state = await self.load_member_state(ctx.author)
 
     currency = await bank.get_currency_name(ctx.guild)
-    embed = discord.Embed(title="Available Jobs")
-
-    for job in jobs:
-      embed.add_field(
-        name=f"{jobs[job]['emoji']} {jobs[job]['name']} {'(Current Job)' if current_job and current_job == job else ''}",
-        value=f"{jobs[job]['description']}\n"
-              f"ID: `{job}`\n"
-              f"Times worked required: {jobs[job]['min_times_worked']} {':heavy_check_mark:' if global_times_worked >= jobs[job]['min_times_worked'] else ':x:'}\n"
-              f"Starting rate: {humanize_number(jobs[job]['tiers'][0]['rate'])} {currency}/hour",
-        inline=False
-      )
+    embed = catalog.list_embed(
+      currency, state.job, state.job_global_times_worked, self.job_index.headcounts(ctx.guild.id)
+    )
 
     await ctx.send(embed=embed)
 
@@ -49,21 +53,20 @@ class WorkCommand(commands.Cog):
   @command_work.command(name="info", aliases=["details"])
   async def command_work_info(self, ctx, job: str):
     """Get information about a job"""
-    jobs = await self.config.JOBS()
-    job = jobs.get(job)
+    job = (await self.get_job_catalog(ctx.guild)).get(job)
 
     if not job:
       await ctx.send(embed=ErrorEmbed("That job does not exist!"))
       return
     else:
       currency = await bank.get_currency_name(ctx.guild)
-      embed = discord.Embed(title=f"{job['emoji']} {job['name']}", description=job['description'])
+      embed = discord.Embed(title=f"{job.emoji} {job.name}", description=job.description)
 
-      for tier in job['tiers']:
+      for tier in job.tiers:
         embed.add_field(
-          name=tier['name'],
-          value=f"Rate: {humanize_number(tier['rate'])} {currency}/hour\n"
-                f"{tier['min_hours']}-{tier['max_hours']} hours/shift",
+          name=tier.name,
+          value=f"Rate: {humanize_number(tier.rate)} {currency}/hour\n"
+                f"{tier.min_hours}-{tier.max_hours} hours/shift",
           inline=False
         )
 
@@ -72,29 +75,36 @@ class WorkCommand(commands.Cog):
   @command_work.command(name="status")
   async def command_work_status(self, ctx):
     """Check your current job status"""
-    job = await self.config.member(ctx.author).job()
-    tier_num = await self.config.member(ctx.author).job_tier()
-    times_worked = await self.config.member(ctx.author).job_times_worked()
-    global_times_worked = await self.config.member(ctx.author).job_global_times_worked()
+    state = await self.load_member_state(ctx.author)
+    times_worked = state.job_times_worked
+    global_times_worked = state.job_global_times_worked
+
+    if not state.job:
+      await ctx.send(embed=ErrorEmbed("You do not have a job!"))
+      return
 
+    job = (await self.get_job_catalog(ctx.guild)).get(state.job)
+    tier = None
     if job:
-      jobs = await self.config.JOBS()
-      job = jobs.get(job)
-      tier = job['tiers'][tier_num]
-      next_tier = job['tiers'][tier_num + 1] if tier_num + 1 < len(job['tiers']) else None
+      async with self.member_locks.lock(ctx.author):
+        tier = await self._fit_job_tier(state, job)
+    tier_num = state.job_tier
+
+    if tier:
+      promotion_at = job.promotions[tier_num]
       currency = await bank.get_currency_name(ctx.guild)
 
-      embed = discord.Embed(title=f"{job['emoji']} {job['name']} - {tier['name']}")
+      embed = discord.Embed(title=f"{job.emoji} {job.name} - {tier.name}")
       embed.add_field(
         name="Rate",
-        value=f"{humanize_number(tier['rate'])} {currency}/hour",
+        value=f"{humanize_number(tier.rate)} {currency}/hour",
         inline=True
       )
 
-      if next_tier:
+      if promotion_at is not None:
         embed.add_field(
           name="Promotion",
-          value=f"Promotion in {next_tier['times_worked'] - times_worked} shifts",
+          value=f"Promotion in {max(promotion_at - times_worked, 0)} shifts",
           inline=True
         )
       else:
@@ -113,65 +123,76 @@ class WorkCommand(commands.Cog):
 
       await ctx.send(embed=embed)
     else:
-      await ctx.send(embed=ErrorEmbed("You do not have a job!"))
+      await ctx.send(embed=ErrorEmbed("Your job no longer exists! Ask an admin to fire you so you can apply for another."))
 
   @command_work.command(name="apply")
   async def command_work_apply(self, ctx, job_name: str):
     """Apply for a job"""
-    jobs = await self.config.JOBS()
-    job = jobs.get(job_name)
+    job = (await self.get_job_catalog(ctx.guild)).get(job_name)
 
     if not job:
       await ctx.send(embed=ErrorEmbed("That job does not exist!"))
       return
 
-    current_job = await self.config.member(ctx.author).job()
-    if current_job:
-      await ctx.send(embed=ErrorEmbed("You already have a job!"))
+    if not job.tiers:
+      await ctx.send(embed=ErrorEmbed("That job doesn't have any positions yet!"))
       return
 
-    job_cooldown = await self.config.JOB_APPLY_COOLDOWN()
-    last_quit = await self.config.member(ctx.author).job_last_quit()
-    cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
+    # hold the member's lock from the checks to taking the job, so a shift, quit or fire can't change it in between
+    async with self.member_locks.lock(ctx.author):
+      state = await self.load_member_state(ctx.author)
+      if state.job:
+        await ctx.send(embed=ErrorEmbed("You already have a job!"))
+        return
 
-    if cur_time < last_quit + job_cooldown:
-      relative_time = discord.utils.format_dt(
-        datetime.now(timezone.utc) + timedelta(seconds=last_quit + job_cooldown - cur_time), "R"
-      )
-      await ctx.send(f"You are still on cooldown for applying to a job! You will be able to apply for another job {relative_time}")
-      return
+      cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
+      cooldown_left = await self.timer_remaining("job_apply_cooldown", ctx.author, cur_time)
 
-    if job['min_times_worked'] > await self.config.member(ctx.author).job_global_times_worked():
-      await ctx.send(embed=ErrorEmbed("You do not meet the requirements for this job!"))
-      return
+      if cooldown_left:
+        relative_time = discord.utils.format_dt(
+          datetime.now(timezone.utc) + timedelta(seconds=cooldown_left), "R"
+        )
+        await ctx.send(f"You are still on cooldown for applying to a job! You will be able to apply for another job {relative_time}")
+        return
 
-    currency = await bank.get_currency_name(ctx.guild)
+      if job.min_times_worked > state.job_global_times_worked:
+        await ctx.send(embed=ErrorEmbed("You do not meet the requirements for this job!"))
+        return
 
-    await self.config.member(ctx.author).job.set(job_name)
-    await self.config.member(ctx.author).job_tier.set(0)
-    await self.config.member(ctx.author).job_times_worked.set(0)
+      currency = await bank.get_currency_name(ctx.guild)
 
-    await ctx.send(embed=discord.Embed(
-        title="Job Applied",
-        description=f"You have successfully applied for the job of {job['name']}!\n"
-          f"Your hourly rate is now {humanize_number(job['tiers'][0]['rate'])} {currency}/hour",
-    ))
+      state.job = job_name
+      state.job_tier = 0
+      state.job_times_worked = 0
+      await self.commit_member_state(state)
+      self.job_index.add(ctx.guild.id, ctx.author.id, job_name)
+
+      await ctx.send(embed=discord.Embed(
+          title="Job Applied",
+          description=f"You have successfully applied for the job of {job.name}!\n"
+            f"Your hourly rate is now {humanize_number(job.tiers[0].rate)} {currency}/hour",
+      ))
 
   @command_work.command(name="quit")
   async def command_work_quit(self, ctx):
     """Quit your current job. Warning, you will not be able to apply for a job for a while!"""
-    job = await self.config.member(ctx.author).job()
-    if not job:
-      await ctx.send(embed=ErrorEmbed("You do not have a job!"))
-      return
-
-    job_cooldown = await self.config.JOB_APPLY_COOLDOWN()
-    cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
-
-    await self.config.member(ctx.author).job_last_quit.set(cur_time)
-    await self.config.member(ctx.author).job.set(None)
-    await self.config.member(ctx.author).job_tier.set(0)
-    await self.config.member(ctx.author).job_times_worked.set(0)
+    async with self.member_locks.lock(ctx.author):
+      state = await self.load_member_state(ctx.author)
+      if not state.job:
+        await ctx.send(embed=ErrorEmbed("You do not have a job!"))
+        return
+
+      job = (await self.get_job_catalog(ctx.guild)).get(state.job)
+      job_name = job.name if job else state.job
+      job_cooldown = (await self.get_settings(ctx.guild)).job_apply_cooldown
+      cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
+
+      self.job_index.remove(ctx.guild.id, ctx.author.id, state.job)
+      state.job_last_quit = cur_time
+      state.job = None
+      state.job_tier = 0
+      state.job_times_worked = 0
+      await self.commit_member_state(state)
 
     await ctx.send("Are you sure you want to quit your job? Type `yes` in the next 10 seconds to confirm.")
 
@@ -182,7 +203,7 @@ class WorkCommand(commands.Cog):
 
     await ctx.send(embed=discord.Embed(
         title="Job Quit",
-        description=f"You have successfully quit your job at {job['name']}!\n"
+        description=f"You have successfully quit your job at {job_name}!\n"
           f"You will be able to apply for a job again {discord.utils.format_dt(datetime.now(timezone.utc) + timedelta(seconds=job_cooldown), 'R')}",
     ))
 
@@ -190,82 +211,123 @@ class WorkCommand(commands.Cog):
   @commands.admin()
   async def command_work_fire(self, ctx, member: discord.Member):
     """Fire a member from their job"""
-    job = await self.config.member(member).job()
-    if not job:
-      await ctx.send(embed=ErrorEmbed("That user does not have a job!"))
-      return
+    async with self.member_locks.lock(member):
+      state = await self.load_member_state(member)
+      if not state.job:
+        await ctx.send(embed=ErrorEmbed("That user does not have a job!"))
+        return
+
+      job = (await self.get_job_catalog(ctx.guild)).get(state.job)
+      job_name = job.name if job else state.job
 
-    await self.config.member(member).job.set(None)
-    await self.config.member(member).job_tier.set(0)
-    await self.config.member(member).job_times_worked.set(0)
+      self.job_index.remove(ctx.guild.id, member.id, state.job)
+      state.job = None
+      state.job_tier = 0
+      state.job_times_worked = 0
+      await self.commit_member_state(state)
 
     await ctx.send(embed=discord.Embed(
         title="User Fired",
-        description=f"{member.mention} has been fired from their job at {job['name']}!",
+        description=f"{member.mention} has been fired from their job at {job_name}!",
     ))
 
   @command_work.command(name="cooldown")
   async def command_work_cooldown(self, ctx):
     """Check how long until you can work again"""
-    job = await self.config.member(ctx.author).job()
-    if not job:
+    state = await self.load_member_state(ctx.author)
+    if not state.job:
       await ctx.send(embed=ErrorEmbed("You do not have a job!"))
       return
 
-    job_cooldown = await self.config.JOB_COOLDOWN()
-    last_worked = await self.config.member(ctx.author).job_last_worked()
     cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
+    cooldown_left = await self.timer_remaining("job_cooldown", ctx.author, cur_time)
 
-    if cur_time < last_worked + job_cooldown:
+    if cooldown_left:
       relative_time = discord.utils.format_dt(
-        datetime.now(timezone.utc) + timedelta(seconds=last_worked + job_cooldown - cur_time), "R"
+        datetime.now(timezone.utc) + timedelta(seconds=cooldown_left), "R"
       )
       await ctx.send(f"You will be able to work again {relative_time}.")
     else:
       await ctx.send("You are not on cooldown and can work now!")
 
+  @command_work.command(name="remind", aliases=["reminder"])
+  async def command_work_remind(self, ctx):
+    """Get a DM when you can work again"""
+    cooldown_left = await self.timer_remaining("job_cooldown", ctx.author)
+    if not cooldown_left:
+      await ctx.send("You are not on cooldown and can work now!")
+      return
+
+    member = ctx.author
+
+    async def remind():
+      try:
+        await member.send(f"You can work again in **{member.guild.name}**!")
+      except discord.HTTPException:
+        pass
+
+    self.timers.add_callback(("job_cooldown", member.guild.id, member.id), remind)
+    relative_time = discord.utils.format_dt(datetime.now(timezone.utc) + timedelta(seconds=cooldown_left), "R")
+    await ctx.send(f"I'll DM you when you can work again {relative_time}.")
+
   @command_work.command(name="shift", aliases=["work"])
   async def command_work_shift(self, ctx):
     """Work a shift"""
-    job_name = await self.config.member(ctx.author).job()
-    if not job_name:
+    state = await self.load_member_state(ctx.author)
+    if not state.job:
       await ctx.send(embed=ErrorEmbed("You do not have a job!"))
       return
 
-    jobs = await self.config.JOBS()
-    job = jobs.get(job_name)
-    tier_int = await self.config.member(ctx.author).job_tier()
-    tier = job['tiers'][tier_int]
-
-    job_cooldown = await self.config.JOB_COOLDOWN()
-    last_worked = await self.config.member(ctx.author).job_last_worked()
-    cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
+    job_name = state.job
+    job = (await self.get_job_catalog(ctx.guild)).get(job_name)
 
-    if cur_time < last_worked + job_cooldown:
-      relative_time = discord.utils.format_dt(
-        datetime.now(timezone.utc) + timedelta(seconds=last_worked + job_cooldown - cur_time), "R"
-      )
-      await ctx.send(f"You are still on cooldown for working! You will be able to work again {relative_time}")
+    if not job or not job.tiers:
+      await ctx.send(embed=ErrorEmbed("Your job no longer exists! Ask an admin to fire you so you can apply for another."))
       return
 
+    cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
     currency = await bank.get_currency_name(ctx.guild)
 
-    hours = randint(tier['min_hours'], tier['max_hours'])
-    rate = tier['rate']
-    earnings = hours * rate
+    # hold the member's lock from the cooldown check to the payout, so two shifts at once can't both get paid
+    async with self.member_locks.lock(ctx.author):
+      # they may have quit or been fired while we were waiting for the lock
+      if state.job != job_name:
+        await ctx.send(embed=ErrorEmbed("Your job changed while you were starting your shift, try again!"))
+        return
+      tier = await self._fit_job_tier(state, job)
+      tier_int = state.job_tier
+
+      cooldown_left = await self.timer_remaining("job_cooldown", ctx.author, cur_time)
+
+      if cooldown_left:
+        relative_time = discord.utils.format_dt(
+          datetime.now(timezone.utc) + timedelta(seconds=cooldown_left), "R"
+        )
+        await ctx.send(f"You are still on cooldown for working! You will be able to work again {relative_time}")
+        return
+
+      hours = randint(tier.min_hours, tier.max_hours)
+      rate = tier.rate
+      earnings = hours * rate
 
-    await self.config.member(ctx.author).job_last_worked.set(cur_time)
-    await self.config.member(ctx.author).job_times_worked.set(await self.config.member(ctx.author).job_times_worked() + 1)
-    await self.config.member(ctx.author).job_global_times_worked.set(await self.config.member(ctx.author).job_global_times_worked() + 1)
+      state.job_last_worked = cur_time
+      state.job_times_worked += 1
+      state.job_global_times_worked += 1
 
-    message = f"You have worked a {hours} hour shift at {job['name']} and earned {humanize_number(earnings)} {currency}!"
+      message = f"You have worked a {hours} hour shift at {job.name} and earned {humanize_number(earnings)} {currency}!"
 
-    next_tier = job['tiers'][tier_int + 1] if tier_int + 1 < len(job['tiers']) else None
+      promotion_at = job.promotions[tier_int]
 
-    if next_tier and await self.config.member(ctx.author).job_times_worked() >= next_tier['times_worked']:
-      await self.config.member(ctx.author).job_tier.set(await self.config.member(ctx.author).job_tier() + 1)
-      message += f"\nYou have been promoted to {next_tier['name']}! Your new rate is {humanize_number(next_tier['rate'])} {currency}/hour"
+      if promotion_at is not None and state.job_times_worked >= promotion_at:
+        next_tier = job.tiers[tier_int + 1]
+        state.job_tier += 1
+        # keeps the index right even if it somehow missed this member taking the job
+        if state.job:
+          self.job_index.add(ctx.guild.id, ctx.author.id, state.job)
+        message += f"\nYou have been promoted to {next_tier.name}! Your new rate is {humanize_number(next_tier.rate)} {currency}/hour"
 
-    await bank.deposit_credits(ctx.author, earnings)
+      await self.commit_member_state(state)
+      await bank.deposit_credits(ctx.author, earnings)
+      self.ledger.record("work", ctx.guild.id, earnings, to_id=ctx.author.id)
 
-    await ctx.send(message)
\ No newline at end of file
+    await ctx.send(message)
@@ -0,0 +1,245 @@
+"""
+Parser for roulette bet strings ("red", "17", "1st dozen", "corner 5", "1-2-4-5"...) and bet slips of several bets
+("100 red; 50 17; 25 1st dozen").
+
+Bet strings are split into tokens by one precompiled pattern, each token is classified into the kinds it can stand for
+(a number, an ordinal, or one of the bet keywords), and the kinds are matched against a table of grammar rules. The
+first rule that matches builds the bet. Parses are memoised on the normalised tokens, since the same few bets get
+placed over and over.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Iterable
+
+from .gambling import RouletteBetType, REDS, BLACKS
+
+# anything that isn't a separator is part of a token, "to" and "and" only ever join numbers together
+_TOKEN = re.compile(r"[^\s\-–_+&,]+")
+_FILLER = frozenset({"to", "and"})
+
+BET_NAMES = {
+  "straight": ["straight", "number", "num", "single"],
+  "zero": ["zero", "green"],
+  "red": ["red", "reds"],
+  "black": ["black", "blacks"],
+  "even": ["even", "evens"],
+  "odd": ["odd", "odds"],
+  "low": ["low", "lows"],
+  "high": ["high", "highs"],
+  "snake": ["snake"],
+  "dozen": ["dozen", "12"],
+  "corner": ["corner"],
+  "top": ["top"],
+  "line": ["line"],
+  "column": ["column", "col"]
+}
+
+_KEYWORDS: dict[str, set[str]] = {}
+for _kind, _names in BET_NAMES.items():
+  for _name in _names:
+    _KEYWORDS.setdefault(_name, set()).add(_kind)
+
+_ORDINALS = {"first": 1, "second": 2, "middle": 2, "third": 3, "last": 3}
+_ORDINAL_SUFFIXES = ("st", "nd", "rd")
+
+ALL_IN = frozenset({"all", "max", "everything", "all_in"})
+MAX_SLIP_BETS = 20
+
+SNAKE = (1, 5, 9, 12, 14, 16, 19, 23, 27, 30, 32, 34)
+TOP_LINE = (0, 1, 2, 3)
+
+
+def _classify(token: str) -> frozenset[str]:
+  """Get every kind of token a word could be"""
+  kinds = set(_KEYWORDS.get(token, ()))
+  if token.isdigit():
+    kinds.add("num")
+  if token in _ORDINALS or (token[:-2].isdigit() and token[-2:] in _ORDINAL_SUFFIXES):
+    kinds.add("ord")
+  return frozenset(kinds)
+
+
+def _number(token: str) -> int:
+  return int(token)
+
+
+def _ordinal(token: str) -> int:
+  return _ORDINALS[token] if token in _ORDINALS else int(token[:-2])
+
+
+def _check_pockets(*numbers: int):
+  if not all(0 <= number <= 36 for number in numbers):
+    raise ValueError("Bets must be on numbers between 0 and 36.")
+
+
+# simple single word bets: kind -> (name, payout, pockets)
+_OUTSIDE_BETS = {
+  "zero": ("0️⃣ Zero Bet", 35.0, (0,)),
+  "red": ("🔴 Red Bet", 1.0, REDS),
+  "black": ("⚫ Black Bet", 1.0, BLACKS),
+  "even": ("Evens Bet", 1.0, range(2, 37, 2)),
+  "odd": ("Odds Bet", 1.0, range(1, 37, 2)),
+  "low": ("⬇️ Low (1-18) Bet", 1.0, range(1, 19)),
+  "high": ("⬆️ High (19-36) Bet", 1.0, range(19, 37)),
+  "snake": ("🐍 Snake Bet", 2.0, SNAKE),
+  "top": ("🔝 Top Line Bet on 0, 1, 2, and 3", 8.0, TOP_LINE),
+}
+
+
+def _outside(kind: str) -> Callable[[tuple[str, ...]], RouletteBetType]:
+  name, payout, pockets = _OUTSIDE_BETS[kind]
+  return lambda tokens: RouletteBetType.intern(name, payout, pockets)
+
+
+def _straight(tokens) -> RouletteBetType:
+  number = _number(tokens[0])
+  if number == 0:
+    return _outside("zero")(tokens)
+  if number > 36:
+    raise ValueError("Straight bets must be on numbers between 0 and 36.")
+  return RouletteBetType.intern(f"Straight Bet on {number}", 35.0, (number,))
+
+
+def _dozen(dozen_num: int) -> RouletteBetType:
+  if not 1 <= dozen_num <= 3:
+    raise ValueError("Invalid dozen bet specification.")
+  low = dozen_num * 12 - 11
+  return RouletteBetType.intern(f"Dozen Bet on {low} to {low + 11}", 2.0, range(low, low + 12))
+
+
+def _column(column_num: int) -> RouletteBetType:
+  if not 1 <= column_num <= 3:
+    raise ValueError("Column bets must be on columns 1, 2, or 3.")
+  return RouletteBetType.intern(f"Column Bet on Column {column_num}", 2.0, range(column_num, 37, 3))
+
+
+def _corner(corner_num: int) -> RouletteBetType:
+  if not (1 <= corner_num <= 32) or (corner_num % 3 == 0):
+    raise ValueError("Corner bets can't be made on numbers in the last row/column.")
+  pockets = (corner_num, corner_num + 1, corner_num + 3, corner_num + 4)
+  return RouletteBetType.intern(
+    f"Corner Bet on {pockets[0]}, {pockets[1]}, {pockets[2]}, and {pockets[3]}", 8.0, pockets
+  )
+
+
+def _range(tokens) -> RouletteBetType:
+  low, high = sorted(map(_number, tokens))
+  _check_pockets(low, high)
+
+  # split bet, 2 adjacent nums
+  if (high == low + 1) or (high - low == 3) and (low != 0 and high != 0):
+    return RouletteBetType.intern(f"Split Bet on {low} and {high}", 17.0, (low, high))
+  # street bet, 3 nums in a row
+  if (high - low == 2) and (low % 3 == 1):
+    return RouletteBetType.intern(f"Street Bet on {low}, {low+1}, and {high}", 11.0, range(low, high + 1))
+  # double street bet, 6 nums in two rows
+  if (high - low == 5) and (low % 3 == 1):
+    return RouletteBetType.intern(f"Double Street Bet on {low} to {high}", 5.0, range(low, high + 1))
+  # dozen bet 12 nums
+  if (high - low == 11) and (low in [1, 13, 25]):
+    return _dozen(low // 12 + 1)
+  # high/low bet 18 nums
+  if (high - low == 17) and (low in [1, 19]):
+    return _outside("low" if low == 1 else "high")(tokens)
+  raise ValueError("Invalid bet type specified.")
+
+
+def _street(tokens) -> RouletteBetType:
+  nums = sorted(map(_number, tokens))
+  if nums[0] < 1 or nums[2] > 36:
+    raise ValueError("Bets must be on numbers between 0 and 36.")
+  if nums[2] - nums[0] == 2 and nums[0] % 3 == 1 and nums[1] == nums[0] + 1:
+    return RouletteBetType.intern(f"Street Bet on {nums[0]}, {nums[1]}, and {nums[2]}", 11.0, nums)
+  raise ValueError("Invalid bet type specified.")
+
+
+def _four_numbers(tokens) -> RouletteBetType:
+  nums = sorted(map(_number, tokens))
+  if nums == list(TOP_LINE):
+    return _outside("top")(tokens)
+  if nums[0] < 1 or nums[3] > 36:
+    raise ValueError("Bets must be on numbers between 0 and 36.")
+  if nums[1] == nums[0] + 1 and nums[2] == nums[0] + 3 and nums[3] == nums[0] + 4:
+    return _corner(nums[0])
+  raise ValueError("Invalid bet type specified.")
+
+
+# (kind each token has to be, builder), tried in order, the first one that matches builds the bet
+GRAMMAR: list[tuple[tuple[str, ...], Callable[[tuple[str, ...]], RouletteBetType]]] = [
+  (("num",), _straight),
+  *(((kind,), _outside(kind)) for kind in _OUTSIDE_BETS),
+  (("num", "num"), _range),
+  (("straight", "num"), lambda tokens: _straight(tokens[1:])),
+  (("dozen", "num"), lambda tokens: _dozen(_number(tokens[1]))),
+  (("ord", "dozen"), lambda tokens: _dozen(_ordinal(tokens[0]))),
+  (("column", "num"), lambda tokens: _column(_number(tokens[1]))),
+  (("ord", "column"), lambda tokens: _column(_ordinal(tokens[0]))),
+  (("corner", "num"), lambda tokens: _corner(_number(tokens[1]))),
+  (("top", "line"), _outside("top")),
+  (("num", "num", "num"), _street),
+  (("num", "num", "num", "num"), _four_numbers),
+]
+
+_MAX_TOKENS = max(len(pattern) for pattern, _ in GRAMMAR)
+
+
+def tokenize(bet: str) -> tuple[str, ...]:
+  """Split a bet string into its normalised tokens"""
+  return tuple(token for token in _TOKEN.findall(bet.lower()) if token not in _FILLER)
+
+
+@lru_cache(maxsize=1024)
+def _parse_tokens(tokens: tuple[str, ...]) -> RouletteBetType:
+  if len(tokens) > _MAX_TOKENS:
+    raise ValueError("Bet definition too long.")
+
+  kinds = [_classify(token) for token in tokens]
+  for pattern, build in GRAMMAR:
+    if len(pattern) == len(tokens) and all(kind in token_kinds for kind, token_kinds in zip(pattern, kinds)):
+      return build(tokens)
+
+  raise ValueError("Invalid bet type specified.")
+
+
+def parse_bet(words: Iterable[str]) -> RouletteBetType:
+  """Parse the words of a bet (e.g. the args of `roulette bet`) into its bet type, raises ValueError if it's invalid"""
+  tokens = tokenize(" ".join(words))
+  if not tokens:
+    raise ValueError("Invalid bet type specified.")
+  return _parse_tokens(tokens)
+
+
+def parse_slip(words: Iterable[str]) -> list[tuple[int | str, RouletteBetType]]:
+  """
+  Parse a bet slip, bets separated by ";" that each start with their amount, into (amount, bet type) pairs.
+
+  An all in bet has the amount "all", to be swapped for the bettor's balance. Raises ValueError naming the bet at fault
+  if any of them are invalid, so nothing on the slip gets placed.
+  """
+  parts = [part.split() for part in " ".join(words).split(";")]
+  parts = [part for part in parts if part]
+  if not parts:
+    raise ValueError("Please specify a bet amount and type.")
+  if len(parts) > MAX_SLIP_BETS:
+    raise ValueError(f"You can place at most {MAX_SLIP_BETS} bets at once.")
+
+  slip = []
+  for bet_num, (amount, *bet) in enumerate(parts, start=1):
+    where = f"Bet {bet_num} (`{' '.join([amount, *bet])}`): " if len(parts) > 1 else ""
+    if amount.lower() in ALL_IN:
+      if len(parts) > 1:
+        raise ValueError(f"{where}You can only go all in on a single bet.")
+      amount = "all"
+    else:
+      try:
+        amount = int(amount.replace(",", ""))
+      except ValueError:
+        raise ValueError(f"{where}Please specify a valid bet amount.") from None
+
+    try:
+      slip.append((amount, parse_bet(bet)))
+    except ValueError as e:
+      raise ValueError(f"{where}{e}") from None
+
+  return slip
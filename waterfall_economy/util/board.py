@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+import discord
+
+log = logging.getLogger("red.waterfall_economy.board")
+
+
+class LiveMessage:
+  """
+  A message that's kept up to date by editing it, at most once every `interval` seconds.
+
+  ``refresh`` only marks the message as stale. However many times that happens in an interval, it gets re-rendered and
+  edited once, with whatever the state is by then. Edits go out one at a time, and a render that was started before a
+  ``set`` is dropped rather than overwriting what was set.
+  """
+
+  def __init__(
+      self,
+      message: discord.Message | discord.PartialMessage,
+      render: Callable[[], Awaitable[dict]],
+      interval: float
+  ):
+    self.message = message
+    self.render = render  # gives the kwargs for message.edit
+    self.interval = interval
+
+    self._last_edit = 0.0
+    self._task: Optional[asyncio.Task] = None
+    self._lock = asyncio.Lock()
+    self._version = 0  # bumped by every set, so older renders know they're stale
+
+  def refresh(self):
+    """Mark the message as out of date, this never waits"""
+    if self._task is None:
+      self._task = asyncio.create_task(self._edit_later())
+
+  async def _edit_later(self):
+    delay = self._last_edit + self.interval - time.monotonic()
+    if delay > 0:
+      await asyncio.sleep(delay)
+    # anything that changes from here on needs another edit
+    self._task = None
+    self._last_edit = time.monotonic()
+    version = self._version
+    try:
+      content = await self.render()
+    except Exception:
+      log.exception("Error rendering live message %d", self.message.id)
+      return
+
+    async with self._lock:
+      if version == self._version:
+        await self._edit(**content)
+
+  async def _edit(self, **kwargs):
+    self._last_edit = time.monotonic()
+    try:
+      await self.message.edit(**kwargs)
+    except discord.HTTPException:
+      log.warning("Couldn't update live message %d", self.message.id, exc_info=True)
+
+  async def set(self, **kwargs):
+    """Edit the message right now, replacing any edit that was waiting or is still being rendered"""
+    self.close()
+    self._version += 1
+    async with self._lock:
+      await self._edit(**kwargs)
+
+  def close(self):
+    if self._task is not None:
+      self._task.cancel()
+      self._task = None
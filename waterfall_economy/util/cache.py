@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+from typing import NamedTuple
+
+import discord
+from redbot.core import Config
+
+from .state import MemberEconomyState
+
+log = logging.getLogger("red.waterfall_economy.cache")
+
+
+class BulkResetResult(NamedTuple):
+  """The outcome of a bulk member reset"""
+  changed: int  # how many member records were actually changed
+  elapsed: float  # seconds taken, including the flush beforehand
+
+
+class MemberStateCache:
+  """
+  A write-back cache of member economy states.
+
+  A member's whole record is read from Config once, commands then mutate the state in memory and commit it, and a
+  background task writes the changed fields back in batches (one grouped Config write per guild). After each flush,
+  states that are fully written and haven't been used for `idle_timeout` seconds are dropped, so the cache only holds
+  members who are actually active.
+  """
+
+  def __init__(
+      self,
+      config: Config,
+      defaults: dict,
+      flush_interval: float = 30.0,
+      batch_size: int = 1000,
+      idle_timeout: float = 3600.0
+  ):
+    self.config = config
+    self.defaults = defaults
+    self.flush_interval = flush_interval
+    self.batch_size = batch_size
+    self.idle_timeout = idle_timeout
+
+    self._states: dict[int, dict[int, MemberEconomyState]] = {}  # guild id -> member id -> state
+    self._last_used: dict[int, dict[int, float]] = {}  # guild id -> member id -> monotonic time of last load/commit
+    self._dirty: dict[int, set[int]] = {}  # guild id -> member ids with uncommitted changes
+    self._flush_lock = asyncio.Lock()
+    self._task = None
+
+  async def load(self, member: discord.Member) -> MemberEconomyState:
+    """Get a member's state, filling it from a single Config read if it isn't cached yet"""
+    return await self.load_from_ids(member.guild.id, member.id)
+
+  async def load_from_ids(self, guild_id: int, member_id: int) -> MemberEconomyState:
+    """Get a member's state by id, filling it from a single Config read if it isn't cached yet"""
+    guild_states = self._states.setdefault(guild_id, {})
+    state = guild_states.get(member_id)
+
+    if state is None:
+      data = await self.config.member_from_ids(guild_id, member_id).all()
+      # another command may have loaded (and changed) the state while we were waiting on Config
+      state = guild_states.setdefault(member_id, MemberEconomyState(guild_id, member_id, data))
+
+    self._last_used.setdefault(guild_id, {})[member_id] = time.monotonic()
+    return state
+
+  def commit(self, state: MemberEconomyState):
+    """Queue a state's changed fields to be written on the next flush"""
+    if state.changes():
+      self._dirty.setdefault(state.guild_id, set()).add(state.member_id)
+    self._last_used.setdefault(state.guild_id, {})[state.member_id] = time.monotonic()
+
+  async def flush(self, guild_id: int = None):
+    """Write committed changes back to Config, for one guild or all of them"""
+    async with self._flush_lock:
+      guild_ids = [guild_id] if guild_id is not None else list(self._dirty.keys())
+
+      for gid in guild_ids:
+        dirty = list(self._dirty.pop(gid, ()))
+
+        for i in range(0, len(dirty), self.batch_size):
+          try:
+            await self._write_batch(gid, dirty[i:i + self.batch_size])
+          except Exception:
+            # keep whatever didn't make it to disk dirty, so it's retried on the next flush
+            self._dirty.setdefault(gid, set()).update(dirty[i:])
+            raise
+
+  async def _write_batch(self, guild_id: int, member_ids: list[int]):
+    """Write the changed fields of a batch of states in a single grouped Config write"""
+    states = self._states.get(guild_id, {})
+    group = self.config._get_base_group(self.config.MEMBER, str(guild_id))
+    written = {}
+
+    async with group.all() as members:
+      for member_id in member_ids:
+        state = states.get(member_id)
+        if state is None:
+          continue
+
+        changes = state.changes()
+        stored = members.setdefault(str(member_id), {})
+        for key, value in changes.items():
+          # only store what differs from the defaults, Config fills the rest back in on read
+          if value == self.defaults.get(key):
+            stored.pop(key, None)
+          else:
+            stored[key] = value
+
+        if not stored:
+          del members[str(member_id)]
+
+        written[member_id] = changes
+
+    for member_id, changes in written.items():
+      states[member_id].mark_saved(changes)
+
+  async def reset_fields(self, guild_id: int, *fields: str) -> BulkResetResult:
+    """
+    Reset fields back to their defaults for every member of a guild.
+
+    Only records that are actually stored and differ from the default are touched, and they're all changed in one
+    grouped Config write rather than one write per guild member.
+    """
+    start = time.perf_counter()
+    # get anything still in memory on disk first so the stored records are the whole picture
+    await self.flush(guild_id)
+
+    changed = 0
+    group = self.config._get_base_group(self.config.MEMBER, str(guild_id))
+
+    async with self._flush_lock:
+      async with group.all() as members:
+        for member_id in list(members.keys()):
+          stored = members[member_id]
+          touched = False
+
+          for field in fields:
+            if field in stored and stored[field] != self.defaults[field]:
+              touched = True
+            stored.pop(field, None)
+
+          if touched:
+            changed += 1
+          if not stored:
+            del members[member_id]
+
+      # bring cached states in line with what's now stored
+      defaults = {field: self.defaults[field] for field in fields}
+      for state in self._states.get(guild_id, {}).values():
+        for field, value in defaults.items():
+          setattr(state, field, value)
+        state.mark_saved(defaults)
+
+    return BulkResetResult(changed, time.perf_counter() - start)
+
+  async def forget(self, member_id: int) -> list[MemberEconomyState]:
+    """Drop a member's cached states in every guild along with their unwritten changes, returns the dropped states"""
+    forgotten = []
+    # wait out any flush that's partway through, so it can't write them back afterwards
+    async with self._flush_lock:
+      for guild_id, states in self._states.items():
+        state = states.pop(member_id, None)
+        if state is not None:
+          forgotten.append(state)
+        self._dirty.get(guild_id, set()).discard(member_id)
+        self._last_used.get(guild_id, {}).pop(member_id, None)
+    return forgotten
+
+  def evict_idle(self) -> int:
+    """Drop states that have nothing left to write and haven't been used for a while, returns how many were dropped"""
+    cutoff = time.monotonic() - self.idle_timeout
+    evicted = 0
+
+    for guild_id in list(self._last_used.keys()):
+      last_used = self._last_used[guild_id]
+      states = self._states.get(guild_id, {})
+      dirty = self._dirty.get(guild_id, ())
+
+      for member_id, used_at in list(last_used.items()):
+        if used_at > cutoff or member_id in dirty:
+          continue
+        state = states.get(member_id)
+        # a state changed but never committed is still in use, leave it be
+        if state is not None and state.changes():
+          continue
+
+        del last_used[member_id]
+        states.pop(member_id, None)
+        evicted += 1
+
+      if not last_used:
+        del self._last_used[guild_id]
+      if not states:
+        self._states.pop(guild_id, None)
+
+    return evicted
+
+  async def _flush_loop(self):
+    while True:
+      await asyncio.sleep(self.flush_interval)
+      try:
+        await self.flush()
+      except Exception:
+        log.exception("Failed to flush the member state cache")
+        continue
+
+      self.evict_idle()
+
+  def start(self):
+    """Start the background flush task"""
+    if self._task is None:
+      self._task = asyncio.create_task(self._flush_loop())
+
+  async def close(self):
+    """Stop the background flush task and force a final flush"""
+    if self._task is not None:
+      self._task.cancel()
+      self._task = None
+
+    await self.flush()
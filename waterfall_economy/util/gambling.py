@@ -1,15 +1,60 @@
+from typing import Iterable
+
 from redbot.core import bank
 import discord
 
+# the pockets in the order they sit around the wheel
+ROULETTE_WHEEL = [
+  0, 32, 15, 19, 4, 21, 2, 25, 17, 34, 6, 27,
+  13, 36, 11, 30, 8, 23, 10, 5, 24, 16, 33, 1,
+  20, 14, 31, 9, 22, 18, 29, 7, 28, 12, 35, 3, 26
+]
+
+REDS = [
+  32, 19, 21, 25, 34, 27, 36, 30, 23, 5,
+  16, 1, 14, 9, 18, 7, 12, 3
+]
+
+BLACKS = [
+  15, 4, 2, 17, 6, 13, 11, 8, 10, 24,
+  33, 20, 31, 22, 29, 28, 35, 26
+]
+
 
 class RouletteBetType:
-  def __init__(self, name: str, payout: float, condition):
+  """
+  A kind of roulette bet, compiled to a bitmask of the pockets it covers (bit n set = wins on n).
+
+  Use ``RouletteBetType.intern`` to get one, so every bet on the same pockets at the same payout shares a single object.
+  """
+
+  __slots__ = ("name", "payout", "mask")
+
+  _interned: dict[tuple[int, float], "RouletteBetType"] = {}
+
+  def __init__(self, name: str, payout: float, pockets: Iterable[int]):
     self.name = name
     self.payout = payout
-    self.condition = condition  # A function that takes the winning number and returns True if the bet wins
+    self.mask = 0
+    for pocket in pockets:
+      self.mask |= 1 << pocket
+
+  @classmethod
+  def intern(cls, name: str, payout: float, pockets: Iterable[int]) -> "RouletteBetType":
+    """Get the shared bet type for a set of pockets and payout, making it if it doesn't exist yet"""
+    bet_type = cls(name, payout, pockets)
+    return cls._interned.setdefault((bet_type.mask, payout), bet_type)
+
+  @classmethod
+  def from_mask(cls, name: str, payout: float, mask: int) -> "RouletteBetType":
+    """Get the shared bet type for an already compiled pocket mask"""
+    return cls.intern(name, payout, (pocket for pocket in range(37) if mask >> pocket & 1))
 
   def check_win(self, result: int) -> bool:
-    return self.condition(result)
+    return bool(self.mask >> result & 1)
+
+  def __repr__(self):
+    return f"<RouletteBetType {self.name!r} payout={self.payout} mask={self.mask:#x}>"
 
 
 class RouletteBet:
@@ -20,3 +65,55 @@ class RouletteBet:
 
   def check_bet_win(self, result: int) -> bool:
     return self.bet_type.check_win(result)
+
+
+def split_winners(bets: Iterable[RouletteBet], result: int) -> tuple[list[RouletteBet], list[RouletteBet]]:
+  """Split bets into (winners, losers), testing each distinct bet type once instead of every bet"""
+  groups: dict[int, list[RouletteBet]] = {}
+  for bet in bets:
+    groups.setdefault(bet.bet_type.mask, []).append(bet)
+
+  winners, losers = [], []
+  for mask, group in groups.items():
+    (winners if mask >> result & 1 else losers).extend(group)
+
+  return winners, losers
+
+
+class BettorResult:
+  """Everything one bettor won and lost on a spin"""
+
+  __slots__ = ("bettor", "bets", "payout", "won", "lost", "winning_bets")
+
+  def __init__(self, bettor: discord.Member):
+    self.bettor = bettor
+    self.bets = 0
+    self.payout = 0  # credits to pay back out, stakes of winning bets included
+    self.won = 0  # profit from winning bets
+    self.lost = 0  # stakes of losing bets
+    self.winning_bets = 0
+
+  @property
+  def net(self) -> int:
+    return self.won - self.lost
+
+
+def settle(bets: Iterable[RouletteBet], result: int) -> list[BettorResult]:
+  """Total up a spin per bettor, biggest net winners first"""
+  winners, losers = split_winners(bets, result)
+  results: dict[int, BettorResult] = {}
+
+  for bet in winners:
+    bettor_result = results.get(bet.bettor.id) or results.setdefault(bet.bettor.id, BettorResult(bet.bettor))
+    payout = int(bet.amount * (bet.bet_type.payout + 1))
+    bettor_result.bets += 1
+    bettor_result.winning_bets += 1
+    bettor_result.payout += payout
+    bettor_result.won += payout - bet.amount
+
+  for bet in losers:
+    bettor_result = results.get(bet.bettor.id) or results.setdefault(bet.bettor.id, BettorResult(bet.bettor))
+    bettor_result.bets += 1
+    bettor_result.lost += bet.amount
+
+  return sorted(results.values(), key=lambda bettor_result: bettor_result.net, reverse=True)
@@ -0,0 +1,159 @@
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+import discord
+from redbot.core.utils.chat_formatting import humanize_number
+
+
+class JobTier(NamedTuple):
+  """A single position within a job"""
+  name: str
+  rate: int
+  min_hours: int
+  max_hours: int
+  times_worked: int
+
+
+class Job(NamedTuple):
+  """A job and its tiers, compiled from the JOBS setting"""
+  id: str
+  name: str
+  description: str
+  emoji: str
+  min_times_worked: int
+  tiers: tuple[JobTier, ...]
+  # promotions[i] is how many shifts it takes to get from tier i to tier i + 1, None at the top tier
+  promotions: tuple[Optional[int], ...]
+
+  def tier(self, tier_num: int) -> Optional[JobTier]:
+    """Get a tier by its index, or None if the job doesn't have it"""
+    return self.tiers[tier_num] if 0 <= tier_num < len(self.tiers) else None
+
+  def next_tier(self, tier_num: int) -> Optional[JobTier]:
+    """Get the tier after the given one, or None if it's the highest"""
+    return self.tier(tier_num + 1)
+
+
+class JobCatalog:
+  """
+  An immutable, compiled copy of the JOBS setting.
+
+  Built once per change to the jobs (tracked by ``version``) so work commands don't have to read and index the nested
+  JOBS dict on every call.
+  """
+
+  __slots__ = ("version", "jobs", "_list_fields")
+
+  def __init__(self, version: int, jobs: dict):
+    self.version = version
+
+    compiled = {}
+    for job_id, job in jobs.items():
+      tiers = tuple(
+        JobTier(tier["name"], tier["rate"], tier["min_hours"], tier["max_hours"], tier["times_worked"])
+        for tier in job["tiers"]
+      )
+      compiled[job_id] = Job(
+        id=job_id,
+        name=job["name"],
+        description=job["description"],
+        emoji=job["emoji"],
+        min_times_worked=job["min_times_worked"],
+        tiers=tiers,
+        promotions=tuple(tiers[i + 1].times_worked if i + 1 < len(tiers) else None for i in range(len(tiers))),
+      )
+
+    self.jobs = MappingProxyType(compiled)
+
+    # the `work list` fields, only the current job marker, requirement tick and currency are filled in per call
+    self._list_fields = tuple(
+      (
+        job.id,
+        f"{job.emoji} {job.name}",
+        f"{job.description}\nID: `{job.id}`\nTimes worked required: {job.min_times_worked}",
+        f"Starting rate: {humanize_number(job.tiers[0].rate)} {{currency}}/hour" if job.tiers
+        else "Starting rate: N/A",
+        job.min_times_worked,
+      )
+      for job in compiled.values()
+    )
+
+  def get(self, job_id: Optional[str]) -> Optional[Job]:
+    """Get a job by its ID"""
+    return self.jobs.get(job_id) if job_id is not None else None
+
+  def __contains__(self, job_id: str) -> bool:
+    return job_id in self.jobs
+
+  def __iter__(self):
+    return iter(self.jobs.values())
+
+  def __len__(self) -> int:
+    return len(self.jobs)
+
+  def list_embed(
+      self,
+      currency: str,
+      current_job: Optional[str],
+      global_times_worked: int,
+      headcounts: dict[str, int]
+  ) -> discord.Embed:
+    """Build the `work list` embed for a member from the pre-rendered fields"""
+    embed = discord.Embed(title="Available Jobs")
+
+    for job_id, name, description, rate, min_times_worked in self._list_fields:
+      embed.add_field(
+        name=f"{name} (Current Job)" if current_job == job_id else name,
+        value=f"{description} {':heavy_check_mark:' if global_times_worked >= min_times_worked else ':x:'}\n"
+              f"{rate.format(currency=currency)}\n"
+              f"Employees: {headcounts.get(job_id, 0)}",
+        inline=False
+      )
+
+    return embed
+
+
+class JobIndex:
+  """A reverse index from job ID to the IDs of the members employed in it, per guild."""
+
+  def __init__(self):
+    self._employees: dict[int, dict[str, set[int]]] = {}  # guild id -> job id -> member ids
+
+  def rebuild(self, all_members: dict[int, dict[int, dict]]):
+    """Rebuild the whole index from the output of ``Config.all_members()``"""
+    self._employees.clear()
+    for guild_id, members in all_members.items():
+      for member_id, data in members.items():
+        if data.get("job"):
+          self.add(guild_id, member_id, data["job"])
+
+  def add(self, guild_id: int, member_id: int, job_id: str):
+    """Record that a member works a job"""
+    self._employees.setdefault(guild_id, {}).setdefault(job_id, set()).add(member_id)
+
+  def remove(self, guild_id: int, member_id: int, job_id: str):
+    """Record that a member no longer works a job"""
+    employees = self._employees.get(guild_id, {}).get(job_id)
+    if employees is not None:
+      employees.discard(member_id)
+
+  def pop_job(self, job_id: str, guild_id: Optional[int] = None) -> list[tuple[int, int]]:
+    """
+    Drop a job from the index, returning the (guild id, member id) of everyone who worked it.
+
+    Only the given guild is affected, or every guild if it's None (for when jobs are global).
+    """
+    guild_ids = [guild_id] if guild_id is not None else list(self._employees.keys())
+    return [
+      (gid, member_id)
+      for gid in guild_ids
+      for member_id in self._employees.get(gid, {}).pop(job_id, ())
+    ]
+
+  def headcount(self, guild_id: int, job_id: str) -> int:
+    """Get how many members of a guild work a job"""
+    return len(self._employees.get(guild_id, {}).get(job_id, ()))
+
+  def headcounts(self, guild_id: int) -> dict[str, int]:
+    """Get the headcount of every job that has members in a guild"""
+    return {job_id: len(members) for job_id, members in self._employees.get(guild_id, {}).items()}
@@ -0,0 +1,52 @@
+from bisect import bisect_left, insort
+from typing import Callable
+
+
+class Leaderboard:
+  """
+  Members ranked by a score, per guild, kept in order as scores change.
+
+  Each guild has a sorted list of (-score, member id) so the top K is a slice, and updating one member is a bisect
+  instead of re-sorting everyone. Members with a score of 0 are left off.
+  """
+
+  def __init__(self, name: str, score: Callable[[dict], int]):
+    self.name = name
+    self.score = score  # works out a member's score from their member data
+    self._scores: dict[int, dict[int, int]] = {}  # guild id -> member id -> score
+    self._ranked: dict[int, list[tuple[int, int]]] = {}  # guild id -> sorted (-score, member id)
+
+  def rebuild(self, all_members: dict[int, dict[int, dict]]):
+    """Rebuild every guild's board from the output of ``Config.all_members()``"""
+    self._scores.clear()
+    self._ranked.clear()
+    for guild_id, members in all_members.items():
+      scores = {member_id: self.score(data) for member_id, data in members.items()}
+      scores = {member_id: score for member_id, score in scores.items() if score}
+      self._scores[guild_id] = scores
+      self._ranked[guild_id] = sorted((-score, member_id) for member_id, score in scores.items())
+
+  def update(self, guild_id: int, member_id: int, data):
+    """Move a member to where their new score puts them"""
+    score = self.score(data)
+    scores = self._scores.setdefault(guild_id, {})
+    old = scores.get(member_id, 0)
+    if score == old:
+      return
+
+    ranked = self._ranked.setdefault(guild_id, [])
+    if old:
+      del ranked[bisect_left(ranked, (-old, member_id))]
+
+    if score:
+      scores[member_id] = score
+      insort(ranked, (-score, member_id))
+    else:
+      scores.pop(member_id, None)
+
+  def top(self, guild_id: int, k: int = 10) -> list[tuple[int, int]]:
+    """Get the (member id, score) of the top k members in a guild"""
+    return [(member_id, -score) for score, member_id in self._ranked.get(guild_id, [])[:k]]
+
+  def __len__(self) -> int:
+    return sum(len(scores) for scores in self._scores.values())
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+log = logging.getLogger("red.waterfall_economy.ledger")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+  id INTEGER PRIMARY KEY,
+  timestamp REAL NOT NULL,
+  guild_id INTEGER NOT NULL,
+  action TEXT NOT NULL,
+  from_id INTEGER,
+  to_id INTEGER,
+  amount INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_guild_time ON transactions (guild_id, timestamp);
+CREATE INDEX IF NOT EXISTS transactions_from ON transactions (guild_id, from_id, timestamp);
+CREATE INDEX IF NOT EXISTS transactions_to ON transactions (guild_id, to_id, timestamp);
+"""
+
+_COLUMNS = "id, timestamp, guild_id, action, from_id, to_id, amount"
+
+DELETED_USER = 0  # stands in for a user whose data has been deleted, so the ledger's totals still add up
+
+
+class LedgerEntry(NamedTuple):
+  """A single recorded movement of credits, a from/to of None is the bank itself"""
+  id: Optional[int]
+  timestamp: float
+  guild_id: int
+  action: str
+  from_id: Optional[int]
+  to_id: Optional[int]
+  amount: int
+
+
+class EconomyLedger:
+  """
+  An append-only SQLite log of every credit movement the economy makes.
+
+  Commands only put entries on a queue. A background task collects entries for up to `batch_interval` seconds after
+  the first one arrives (or until it has `batch_size` of them) and writes them in one transaction. All the SQLite work
+  happens on a single worker thread so it never blocks the event loop.
+  """
+
+  def __init__(self, path: Path, batch_size: int = 500, batch_interval: float = 1.0):
+    self.path = path
+    self.batch_size = batch_size
+    self.batch_interval = batch_interval
+
+    self._queue: asyncio.Queue[LedgerEntry] = asyncio.Queue()
+    self._wake = asyncio.Event()  # set when a full batch is waiting, or we're closing
+    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="waterfall_economy_ledger")
+    self._connection: Optional[sqlite3.Connection] = None
+    self._task = None
+    self._erased: dict[int, float] = {}  # user id -> time their data was deleted, for entries still on their way in
+
+    self.written = 0
+    self.batches = 0
+
+  def record(self, action: str, guild_id: int, amount: int, from_id: int = None, to_id: int = None):
+    """Queue a credit movement to be written, this never waits"""
+    self._queue.put_nowait(LedgerEntry(None, time.time(), guild_id, action, from_id, to_id, amount))
+    if self._queue.qsize() >= self.batch_size:
+      self._wake.set()
+
+  async def _run(self, func, *args):
+    return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+  def _open(self):
+    self._connection = sqlite3.connect(self.path, check_same_thread=False)
+    self._connection.execute("PRAGMA journal_mode=WAL")
+    self._connection.execute("PRAGMA synchronous=NORMAL")
+    self._connection.executescript(_SCHEMA)
+
+  def _scrub(self, entry: LedgerEntry) -> LedgerEntry:
+    """Take out the ids of users whose data was deleted after this entry was recorded"""
+    if entry.from_id in self._erased and entry.timestamp <= self._erased[entry.from_id]:
+      entry = entry._replace(from_id=DELETED_USER)
+    if entry.to_id in self._erased and entry.timestamp <= self._erased[entry.to_id]:
+      entry = entry._replace(to_id=DELETED_USER)
+    return entry
+
+  def _write(self, entries: list[LedgerEntry]):
+    if self._erased:
+      entries = [self._scrub(entry) for entry in entries]
+    with self._connection:
+      self._connection.executemany(
+        "INSERT INTO transactions (timestamp, guild_id, action, from_id, to_id, amount) VALUES (?, ?, ?, ?, ?, ?)",
+        [entry[1:] for entry in entries]
+      )
+
+  def _erase(self, user_id: int):
+    with self._connection:
+      self._connection.execute("UPDATE transactions SET from_id = ? WHERE from_id = ?", (DELETED_USER, user_id))
+      self._connection.execute("UPDATE transactions SET to_id = ? WHERE to_id = ?", (DELETED_USER, user_id))
+
+  def _select(self, where: str, params: tuple, limit: int) -> list[LedgerEntry]:
+    rows = self._connection.execute(
+      f"SELECT {_COLUMNS} FROM transactions WHERE {where} ORDER BY timestamp DESC LIMIT ?", (*params, limit)
+    ).fetchall()
+    return [LedgerEntry(*row) for row in rows]
+
+  async def _write_batch(self, batch: list[LedgerEntry]):
+    try:
+      await self._run(self._write, batch)
+      self.written += len(batch)
+      self.batches += 1
+    except Exception:
+      log.exception("Failed to write %d ledger entries", len(batch))
+
+  async def _collect_batch(self) -> tuple[list[LedgerEntry], bool]:
+    """Wait for entries and gather up a batch of them, returns the batch and whether the ledger is closing"""
+    entry = await self._queue.get()
+    if entry is not None and self._queue.qsize() < self.batch_size - 1:
+      # give the batch a moment to fill up, waiting on the event rather than the queue so no entry can get lost
+      try:
+        await asyncio.wait_for(self._wake.wait(), self.batch_interval)
+      except asyncio.TimeoutError:
+        pass
+    self._wake.clear()
+
+    batch = []
+    # a None means we're closing, so write what we have straight away
+    while entry is not None:
+      batch.append(entry)
+      if len(batch) >= self.batch_size or self._queue.empty():
+        return batch, False
+      entry = self._queue.get_nowait()
+    return batch, True
+
+  async def _write_loop(self):
+    closing = False
+    while not closing:
+      try:
+        batch, closing = await self._collect_batch()
+        if batch:
+          await self._write_batch(batch)
+      except Exception:
+        # keep the writer going whatever happens, or everything recorded from now on would just pile up in the queue
+        log.exception("Error in the ledger writer")
+
+  async def flush(self):
+    """Write everything that's queued right now"""
+    batch = []
+    while not self._queue.empty():
+      entry = self._queue.get_nowait()
+      if entry is None:
+        # leave the writer's stop signal for it to find
+        self._queue.put_nowait(None)
+        break
+      batch.append(entry)
+
+    if batch:
+      await self._write_batch(batch)
+
+  async def start(self):
+    """Open the database and start the writer task"""
+    await self._run(self._open)
+    if self._task is None:
+      self._task = asyncio.create_task(self._write_loop())
+
+  async def close(self):
+    """Write anything still queued, stop the writer task and close the database"""
+    if self._task is not None:
+      self._queue.put_nowait(None)
+      self._wake.set()
+      await self._task
+      self._task = None
+
+    if self._connection is not None:
+      await self._run(self._connection.close)
+      self._connection = None
+
+    self._executor.shutdown(wait=False)
+
+  async def erase_user(self, user_id: int):
+    """Replace a user's id with DELETED_USER in every entry they're part of, including ones not written yet"""
+    # anything recorded up to now that's still queued, or already collected by the writer, gets scrubbed on its way in
+    self._erased[user_id] = time.time()
+    await self._run(self._erase, user_id)
+
+  async def for_member(self, guild_id: int, member_id: int, limit: int = 20) -> list[LedgerEntry]:
+    """Get the latest entries a member was part of, newest first"""
+    await self.flush()
+    return await self._run(
+      self._select, "guild_id = ? AND (from_id = ? OR to_id = ?)", (guild_id, member_id, member_id), limit
+    )
+
+  async def between(self, guild_id: int, start: float, end: float, limit: int = 20) -> list[LedgerEntry]:
+    """Get the latest entries in a guild between two unix timestamps, newest first"""
+    await self.flush()
+    return await self._run(
+      self._select, "guild_id = ? AND timestamp BETWEEN ? AND ?", (guild_id, start, end), limit
+    )
@@ -0,0 +1,68 @@
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+import discord
+
+
+class MemberLockManager:
+  """
+  Hands out one asyncio lock per (guild, member), so economy actions for the same member run one at a time.
+
+  Locks are only held weakly, so once nobody is waiting on or holding a member's lock it's freed. Actions that involve
+  more than one member take their locks in a fixed order to avoid deadlocks.
+  """
+
+  def __init__(self):
+    self._locks: weakref.WeakValueDictionary[tuple[int, int], asyncio.Lock] = weakref.WeakValueDictionary()
+
+    self.acquisitions = 0
+    self.contended = 0  # how many acquisitions had to wait for another holder
+    self.total_wait = 0.0
+    self.max_wait = 0.0
+
+  def _get_lock(self, key: tuple[int, int]) -> asyncio.Lock:
+    lock = self._locks.get(key)
+    if lock is None:
+      lock = asyncio.Lock()
+      self._locks[key] = lock
+    return lock
+
+  @asynccontextmanager
+  async def lock(self, *members: discord.Member):
+    """Lock one or more members for the duration of the block"""
+    # sort the keys so two actions on the same members always lock them in the same order, and drop duplicates
+    keys = sorted({(member.guild.id, member.id) for member in members})
+    # keep strong references to the locks while we're using them, so they aren't collected from under us
+    locks = [self._get_lock(key) for key in keys]
+    acquired = []
+
+    try:
+      for lock in locks:
+        start = time.perf_counter()
+        contended = lock.locked()
+        await lock.acquire()
+        acquired.append(lock)
+        self._record_wait(time.perf_counter() - start, contended)
+
+      yield
+    finally:
+      for lock in reversed(acquired):
+        lock.release()
+
+  def _record_wait(self, waited: float, contended: bool):
+    self.acquisitions += 1
+    self.total_wait += waited
+    self.max_wait = max(self.max_wait, waited)
+    if contended:
+      self.contended += 1
+
+  @property
+  def average_wait(self) -> float:
+    """The average time spent waiting for a lock, in seconds"""
+    return self.total_wait / self.acquisitions if self.acquisitions else 0.0
+
+  def __len__(self) -> int:
+    """How many locks are currently alive"""
+    return len(self._locks)
@@ -0,0 +1,151 @@
+"""
+Monte Carlo simulator for roulette, used to check the wheel and the payouts actually give the house the edge we expect.
+
+Spins are drawn in vectorised chunks with NumPy and only the per-pocket landing counts are kept, every bet's results
+are worked out from those counts afterwards. NumPy is only imported inside the worker, so the cog loads fine without
+it, and ``run_simulation`` runs the whole thing in a separate process so the bot never stalls while it works.
+"""
+
+import asyncio
+import multiprocessing
+import site
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from .bet_parser import parse_bet
+
+POCKETS = 37
+
+# Red imports cogs straight from its cog folders without putting them on sys.path, so the worker has to be told where to
+# find this package before it can unpickle `simulate`
+COG_FOLDER = str(Path(__file__).resolve().parents[2])
+
+# one of every kind of bet the parser understands
+SAMPLE_BETS = [
+  "17", "0", "red", "black", "even", "odd", "low", "high", "snake", "1st dozen", "column 1", "corner 1", "1-2", "1-2-3",
+  "1-6", "top line",
+]
+
+
+class BetStats(NamedTuple):
+  name: str
+  payout: float
+  win_rate: float
+  house_edge: float  # per credit staked, as seen on the simulated spins
+  expected_edge: float  # per credit staked, on a fair 37 pocket wheel
+  variance: float  # of the player's return per credit staked
+
+
+class TableStats(NamedTuple):
+  """The house's take per spin with one of every bet placed at the table's minimum"""
+  table_type: str
+  min_bet: int
+  max_bet: Optional[int]
+  fee: int
+  house_edge: float
+  mean_take: float
+  std_take: float
+  take_percentiles: tuple[float, float, float]  # 5th, 50th and 95th
+
+
+class SimulationResult(NamedTuple):
+  spins: int
+  pocket_counts: list[int]
+  missing_pockets: list[int]  # pockets that never came up at all
+  max_deviation: float  # biggest relative difference between a pocket's frequency and 1/37
+  bets: list[BetStats]
+  tables: list[TableStats]
+  elapsed: float
+
+
+def sample_bets() -> list[tuple[str, float, int]]:
+  """The (name, payout, pocket mask) of every kind of bet, straight from the bet parser"""
+  bet_types = [parse_bet(bet.split()) for bet in SAMPLE_BETS]
+  return [(bet_type.name, bet_type.payout, bet_type.mask) for bet_type in bet_types]
+
+
+def simulate(
+    wheel: list[int],
+    bets: list[tuple[str, float, int]],
+    table_types: dict[str, dict],
+    spins: int,
+    seed: int = None,
+    chunk_size: int = 1_000_000
+) -> SimulationResult:
+  """Spin the wheel `spins` times and total up how every bet and table type did"""
+  import numpy as np
+
+  start = time.perf_counter()
+  rng = np.random.default_rng(seed)
+  wheel = np.asarray(wheel, dtype=np.int64)
+
+  # spin exactly like the cog does, a uniform pick from the wheel list
+  counts = np.zeros(POCKETS, dtype=np.int64)
+  for done in range(0, spins, chunk_size):
+    landed = wheel[rng.integers(0, len(wheel), size=min(chunk_size, spins - done))]
+    counts += np.bincount(landed, minlength=POCKETS)
+
+  # hits[bet, pocket] is 1 if the bet wins when the ball lands in that pocket
+  masks = np.array([mask for _, _, mask in bets], dtype=np.int64)
+  hits = (masks[:, None] >> np.arange(POCKETS)) & 1
+  returns = np.array([payout for _, payout, _ in bets]) + 1  # paid back per credit on a win, stake included
+
+  win_rate = hits @ counts / spins
+  edge = 1 - win_rate * returns
+  expected_edge = 1 - hits.sum(axis=1) / POCKETS * returns
+  variance = win_rate * (1 - win_rate) * returns ** 2
+
+  bet_stats = [
+    BetStats(name, payout, float(win_rate[i]), float(edge[i]), float(expected_edge[i]), float(variance[i]))
+    for i, (name, payout, _) in enumerate(bets)
+  ]
+
+  # every spin's take only depends on the pocket, so the take per pocket and the landing counts give the distribution
+  frequency = counts / spins
+  order = None
+  table_stats = []
+  for table_type, table in table_types.items():
+    stake = table["MIN_BET"]
+    take = stake * (1 - hits * returns[:, None]).sum(axis=0)
+    mean = float(take @ frequency)
+    std = float(np.sqrt(((take - mean) ** 2) @ frequency))
+
+    if order is None:
+      order = np.argsort(take)  # the same for every table, they only differ in stake
+    cumulative = np.cumsum(frequency[order])
+    percentiles = tuple(
+      float(take[order][min(np.searchsorted(cumulative, q), POCKETS - 1)]) for q in (0.05, 0.5, 0.95)
+    )
+
+    table_stats.append(TableStats(
+      table_type, stake, table["MAX_BET"], table["FEE"], mean / (stake * len(bets)), mean, std, percentiles
+    ))
+
+  return SimulationResult(
+    spins=spins,
+    pocket_counts=counts.tolist(),
+    missing_pockets=[pocket for pocket in range(POCKETS) if not counts[pocket]],
+    max_deviation=float(np.abs(frequency * POCKETS - 1).max()),
+    bets=bet_stats,
+    tables=table_stats,
+    elapsed=time.perf_counter() - start,
+  )
+
+
+async def run_simulation(
+    wheel: list[int], table_types: dict[str, dict], spins: int, seed: int = None
+) -> SimulationResult:
+  """Run a simulation of every kind of bet in a worker process"""
+  # spawn rather than fork, forking a process that's running an event loop and other threads isn't safe
+  pool = ProcessPoolExecutor(
+    max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=site.addsitedir, initargs=(COG_FOLDER,)
+  )
+  try:
+    return await asyncio.get_running_loop().run_in_executor(
+      pool, simulate, list(wheel), sample_bets(), table_types, spins, seed
+    )
+  finally:
+    # don't wait on the worker here, that would block the event loop until it exits
+    pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,113 @@
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Union
+
+import discord
+from redbot.core import Config, bank
+from redbot.core.config import Group
+
+# these were always read from the global scope before settings followed the bank, so a guild that has never set its own
+# keeps the global value instead of dropping back to the defaults
+GLOBAL_FALLBACK_SETTINGS = (
+  "STEAL_COOLDOWN", "STEAL_MIN", "STEAL_MAX", "STEAL_IMMUNITY", "STEAL_SUCCESS_RATE",
+  "JOB_COOLDOWN", "JOB_APPLY_COOLDOWN", "JOBS",
+)
+
+
+def _freeze(value):
+  """Recursively turn dicts and lists into read-only mappings and tuples"""
+  if isinstance(value, dict):
+    return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+  if isinstance(value, list):
+    return tuple(_freeze(item) for item in value)
+  return value
+
+
+class EconomySettings(NamedTuple):
+  """An immutable snapshot of the economy settings for one scope (global or a single guild)"""
+  steal_cooldown: int
+  steal_min: int
+  steal_max: int
+  steal_immunity: int
+  steal_success_rate: int
+  job_cooldown: int
+  job_apply_cooldown: int
+  gambling: Mapping
+
+  @classmethod
+  def from_config(cls, data: dict) -> "EconomySettings":
+    return cls(
+      steal_cooldown=data["STEAL_COOLDOWN"],
+      steal_min=data["STEAL_MIN"],
+      steal_max=data["STEAL_MAX"],
+      steal_immunity=data["STEAL_IMMUNITY"],
+      steal_success_rate=data["STEAL_SUCCESS_RATE"],
+      job_cooldown=data["JOB_COOLDOWN"],
+      job_apply_cooldown=data["JOB_APPLY_COOLDOWN"],
+      gambling=_freeze(data["GAMBLING"]),
+    )
+
+
+class SettingsResolver:
+  """
+  Resolves which scope the economy settings come from and caches a snapshot of them.
+
+  Settings follow the bank: when the bank is global they're read from the global scope, otherwise from the guild, with
+  the steal and job settings a guild hasn't set itself coming from the global scope. Snapshots are kept until a setter
+  invalidates them.
+  """
+
+  def __init__(self, config: Config):
+    self.config = config
+    self._snapshots: dict[Optional[int], EconomySettings] = {}  # scope key -> snapshot
+    self._invalidations = 0
+    self.hits = 0
+    self.misses = 0
+
+  @staticmethod
+  async def scope_key(guild: discord.Guild) -> Optional[int]:
+    """The key for a guild's settings scope, None when the bank is global"""
+    return None if await bank.is_global() else guild.id
+
+  async def scope(self, guild: discord.Guild) -> Union[Config, Group]:
+    """The Config group that holds the settings for a guild, use this for writing settings"""
+    return self.config if await bank.is_global() else self.config.guild(guild)
+
+  async def read(self, guild: discord.Guild) -> dict:
+    """Read a guild's settings straight from Config, use this to read a setting before changing it"""
+    if await bank.is_global():
+      return await self.config.all()
+
+    data = await self.config.guild(guild).all()
+    stored = await self.config._get_base_group(self.config.GUILD).get_raw(str(guild.id), default={})
+    unset = [key for key in GLOBAL_FALLBACK_SETTINGS if key not in stored]
+    if unset:
+      global_data = await self.config.all()
+      for key in unset:
+        data[key] = global_data[key]
+    return data
+
+  async def jobs(self, guild: discord.Guild) -> dict:
+    """Read a guild's jobs, to be changed and written back to the guild's scope"""
+    return (await self.read(guild))["JOBS"]
+
+  async def get(self, guild: discord.Guild) -> EconomySettings:
+    """Get the settings snapshot for a guild, reading it from Config if there isn't one cached"""
+    key = await self.scope_key(guild)
+    snapshot = self._snapshots.get(key)
+
+    if snapshot is not None:
+      self.hits += 1
+      return snapshot
+
+    self.misses += 1
+    invalidations = self._invalidations
+    snapshot = EconomySettings.from_config(await self.read(guild))
+    # don't cache it if a setting changed while we were reading, it might already be stale
+    if invalidations == self._invalidations:
+      self._snapshots[key] = snapshot
+    return snapshot
+
+  async def invalidate(self, guild: discord.Guild):
+    """Drop the cached snapshot for a guild's scope after one of its settings has changed"""
+    self._invalidations += 1
+    self._snapshots.pop(await self.scope_key(guild), None)
@@ -0,0 +1,136 @@
+import logging
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Optional
+
+from .gambling import REDS, BLACKS
+
+log = logging.getLogger("red.waterfall_economy.spin_history")
+
+POCKETS = 37
+
+RED, BLACK, GREEN = "red", "black", "green"
+_COLOURS = [GREEN] + [RED if pocket in REDS else BLACK for pocket in range(1, POCKETS)]
+
+# the longest red and black streaks, then one byte per spin, oldest first
+_HEADER = struct.Struct("<II")
+
+
+def colour_of(pocket: int) -> str:
+  return _COLOURS[pocket]
+
+
+class SpinHistory:
+  """
+  The most recent winning numbers of a guild, in a fixed size ring buffer of one byte per spin.
+
+  The pocket counts and colour streaks are updated as each spin goes in (and the oldest falls out), so nothing ever has
+  to go back over the whole history.
+  """
+
+  def __init__(self, capacity: int):
+    self.capacity = capacity
+    self._buffer = bytearray(capacity)
+    self._start = 0  # index of the oldest spin
+    self._len = 0
+
+    self.counts = array("I", [0] * POCKETS)  # how often each pocket came up in the buffer
+    self.streak_colour: Optional[str] = None
+    self.streak = 0
+    self.longest = {RED: 0, BLACK: 0}  # since history started being kept, not just what's in the buffer
+
+  def push(self, pocket: int):
+    if self._len < self.capacity:
+      self._buffer[(self._start + self._len) % self.capacity] = pocket
+      self._len += 1
+    else:
+      self.counts[self._buffer[self._start]] -= 1
+      self._buffer[self._start] = pocket
+      self._start = (self._start + 1) % self.capacity
+    self.counts[pocket] += 1
+
+    colour = colour_of(pocket)
+    if colour == self.streak_colour:
+      self.streak += 1
+    else:
+      self.streak_colour, self.streak = colour, 1
+    if colour in self.longest:
+      self.longest[colour] = max(self.longest[colour], self.streak)
+
+  def recent(self, k: int) -> list[int]:
+    """The last k winning numbers, newest first"""
+    return [
+      self._buffer[(self._start + self._len - 1 - i) % self.capacity] for i in range(min(k, self._len))
+    ]
+
+  def hot(self, k: int) -> list[tuple[int, int]]:
+    """The k pockets that came up the most, as (pocket, count)"""
+    return sorted(enumerate(self.counts), key=lambda item: (-item[1], item[0]))[:k]
+
+  def cold(self, k: int) -> list[tuple[int, int]]:
+    """The k pockets that came up the least, as (pocket, count)"""
+    return sorted(enumerate(self.counts), key=lambda item: (item[1], item[0]))[:k]
+
+  def colour_counts(self) -> dict[str, int]:
+    totals = {RED: 0, BLACK: 0, GREEN: 0}
+    for pocket, count in enumerate(self.counts):
+      totals[colour_of(pocket)] += count
+    return totals
+
+  def to_bytes(self) -> bytes:
+    end = self._start + self._len
+    if end <= self.capacity:
+      spins = self._buffer[self._start:end]
+    else:
+      spins = self._buffer[self._start:] + self._buffer[:end - self.capacity]
+    return _HEADER.pack(self.longest[RED], self.longest[BLACK]) + spins
+
+  @classmethod
+  def from_bytes(cls, data: bytes, capacity: int) -> "SpinHistory":
+    history = cls(capacity)
+    for pocket in data[_HEADER.size:][-capacity:]:
+      history.push(pocket)
+    longest_red, longest_black = _HEADER.unpack_from(data)
+    history.longest[RED] = max(history.longest[RED], longest_red)
+    history.longest[BLACK] = max(history.longest[BLACK], longest_black)
+    return history
+
+  def __len__(self) -> int:
+    return self._len
+
+
+class SpinHistoryStore:
+  """Every guild's spin history, loaded the first time it's needed and saved as a small binary file per guild"""
+
+  def __init__(self, directory: Path, capacity: int = 4096):
+    self.directory = directory
+    self.capacity = capacity
+    self._histories: dict[int, SpinHistory] = {}
+
+  def _path(self, guild_id: int) -> Path:
+    return self.directory / f"{guild_id}.bin"
+
+  def get(self, guild_id: int) -> SpinHistory:
+    history = self._histories.get(guild_id)
+    if history is None:
+      history = SpinHistory(self.capacity)
+      path = self._path(guild_id)
+      if path.exists():
+        try:
+          history = SpinHistory.from_bytes(path.read_bytes(), self.capacity)
+        except (struct.error, IndexError):
+          log.warning("Spin history for guild %d is unreadable, starting a new one", guild_id)
+      self._histories[guild_id] = history
+    return history
+
+  def record(self, guild_id: int, pocket: int):
+    history = self.get(guild_id)
+    history.push(pocket)
+
+    self.directory.mkdir(parents=True, exist_ok=True)
+    path = self._path(guild_id)
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_bytes(history.to_bytes())
+    os.replace(temp_path, path)
@@ -0,0 +1,59 @@
+from typing import Optional
+
+
+class MemberEconomyState:
+  """A typed snapshot of a member's economy record, with one attribute per member setting."""
+
+  FIELDS = (
+    "job_last_worked",
+    "job",
+    "job_tier",
+    "job_times_worked",
+    "job_global_times_worked",
+    "job_last_quit",
+    "steal_cooldown",
+    "steal_immunity",
+    "gambling_losses",
+    "gambling_wins",
+  )
+
+  __slots__ = FIELDS + ("guild_id", "member_id", "_saved")
+
+  job_last_worked: int
+  job: Optional[str]
+  job_tier: int
+  job_times_worked: int
+  job_global_times_worked: int
+  job_last_quit: int
+  steal_cooldown: int
+  steal_immunity: int
+  gambling_losses: int
+  gambling_wins: int
+
+  def __init__(self, guild_id: int, member_id: int, data: dict):
+    self.guild_id = guild_id
+    self.member_id = member_id
+
+    for field in self.FIELDS:
+      setattr(self, field, data[field])
+
+    # what's currently stored in Config, used to work out which fields need writing
+    self._saved = {field: data[field] for field in self.FIELDS}
+
+  def to_dict(self) -> dict:
+    """Get the record as a dict, in the same shape as the member settings"""
+    return {field: getattr(self, field) for field in self.FIELDS}
+
+  def changes(self) -> dict:
+    """Get the fields that have changed since the record was last written"""
+    return {
+      field: getattr(self, field) for field in self.FIELDS
+      if getattr(self, field) != self._saved[field]
+    }
+
+  def mark_saved(self, fields: dict):
+    """Record that the given field values have been written to Config"""
+    self._saved.update(fields)
+
+  def __repr__(self):
+    return f"<MemberEconomyState guild_id={self.guild_id} member_id={self.member_id} changes={self.changes()}>"
@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+from pathlib import Path
+
+log = logging.getLogger("red.waterfall_economy.table_journal")
+
+# record types, each record is one compact JSON array per line
+OPENED = "o"  # ["o", table id, table data]
+BET = "b"  # ["b", table id, bettor id, pocket mask, payout, bet name, amount]
+SPINNING = "s"  # ["s", table id], betting is over and settlement has started
+SPUN = "w"  # ["w", table id, winning number], the wheel has stopped and payouts are about to go out
+PAID = "p"  # ["p", table id, bettor id], a bettor's payout and stats are being settled, they're never paid again
+SETTLED = "d"  # ["d", table id], every bettor has been settled
+CLOSED = "c"  # ["c", table id]
+
+
+def _encode(record: list) -> str:
+  return json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+
+class JournaledTable:
+  """A roulette table as rebuilt from the journal"""
+
+  __slots__ = ("table_id", "data", "bets", "spinning", "winning_number", "paid", "settled")
+
+  def __init__(self, table_id: int, data: dict):
+    self.table_id = table_id
+    self.data = data
+    self.bets: list[list] = []  # [bettor id, pocket mask, payout, bet name, amount]
+    self.spinning = False
+    self.winning_number: int | None = None
+    self.paid: set[int] = set()  # bettors already settled
+    self.settled = False
+
+
+class TableJournal:
+  """
+  An append-only journal of roulette table opens, bets and closes.
+
+  Every change is appended as a single line, so recording one never rewrites anything. On load the journal is replayed
+  to find the tables that were still open, then compacted down to just those.
+  """
+
+  def __init__(self, path: Path):
+    self.path = path
+    self._file = None
+    self._closed = False
+
+  def _append(self, *records: list):
+    if self._closed:
+      # whoever closed the journal may already have handed its tables over to a new one
+      raise RuntimeError("The roulette table journal is closed")
+    if self._file is None:
+      self._file = open(self.path, "a", encoding="utf-8")
+    self._file.write("".join(map(_encode, records)))
+    self._file.flush()
+
+  def opened(self, table_id: int, data: dict):
+    self._append([OPENED, table_id, data])
+
+  def bets(self, table_id: int, bettor_id: int, bets: list[tuple[int, float, str, int]]):
+    """Record a whole slip of (pocket mask, payout, bet name, amount) bets in one write"""
+    self._append(*([BET, table_id, bettor_id, *bet] for bet in bets))
+
+  def spinning(self, table_id: int):
+    self._append([SPINNING, table_id])
+
+  def spun(self, table_id: int, winning_number: int):
+    self._append([SPUN, table_id, winning_number])
+
+  def paid(self, table_id: int, bettor_id: int):
+    self._append([PAID, table_id, bettor_id])
+
+  def settled(self, table_id: int):
+    self._append([SETTLED, table_id])
+
+  def closed(self, table_id: int):
+    self._append([CLOSED, table_id])
+
+  def replay(self) -> dict[int, JournaledTable]:
+    """Read the journal back, returning the tables that were never closed"""
+    tables: dict[int, JournaledTable] = {}
+    if not self.path.exists():
+      return tables
+
+    with open(self.path, encoding="utf-8") as file:
+      for line_num, line in enumerate(file, start=1):
+        try:
+          kind, table_id, *fields = json.loads(line)
+        except ValueError:
+          # most likely the last line, cut off by a crash mid-write
+          log.warning("Skipping unreadable roulette journal line %d", line_num)
+          continue
+
+        if kind == OPENED:
+          tables[table_id] = JournaledTable(table_id, fields[0])
+        elif kind == CLOSED:
+          tables.pop(table_id, None)
+        elif table_id in tables:
+          if kind == BET:
+            tables[table_id].bets.append(fields)
+          elif kind == SPINNING:
+            tables[table_id].spinning = True
+          elif kind == SPUN:
+            tables[table_id].winning_number = fields[0]
+          elif kind == PAID:
+            tables[table_id].paid.add(fields[0])
+          elif kind == SETTLED:
+            tables[table_id].settled = True
+
+    return tables
+
+  def compact(self, tables: dict[int, JournaledTable]):
+    """Rewrite the journal with only the given tables in it"""
+    self._close_file()
+    temp_path = self.path.with_suffix(".tmp")
+    with open(temp_path, "w", encoding="utf-8") as file:
+      for table in tables.values():
+        file.write(_encode([OPENED, table.table_id, table.data]))
+        for bet in table.bets:
+          file.write(_encode([BET, table.table_id, *bet]))
+        if table.spinning:
+          file.write(_encode([SPINNING, table.table_id]))
+        if table.winning_number is not None:
+          file.write(_encode([SPUN, table.table_id, table.winning_number]))
+        for bettor_id in table.paid:
+          file.write(_encode([PAID, table.table_id, bettor_id]))
+        if table.settled:
+          file.write(_encode([SETTLED, table.table_id]))
+    os.replace(temp_path, self.path)
+
+  def close(self):
+    """Close the journal for good, anything recorded after this is refused"""
+    self._closed = True
+    self._close_file()
+
+  def _close_file(self):
+    if self._file is not None:
+      self._file.close()
+      self._file = None
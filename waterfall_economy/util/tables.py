@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .board import LiveMessage
+from .gambling import RouletteBet
+
+
+class RouletteTable:
+  """An open roulette table, living in its own thread"""
+
+  __slots__ = (
+    "channel_id", "guild_id", "owner_id", "name", "table_type", "min_bet", "max_bet", "duration", "closes_at", "bets",
+    "is_open", "board_id", "board", "absent_bets"
+  )
+
+  def __init__(
+      self,
+      channel_id: int,
+      guild_id: int,
+      owner_id: int,
+      name: str,
+      table_type: str,
+      min_bet: int,
+      max_bet: Optional[int],
+      duration: float,
+      closes_at: float,
+      board_id: Optional[int] = None
+  ):
+    self.channel_id = channel_id
+    self.guild_id = guild_id
+    self.owner_id = owner_id
+    self.name = name
+    self.table_type = table_type
+    self.min_bet = min_bet
+    self.max_bet = max_bet
+    self.duration = duration
+    self.closes_at = closes_at
+    self.bets: list[RouletteBet] = []
+    self.is_open = True
+    self.board_id = board_id  # the message showing the table's bets, then its results
+    self.board: Optional[LiveMessage] = None
+    # journaled [bettor id, pocket mask, payout, bet name, amount] bets by bettors who weren't around to put back
+    self.absent_bets: list[list] = []
+
+  def to_journal(self) -> dict:
+    """The table's settings, as written to the table journal"""
+    return {
+      "guild": self.guild_id,
+      "owner": self.owner_id,
+      "name": self.name,
+      "min_bet": self.min_bet,
+      "max_bet": self.max_bet,
+      "type": self.table_type,
+      "duration": self.duration,
+      "closes_at": self.closes_at,
+      "board": self.board_id,
+    }
+
+  @classmethod
+  def from_journal(cls, channel_id: int, data: dict) -> "RouletteTable":
+    return cls(
+      channel_id=channel_id,
+      guild_id=data["guild"],
+      owner_id=data["owner"],
+      name=data.get("name", "Roulette Table"),
+      table_type=data["type"],
+      min_bet=data["min_bet"],
+      max_bet=data["max_bet"],
+      duration=data["duration"],
+      closes_at=data["closes_at"],
+      board_id=data.get("board"),
+    )
+
+
+class TableRegistry:
+  """The open roulette tables, indexed by channel, owner and guild."""
+
+  def __init__(self):
+    self._by_channel: dict[int, RouletteTable] = {}
+    self._by_owner: dict[int, set[int]] = {}  # owner id -> channel ids
+    self._by_guild: dict[int, set[int]] = {}  # guild id -> channel ids
+    self._reserved: dict[int, int] = {}  # guild id -> tables being opened
+    self._opening: set[int] = set()  # owner ids with a table being opened
+
+  def add(self, table: RouletteTable):
+    self._by_channel[table.channel_id] = table
+    self._by_owner.setdefault(table.owner_id, set()).add(table.channel_id)
+    self._by_guild.setdefault(table.guild_id, set()).add(table.channel_id)
+
+  def remove(self, channel_id: int) -> Optional[RouletteTable]:
+    table = self._by_channel.pop(channel_id, None)
+    if table is not None:
+      self._discard(self._by_owner, table.owner_id, channel_id)
+      self._discard(self._by_guild, table.guild_id, channel_id)
+    return table
+
+  @staticmethod
+  def _discard(index: dict[int, set[int]], key: int, channel_id: int):
+    channel_ids = index.get(key)
+    if channel_ids is not None:
+      channel_ids.discard(channel_id)
+      if not channel_ids:
+        del index[key]
+
+  def get(self, channel_id: int) -> Optional[RouletteTable]:
+    """Get the table in a channel"""
+    return self._by_channel.get(channel_id)
+
+  def owned_by(self, owner_id: int) -> list[RouletteTable]:
+    """Get every table a member owns, in any guild"""
+    return [self._by_channel[channel_id] for channel_id in self._by_owner.get(owner_id, ())]
+
+  def in_guild(self, guild_id: int) -> list[RouletteTable]:
+    """Get every table in a guild, soonest to close first"""
+    tables = [self._by_channel[channel_id] for channel_id in self._by_guild.get(guild_id, ())]
+    return sorted(tables, key=lambda table: table.closes_at)
+
+  def has_open_table(self, owner_id: int) -> bool:
+    """Check whether a member owns a table that's still taking bets, or is opening one"""
+    return owner_id in self._opening or any(table.is_open for table in self.owned_by(owner_id))
+
+  def count_in_guild(self, guild_id: int) -> int:
+    """Count the tables in a guild, including the ones that are still being opened"""
+    return len(self._by_guild.get(guild_id, ())) + self._reserved.get(guild_id, 0)
+
+  @contextmanager
+  def reserve(self, guild_id: int, owner_id: int):
+    """Hold a place for a table while it's being opened, so it counts towards the guild's and owner's limits at once"""
+    self._reserved[guild_id] = self._reserved.get(guild_id, 0) + 1
+    self._opening.add(owner_id)
+    try:
+      yield
+    finally:
+      self._opening.discard(owner_id)
+      self._reserved[guild_id] -= 1
+      if not self._reserved[guild_id]:
+        del self._reserved[guild_id]
+
+  def __contains__(self, channel_id: int) -> bool:
+    return channel_id in self._by_channel
+
+  def __iter__(self) -> Iterator[RouletteTable]:
+    return iter(self._by_channel.values())
+
+  def __len__(self) -> int:
+    return len(self._by_channel)
@@ -0,0 +1,156 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Hashable, Optional
+
+log = logging.getLogger("red.waterfall_economy.timers")
+
+
+class TimerService:
+  """
+  Keeps track of when things expire (cooldowns, immunities...) in memory.
+
+  Expiry times are held in a dict so "is it active / how long is left" is a single lookup, and a min-heap of upcoming
+  expiries drives one background task that runs any callbacks attached to a timer when it runs out. Each callback gets
+  its own task, so a slow one doesn't hold up the timers after it.
+  """
+
+  def __init__(self):
+    self._expiries: dict[Hashable, float] = {}  # key -> unix timestamp it expires at
+    self._callbacks: dict[Hashable, list[Callable[[], Awaitable]]] = {}
+    # (expires at, tie breaker, key), entries for timers that have since been changed are skipped when popped
+    self._heap: list[tuple[float, int, Hashable]] = []
+    self._counter = itertools.count()
+    self._wakeup = asyncio.Event()
+    self._task = None
+    self._running: set[asyncio.Task] = set()
+
+    self.fired = 0
+    self.total_lateness = 0.0  # how long after their expiry callbacks actually got started
+    self.max_lateness = 0.0
+
+  def set(self, key: Hashable, expires_at: float):
+    """Set (or move) when a timer expires, any callbacks attached to it are kept"""
+    if self._expiries.get(key) == expires_at:
+      return
+
+    self._expiries[key] = expires_at
+    # timers that are already over only need to go on the heap if they have callbacks waiting to be run
+    if expires_at > time.time() or key in self._callbacks:
+      heapq.heappush(self._heap, (expires_at, next(self._counter), key))
+      self._wakeup.set()
+
+  def schedule(self, key: Hashable, expires_at: float, callback: Callable[[], Awaitable]):
+    """Set a timer and run a coroutine function when it expires, even if that's already passed"""
+    self._callbacks.setdefault(key, []).append(callback)
+    self._expiries[key] = expires_at
+    heapq.heappush(self._heap, (expires_at, next(self._counter), key))
+    self._wakeup.set()
+
+  def cancel(self, key: Hashable):
+    """Forget a timer and drop its callbacks"""
+    self._expiries.pop(key, None)
+    self._callbacks.pop(key, None)
+
+  def add_callback(self, key: Hashable, callback: Callable[[], Awaitable]) -> bool:
+    """Run a coroutine function when a timer expires, returns False if the timer isn't running"""
+    if not self.is_active(key):
+      return False
+    self._callbacks.setdefault(key, []).append(callback)
+    return True
+
+  def remaining(self, key: Hashable, now: float = None) -> Optional[float]:
+    """Get how many seconds are left on a timer, 0 if it's expired, or None if it isn't known"""
+    expires_at = self._expiries.get(key)
+    if expires_at is None:
+      return None
+    return max(expires_at - (now if now is not None else time.time()), 0)
+
+  def is_active(self, key: Hashable, now: float = None) -> bool:
+    """Check whether a timer is still running"""
+    return bool(self.remaining(key, now))
+
+  @property
+  def pending(self) -> int:
+    """How many timers have callbacks waiting to run"""
+    return len(self._callbacks)
+
+  @property
+  def average_lateness(self) -> float:
+    """The average time between a timer expiring and its callbacks starting, in seconds"""
+    return self.total_lateness / self.fired if self.fired else 0.0
+
+  def keys(self):
+    return self._expiries.keys()
+
+  def __contains__(self, key: Hashable) -> bool:
+    return key in self._expiries
+
+  def __len__(self) -> int:
+    return len(self._expiries)
+
+  async def _run(self):
+    while True:
+      self._wakeup.clear()
+
+      if not self._heap:
+        await self._wakeup.wait()
+        continue
+
+      expires_at, _, key = self._heap[0]
+      delay = expires_at - time.time()
+      if delay > 0:
+        # sleep until the next expiry, or until an earlier one gets added
+        try:
+          await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+          pass
+        continue
+
+      heapq.heappop(self._heap)
+      if self._expiries.get(key) != expires_at:
+        # the timer was moved or cancelled after this entry was pushed
+        continue
+
+      callbacks = self._callbacks.pop(key, ())
+      if callbacks:
+        lateness = time.time() - expires_at
+        self.fired += 1
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+
+      for callback in callbacks:
+        task = asyncio.create_task(self._fire(key, callback))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+  @staticmethod
+  async def _fire(key: Hashable, callback: Callable[[], Awaitable]):
+    try:
+      await callback()
+    except Exception:
+      log.exception("Timer callback for %r failed", key)
+
+  def start(self):
+    """Start the background task that fires expiry callbacks"""
+    if self._task is None:
+      self._task = asyncio.create_task(self._run())
+
+  async def close(self, wait: bool = False):
+    """
+    Stop the background task, then wait for callbacks that have already started to finish (`wait`) or cancel them.
+
+    Either way nothing started by this service is still running once this returns.
+    """
+    if self._task is not None:
+      self._task.cancel()
+      self._task = None
+
+    running = list(self._running)
+    if not wait:
+      for task in running:
+        task.cancel()
+    # callbacks log their own errors, so all that's left to collect here is cancellations
+    await asyncio.gather(*running, return_exceptions=True)
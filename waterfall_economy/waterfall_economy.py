@@ -1,16 +1,29 @@
 from redbot.core import Config, commands, app_commands, bank
+from redbot.core.data_manager import cog_data_path
 from redbot.core.commands.converter import TimedeltaConverter
 from redbot.core.utils.chat_formatting import humanize_number
 from redbot.core.commands.requires import PrivilegeLevel
 
 from datetime import datetime, timezone, timedelta
 
+import asyncio
 import discord
 import calendar
 
 from random import randint, randrange
 
 from .commands import EconomyCommands
+from .util.cache import MemberStateCache, BulkResetResult
+from .util.jobs import JobCatalog, JobIndex
+from .util.leaderboard import Leaderboard
+from .util.ledger import EconomyLedger
+from .util.locks import MemberLockManager
+from .util.settings import EconomySettings, SettingsResolver
+from .util.spin_history import SpinHistoryStore
+from .util.state import MemberEconomyState
+from .util.table_journal import TableJournal
+from .util.tables import TableRegistry
+from .util.timers import TimerService
 
 
 def guild_only():
@@ -63,6 +76,7 @@ class WaterfallEconomy(
         "MAX_DURATION": 600,
         "MIN_DURATION": 30,
         "OPEN_TABLES": {},
+        "MAX_OPEN_TABLES": None,
         "TABLE_OPEN_COST": None,
         "TOTAL_LOST": 0,
       },
@@ -95,6 +109,14 @@ class WaterfallEconomy(
 
   default_user_settings = default_member_settings
 
+  # timer kind -> (member field holding when it was last started, setting holding how long it lasts)
+  timer_kinds = {
+    "steal_cooldown": ("steal_cooldown", "steal_cooldown"),
+    "steal_immunity": ("steal_immunity", "steal_immunity"),
+    "job_cooldown": ("job_last_worked", "job_cooldown"),
+    "job_apply_cooldown": ("job_last_quit", "job_apply_cooldown"),
+  }
+
   def __init__(self, bot):
     super().__init__(bot)
     self.bot = bot
@@ -106,3 +128,161 @@ class WaterfallEconomy(
     self.config.register_role(**self.default_role_settings)
     self.config.register_user(**self.default_user_settings)
 
+    self.member_cache = MemberStateCache(self.config, self.default_member_settings)
+    self.settings = SettingsResolver(self.config)
+    self.member_locks = MemberLockManager()
+    self.timers = TimerService()
+    self.ledger = EconomyLedger(cog_data_path(self) / "ledger.sqlite3")
+    self.table_journal = TableJournal(cog_data_path(self) / "roulette_tables.journal")
+    self.table_timers = TimerService()  # table id -> when it closes
+    self.tables = TableRegistry()
+    self.spin_history = SpinHistoryStore(cog_data_path(self) / "spin_history")
+    self._table_recovery = None
+
+    # compiled job catalogs, rebuilt whenever their version falls behind the current one
+    self._job_catalogs: dict[int | None, JobCatalog] = {}
+    self._job_catalog_versions: dict[int | None, int] = {}
+    self._job_catalog_lock = asyncio.Lock()
+    self.job_index = JobIndex()
+
+    # roulette boards, kept up to date as member records are committed
+    self.leaderboards = {
+      "losses": Leaderboard("Losses", lambda data: data.get("gambling_losses", 0)),
+      "wins": Leaderboard("Winnings", lambda data: data.get("gambling_wins", 0)),
+      "net": Leaderboard("Net Profit", lambda data: data.get("gambling_wins", 0) - data.get("gambling_losses", 0)),
+    }
+
+  async def cog_load(self):
+    all_members = await self.config.all_members()
+    self.job_index.rebuild(all_members)
+    for leaderboard in self.leaderboards.values():
+      leaderboard.rebuild(all_members)
+    self.member_cache.start()
+    self.timers.start()
+    await self.ledger.start()
+    self.table_timers.start()
+    self._table_recovery = asyncio.create_task(self._recover_tables())
+
+  async def cog_unload(self):
+    if self._table_recovery is not None:
+      self._table_recovery.cancel()
+      await asyncio.gather(self._table_recovery, return_exceptions=True)
+    # tables that are still taking bets are journaled and get picked back up on the next load, but spins that have
+    # already started are let finish here, or the next load would settle them from the journal a second time
+    await self.table_timers.close(wait=True)
+    for table in self.tables:
+      if table.board is not None:
+        table.board.close()
+    self.table_journal.close()
+    await self.timers.close()
+    await self.member_cache.close()
+    await self.ledger.close()
+
+  async def red_delete_data_for_user(self, *, requester, user_id: int):
+    """Delete a user's economy records in every guild, and take their id out of the transaction ledger"""
+    # cached states first, so nothing in memory writes the records back once they're cleared
+    records = {state.guild_id: state.to_dict() for state in await self.member_cache.forget(user_id)}
+    for guild_id, members in (await self.config.all_members()).items():
+      if user_id in members:
+        records.setdefault(guild_id, members[user_id])
+        await self.config.member_from_ids(guild_id, user_id).clear()
+
+    for guild_id, data in records.items():
+      if data.get("job"):
+        self.job_index.remove(guild_id, user_id, data["job"])
+      for leaderboard in self.leaderboards.values():
+        leaderboard.update(guild_id, user_id, {})
+    for key in [key for key in self.timers.keys() if key[2] == user_id]:
+      self.timers.cancel(key)
+
+    await self.config.user_from_id(user_id).clear()
+    await self.ledger.erase_user(user_id)
+
+  async def load_member_state(self, member: discord.Member) -> MemberEconomyState:
+    """Get a snapshot of a member's economy record (one Config read, or none if it's cached)"""
+    return await self.member_cache.load(member)
+
+  async def commit_member_state(self, state: MemberEconomyState):
+    """Commit the changed fields of a member's snapshot, they get written together on the next flush"""
+    self.member_cache.commit(state)
+    await self._schedule_timers(state)
+
+    data = state.to_dict()
+    for leaderboard in self.leaderboards.values():
+      leaderboard.update(state.guild_id, state.member_id, data)
+
+  async def _schedule_timers(self, state: MemberEconomyState, kinds=None):
+    """Set a member's timers from the start times in their record and the current duration settings"""
+    guild = self.bot.get_guild(state.guild_id)
+    if guild is None:
+      return
+
+    settings = await self.get_settings(guild)
+    for kind in kinds or self.timer_kinds:
+      field, setting = self.timer_kinds[kind]
+      self.timers.set((kind, state.guild_id, state.member_id), getattr(state, field) + getattr(settings, setting))
+
+  async def timer_remaining(self, kind: str, member: discord.Member, now: float = None) -> float:
+    """Get how many seconds are left on one of a member's timers, 0 if it isn't running"""
+    key = (kind, member.guild.id, member.id)
+    remaining = self.timers.remaining(key, now)
+
+    if remaining is None:
+      # first time we've seen this member since loading, set their timers from their record
+      await self._schedule_timers(await self.load_member_state(member))
+      remaining = self.timers.remaining(key, now) or 0
+
+    return remaining
+
+  async def reschedule_timers(self, guild: discord.Guild, *kinds: str):
+    """Move running timers after their duration setting has changed"""
+    scope_key = await self.settings.scope_key(guild)
+    members = {
+      (guild_id, member_id)
+      for kind, guild_id, member_id in self.timers.keys()
+      if kind in kinds and (scope_key is None or guild_id == scope_key)
+    }
+
+    for guild_id, member_id in members:
+      await self._schedule_timers(await self.member_cache.load_from_ids(guild_id, member_id), kinds)
+
+  async def get_settings(self, guild: discord.Guild) -> EconomySettings:
+    """Get the settings snapshot for a guild, from the global scope if the bank is global"""
+    return await self.settings.get(guild)
+
+  async def get_job_catalog(self, guild: discord.Guild) -> JobCatalog:
+    """Get the compiled job catalog for a guild, rebuilding it if the jobs have changed since it was built"""
+    key = await self.settings.scope_key(guild)
+    catalog = self._job_catalogs.get(key)
+
+    if catalog is None or catalog.version != self._job_catalog_versions.get(key, 0):
+      async with self._job_catalog_lock:
+        # someone else may have rebuilt it while we were waiting for the lock
+        catalog = self._job_catalogs.get(key)
+        version = self._job_catalog_versions.get(key, 0)
+        if catalog is None or catalog.version != version:
+          catalog = JobCatalog(version, await self.settings.jobs(guild))
+          self._job_catalogs[key] = catalog
+
+    return catalog
+
+  async def invalidate_job_catalog(self, guild: discord.Guild):
+    """Bump the job catalog version after the jobs have been changed, so it's rebuilt on next use"""
+    key = await self.settings.scope_key(guild)
+    self._job_catalog_versions[key] = self._job_catalog_versions.get(key, 0) + 1
+
+  async def bulk_reset_members(self, guild: discord.Guild, *fields: str) -> BulkResetResult:
+    """Reset member fields to their defaults for a whole guild in one grouped write"""
+    result = await self.member_cache.reset_fields(guild.id, *fields)
+
+    # the cleared records have the timers starting at their default of 0 (the epoch), so they expire at 0 + their
+    # duration, long in the past: they're over, and any callbacks waiting on them run straight away
+    kinds = {kind for kind, (field, _) in self.timer_kinds.items() if field in fields}
+    if kinds:
+      settings = await self.get_settings(guild)
+      for key in [key for key in self.timers.keys() if key[0] in kinds and key[1] == guild.id]:
+        started_at = self.default_member_settings[self.timer_kinds[key[0]][0]]
+        self.timers.set(key, started_at + getattr(settings, self.timer_kinds[key[0]][1]))
+
+    return result
+